@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+ Benchmark – Doğrudan (direct) vs İteratif (recursive) 28 Günlük Tahmin
+ Amaç:
+- Son 28 günü geriye dönük test (holdout) olarak ayırıp iki yolu aynı koşullarda karşılaştırmak:
+  her iki model de yalnızca kesim tarihine kadarki veriyle, aynı ayarlı parametrelerle eğitilir
+- Kampanya seviyeleri test dönemindeki gerçek değerlerden alınır (iki yolda da aynı)
+- Eğitim ve tahmin süresini (wall-clock) ve WMAPE'yi (toplam ve haftalık ufuk grubu bazında) ölçmek
+- Sonuçları outputs/benchmarks/direct_vs_recursive.json dosyasına yazmak
+
+İteratif yol eğitimdeki lag tanımlarını kullanır (forecast_engine.recursive_features: gerçek t-7/t-14).
+WMAPE kullanılan geçmişe bağlıdır; karşılaştırılabilirlik için JSON'a özellik deposunun tarih
+aralığı ve satır sayısı da yazılır.
+
+Kullanım (proje kökünden):
+    python benchmarks/bench_direct.py
+"""
+
+import os
+import sys
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from lightgbm import LGBMRegressor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from direct_forecast import HORIZON, TUNED_FEATURES, build_calendar, forecast_direct, train_direct_models
+from sales_panel import PANEL_COLUMNS, SalesPanel
+from feature_store import load_features
+from forecast_engine import exog_steps, forecast_recursive
+from tuning_cache import load_tuned_params
+from store_traffic import StoreTraffic
+
+OUT_PATH = os.path.join("outputs", "benchmarks", "direct_vs_recursive.json")
+HISTORY_DAYS = 30
+
+
+def wmape(y_true, y_pred):
+    """Weighted Mean Absolute Percentage Error"""
+    return 100 * np.sum(np.abs(y_true - y_pred)) / np.sum(np.abs(y_true) + 1e-8)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    df = load_features(columns=list(dict.fromkeys(PANEL_COLUMNS + TUNED_FEATURES)))
+    df["family"] = df["family"].astype(str)
+    panel = SalesPanel.from_frame(df)
+    cutoff = panel.dates[-1] - pd.Timedelta(days=HORIZON)
+    train_panel = panel.truncate(cutoff)
+    calendar = build_calendar(panel.dates[-1])
+    params = load_tuned_params(TUNED_FEATURES)
+    print(f" Kesim tarihi: {cutoff.date()} → test: {HORIZON} gün, {panel.n_series} seri")
+
+    # Gerçek değerler ve test dönemindeki kampanyalar (ufuk × seri)
+    test_cols = slice(len(train_panel.dates), len(panel.dates))
+    actual = panel.sales[:, test_cols].T
+    promo = panel.promo[:, test_cols].T
+    observed = ~np.isnan(actual)
+
+    # --- İteratif yol: kesime kadarki satırlarla eğitim, gün gün tahmin ---
+    train_rows = df[df["date"] <= cutoff]
+    recursive_model, recursive_train_s = timed(
+        lambda: LGBMRegressor(**params).fit(train_rows[TUNED_FEATURES], train_rows["sales"]))
+
+    def run_recursive():
+        buf = train_panel.ring_buffer(days=HISTORY_DAYS)
+        # Trafik durumu yalnızca kesime kadarki işlem sayılarından (sonrası ileri taşınır)
+        transactions = pd.read_csv(os.path.join("data", "transactions.csv"), parse_dates=["date"])
+        traffic = StoreTraffic.build(transactions[transactions["date"] <= cutoff],
+                                     pd.read_csv(os.path.join("data", "stores.csv")),
+                                     start=cutoff + pd.Timedelta(days=1), end=cutoff)
+        steps = exog_steps(calendar, panel.dates[test_cols],
+                           panel.pairs["store_nbr"].to_numpy(dtype=np.int64),
+                           panel.pairs["family_encoded"].to_numpy(dtype=np.int64), promo, traffic=traffic)
+        return forecast_recursive(recursive_model, buf, steps, TUNED_FEATURES, verbose=False)
+
+    recursive_pred, recursive_predict_s = timed(run_recursive)
+
+    # --- Doğrudan yol: ufuk grubu başına model, tek toplu tahmin ---
+    bundle, direct_train_s = timed(lambda: train_direct_models(train_panel, calendar, params))
+    direct_out, direct_predict_s = timed(
+        lambda: forecast_direct(bundle, train_panel, calendar, days=HORIZON, promo=promo))
+    # forecast_direct çıktısı (mağaza, ürün, tarih) sıralı → (ufuk × seri)
+    direct_pred = direct_out["predicted_sales"].to_numpy().reshape(panel.n_series, HORIZON).T
+
+    results = {"cutoff": str(cutoff.date()), "horizon": HORIZON, "n_series": panel.n_series,
+               "history": {"first_date": str(panel.dates[0].date()), "last_date": str(panel.dates[-1].date()),
+                           "n_rows": len(df)},
+               "paths": {}}
+    for name, pred, train_s, predict_s in (("recursive", recursive_pred, recursive_train_s, recursive_predict_s),
+                                           ("direct", direct_pred, direct_train_s, direct_predict_s)):
+        weekly = {f"{lo}-{lo + 6}": wmape(actual[lo - 1:lo + 6][observed[lo - 1:lo + 6]],
+                                          pred[lo - 1:lo + 6][observed[lo - 1:lo + 6]])
+                  for lo in range(1, HORIZON + 1, 7)}
+        results["paths"][name] = {
+            "train_s": train_s,
+            "predict_s": predict_s,
+            "wmape": wmape(actual[observed], pred[observed]),
+            "wmape_by_horizon": weekly,
+        }
+        print(f" {name:9s} | eğitim {train_s:7.1f} sn | tahmin {predict_s:6.2f} sn | "
+              f"WMAPE {results['paths'][name]['wmape']:6.2f} | haftalık "
+              + ", ".join(f"{k}: {v:.1f}" for k, v in weekly.items()))
+
+    os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
+    with open(OUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f" Sonuçlar kaydedildi: {OUT_PATH}")
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+ Benchmark – Tahmin Gecikmesi (LightGBM vs düz dizi ağaç çıkarımı)
+ Amaç:
+- tree_inference.FlatForest ile best_model.joblib modelinin (lgb.Booster ya da LGBMRegressor) predict
+  sonuçlarının birebir eşit olduğunu doğrulamak
+- 1, 1.000 ve 1.000.000 satırlık toplularda gecikmeyi ölçmek
+- Sonuçları outputs/benchmarks/inference.json dosyasına yazmak
+
+Eşitlik burada yalnızca gerçek modelin ve verinin satırlarında denetlenir; eksik değer yönlendirmesi
+ve sınır durumları için modelden bağımsız kontrol: benchmarks/check_tree_inference.py
+
+Kullanım (proje kökünden):
+    python benchmarks/bench_inference.py
+"""
+
+import os
+import sys
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import load
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from feature_store import load_features, store_exists
+from tree_inference import FlatForest, _get_numba_kernel
+
+MODEL_PATH = os.path.join("outputs", "best_model.joblib")
+OUT_PATH = os.path.join("outputs", "benchmarks", "inference.json")
+BATCH_SIZES = [1, 1_000, 1_000_000]
+REPEATS = {1: 200, 1_000: 20, 1_000_000: 1}
+NUMPY_MAX_ROWS = 100_000       # NumPy yedek çekirdeği bu boyutun üstünde ölçülmez
+
+
+def feature_matrix(feature_names, n_rows):
+    """Özellik deposundan (yoksa makul aralıklarda rastgele) n_rows satırlık matris."""
+    if store_exists():
+        base = load_features(columns=feature_names).iloc[-200_000:]
+    else:
+        rng = np.random.default_rng(42)
+        base = pd.DataFrame({
+            "store_nbr": rng.integers(1, 55, 200_000), "onpromotion": rng.poisson(2, 200_000),
+            "year": 2017, "month": rng.integers(1, 13, 200_000), "day": rng.integers(1, 29, 200_000),
+            "day_of_week": rng.integers(0, 7, 200_000), "is_holiday": rng.integers(0, 2, 200_000),
+            "dcoilwtico": rng.uniform(40, 60, 200_000), "rolling_sales_mean_7": rng.gamma(2, 100, 200_000),
+            "sales_lag_7": rng.gamma(2, 100, 200_000), "sales_lag_14": rng.gamma(2, 100, 200_000),
+            "is_weekend": rng.integers(0, 2, 200_000), "family_encoded": rng.integers(0, 33, 200_000),
+            "transactions_lag_7": rng.gamma(4, 400, 200_000), "transactions_lag_14": rng.gamma(4, 400, 200_000),
+            "rolling_transactions_mean_7": rng.gamma(4, 400, 200_000),
+            "rolling_transactions_mean_28": rng.gamma(4, 400, 200_000),
+        })[feature_names]
+    reps = int(np.ceil(n_rows / len(base)))
+    return pd.concat([base] * reps, ignore_index=True).iloc[:n_rows]
+
+
+def timeit(fn, repeats):
+    fn()    # ısınma (numba derlemesi, önbellekler)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+if __name__ == "__main__":
+    model = load(MODEL_PATH)
+    flat = FlatForest.from_model(model)
+    names = flat.feature_names
+    df_all = feature_matrix(names, max(BATCH_SIZES))
+    X32_all = df_all.to_numpy(dtype=np.float32)
+
+    # --- Birebir eşitlik kontrolü ---
+    parity_rows = 100_000
+    ref = model.predict(X32_all[:parity_rows])
+    got = flat.predict(X32_all[:parity_rows])
+    assert np.array_equal(ref, got), f"Eşitlik bozuldu: max fark {np.abs(ref - got).max()}"
+    flat64 = FlatForest.from_model(model, dtype=np.float64)
+    assert np.array_equal(model.predict(df_all.iloc[:10_000]), flat64.predict(df_all.iloc[:10_000]))
+    print(f" Eşitlik doğrulandı: {parity_rows} satır (float32) ve 10000 satır (DataFrame/float64)")
+
+    results = {"n_trees": flat.n_trees, "n_nodes": int(len(flat.feature)), "numba": _get_numba_kernel() is not None,
+               "batches": []}
+    for n in BATCH_SIZES:
+        df, X32 = df_all.iloc[:n], X32_all[:n]
+        row = {
+            "batch_size": n,
+            "lightgbm_dataframe_ms": timeit(lambda: model.predict(df), REPEATS[n]),
+            "lightgbm_numpy_ms": timeit(lambda: model.predict(X32), REPEATS[n]),
+            "flat_ms": timeit(lambda: flat.predict(X32), REPEATS[n]),
+            "flat_numpy_ms": timeit(lambda: flat.predict(X32, backend="numpy"), REPEATS[n]) if n <= NUMPY_MAX_ROWS else None,
+        }
+        results["batches"].append(row)
+        print(f" {n:>9} satır | LGBM(DataFrame) {row['lightgbm_dataframe_ms']:9.3f} ms | "
+              f"LGBM(ndarray) {row['lightgbm_numpy_ms']:9.3f} ms | düz {row['flat_ms']:9.3f} ms")
+
+    os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
+    with open(OUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f" Sonuçlar kaydedildi: {OUT_PATH}")
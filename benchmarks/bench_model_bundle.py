@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+ Benchmark – Model Yükleme (best_model.joblib vs model paketi)
+ Amaç:
+- Aynı modeli üç yoldan açmanın süresini ve bellek artışını taze süreçlerde ölçmek:
+    joblib     best_model.joblib unpickle (lightgbm ve sklearn içe aktarılır)
+    lightgbm   paketteki model.txt → lgb.Booster
+    flat       paketteki ağaç dizileri, bellek eşlemeli FlatForest (model_bundle.py)
+- Her yolun tahminlerinin aynı olduğunu doğrulamak (özellik deposunun son satırlarında)
+- Sonuçları outputs/benchmarks/model_bundle.json dosyasına yazmak
+
+Ölçüm, tüketici betiklerin zaten yüklediği numpy/pandas içe aktarıldıktan sonra başlar; bellek
+artışı yükleme öncesi ve sonrası RSS farkıdır (/proc/self/status, Linux; ru_maxrss exec'te üst
+süreçten devralındığı için kullanılmaz). mmap dizileri yalnızca okunan sayfalar kadar yer tutar.
+Paket yoksa best_model.joblib'den geçici olarak oluşturulur.
+
+Kullanım (proje kökünden):
+    python benchmarks/bench_model_bundle.py
+    python benchmarks/bench_model_bundle.py --repeats 10
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+import tempfile
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+from feature_store import load_features, store_exists
+from model_bundle import BEST_MODEL_BUNDLE, BEST_MODEL_JOBLIB, MANIFEST, ModelBundle, save_bundle
+
+OUT_PATH = os.path.join("outputs", "benchmarks", "model_bundle.json")
+CHECK_ROWS = 100_000
+
+# Taze süreçte çalışan ölçüm: numpy/pandas sonrası RSS ve süre, ardından model yükleme
+PROBE = """
+import sys, time, json
+import numpy, pandas
+sys.path.insert(0, {src!r})
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        return int(next(line for line in f if line.startswith("VmRSS:")).split()[1])
+
+rss0 = rss_kb()
+start = time.perf_counter()
+if {kind!r} == "joblib":
+    from joblib import load
+    model = load({joblib!r})
+else:
+    from model_bundle import ModelBundle
+    model = ModelBundle.open({bundle!r}).load_model({kind!r})
+seconds = time.perf_counter() - start
+rss1 = rss_kb()
+print(json.dumps({{"load_s": seconds, "rss_mb": (rss1 - rss0) / 1024,
+                  "sklearn": "sklearn" in sys.modules, "lightgbm": "lightgbm" in sys.modules}}))
+"""
+
+
+def probe(kind, bundle_dir, joblib_path):
+    code = PROBE.format(src=os.path.abspath(SRC_DIR), kind=kind, bundle=bundle_dir, joblib=joblib_path)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Model yükleme benchmark'ı (joblib vs model paketi)")
+    parser.add_argument("--repeats", type=int, default=5, help="Yol başına taze süreç sayısı")
+    args = parser.parse_args()
+
+    from joblib import load
+    model = load(BEST_MODEL_JOBLIB)
+    model = model.booster_ if hasattr(model, "booster_") else model     # eski dosyalar LGBMRegressor taşır
+    bundle_dir, tmp = BEST_MODEL_BUNDLE, None
+    if not os.path.exists(os.path.join(bundle_dir, MANIFEST)):
+        tmp = tempfile.TemporaryDirectory(prefix="model_bundle_")
+        bundle_dir = tmp.name
+        save_bundle(model, model.feature_name(), directory=bundle_dir)
+        print(f" Model paketi bulunamadı; geçici paket oluşturuldu: {bundle_dir}")
+    bundle = ModelBundle.open(bundle_dir)
+
+    # --- Doğruluk: üç yolun tahminleri aynı ---
+    if store_exists():
+        X = load_features(columns=bundle.features).iloc[-CHECK_ROWS:]
+    else:
+        X = np.random.default_rng(0).random((CHECK_ROWS, len(bundle.features))) * 10
+    ref = model.predict(X)
+    for kind in ("lightgbm", "flat"):
+        assert np.array_equal(ref, bundle.load_model(kind).predict(X)), f"{kind}: tahminler joblib modelinden farklı"
+    print(f" Tahminler birebir aynı ({len(X)} satır, {bundle.manifest['n_trees']} ağaç)")
+
+    # --- Yükleme süresi ve bellek (taze süreçler, medyan) ---
+    files = [os.path.join(root, f) for root, _, names in os.walk(bundle_dir) for f in names]
+    results = {"n_trees": bundle.manifest["n_trees"], "version": bundle.version,
+               "joblib_bytes": os.path.getsize(BEST_MODEL_JOBLIB),
+               "bundle_bytes": sum(os.path.getsize(f) for f in files), "runs": {}}
+    for kind in ("joblib", "lightgbm", "flat"):
+        runs = [probe(kind, bundle_dir, BEST_MODEL_JOBLIB) for _ in range(args.repeats)]
+        row = {"load_s": round(float(np.median([r["load_s"] for r in runs])), 4),
+               "rss_mb": round(float(np.median([r["rss_mb"] for r in runs])), 1),
+               "imports_sklearn": runs[0]["sklearn"], "imports_lightgbm": runs[0]["lightgbm"]}
+        results["runs"][kind] = row
+        print(f" {kind:<9s} | yükleme {row['load_s']:7.3f} sn | bellek +{row['rss_mb']:6.1f} MB | "
+              f"sklearn: {'evet' if row['imports_sklearn'] else 'hayır'}, lightgbm: {'evet' if row['imports_lightgbm'] else 'hayır'}")
+
+    if tmp is not None:
+        tmp.cleanup()
+    os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
+    with open(OUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f" Sonuçlar kaydedildi: {OUT_PATH}")
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+ Benchmark – Pipeline Sıcak Yolları (Sentetik Veriyle)
+ Amaç:
+- Her ölçek için (1k, 100k, 3m, 30m satır) sentetik veri üretip (synthetic_data.py) pipeline
+  betiklerini ayrı bir çalışma klasöründe gerçek halleriyle çalıştırmak:
+  feature engineering → eğitim (model_tuning_fast) → iteratif tahmin → özet skorlama →
+  test.csv skorlama (submission)
+- Aşama başına süre ve tepe belleği, betiklerin kendi çalıştırma raporlarından
+  (outputs/run_reports, instrumentation.py) adım ayrıntısıyla birlikte toplamak
+- Sonuçları outputs/benchmarks/pipeline.json dosyasına yazmak
+- --baseline ile önceki bir sonuç dosyasıyla karşılaştırıp yavaşlayan aşamaları raporlamak
+  (gerileme varsa çıkış kodu 1; gece işinden önce CI'da çalıştırılabilir)
+
+Kullanım (proje kökünden):
+    python benchmarks/bench_pipeline.py                       # 1k ve 100k
+    python benchmarks/bench_pipeline.py --scales 1k,100k,3m,30m
+    python benchmarks/bench_pipeline.py --baseline outputs/benchmarks/pipeline_baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+
+from synthetic_data import SCALES, generate, parse_rows
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SRC_DIR = os.path.join(ROOT, "src")
+OUT_PATH = os.path.join("outputs", "benchmarks", "pipeline.json")
+WORK_DIR = os.path.join("outputs", "benchmarks", "work")
+DEFAULT_SCALES = "1k,100k"
+
+# (aşama adı, betik); çalıştırma raporu betik adıyla yazılır
+STAGES = [
+    ("feature_engineering", "feature_engineering.py"),
+    ("training", "model_tuning_fast.py"),
+    ("recursive_forecast", "forecast_generation.py"),
+    ("summary_scoring", "model_summary.py"),
+    ("test_scoring", "submission.py"),
+]
+# Eğitim aşaması ayar çalıştırmadan sabit parametrelerle yapılır (tuning_cache bunu .txt'den okur)
+BENCH_PARAMS = {"learning_rate": 0.1, "max_depth": 8, "n_estimators": 200, "num_leaves": 63}
+TOLERANCE = 0.25           # Baseline'a göre %25'ten fazla yavaşlama gerileme sayılır
+MIN_SLOWDOWN_S = 1.0       # Küçük ölçeklerde gürültüyü yok saymak için en az mutlak fark
+
+
+def write_params(work_dir):
+    os.makedirs(os.path.join(work_dir, "outputs"), exist_ok=True)
+    with open(os.path.join(work_dir, "outputs", "best_params_lightgbm.txt"), "w", encoding="utf-8") as f:
+        f.write(" Best LightGBM Parameters (Benchmark):\n")
+        for k, v in BENCH_PARAMS.items():
+            f.write(f"{k}: {v}\n")
+
+
+def run_stage(work_dir, script):
+    """Betiği çalışma klasöründe çalıştırır; (süre, çalıştırma raporu ya da None, hata metni)."""
+    name = os.path.splitext(script)[0]
+    report_path = os.path.join(work_dir, "outputs", "run_reports", f"{name}.json")
+    if os.path.exists(report_path):
+        os.remove(report_path)
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, os.path.join(SRC_DIR, script)], cwd=work_dir,
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    error = None if proc.returncode == 0 else (proc.stderr or proc.stdout).strip().splitlines()[-20:]
+    report = None
+    if os.path.exists(report_path):
+        with open(report_path, encoding="utf-8") as f:
+            report = json.load(f)
+    return wall, report, error
+
+
+def bench_scale(scale, work_root, seed):
+    work_dir = os.path.join(work_root, scale)
+    start = time.perf_counter()
+    meta = generate(parse_rows(scale), os.path.join(work_dir, "data"), seed=seed)
+    result = {"data": meta, "generate_s": round(time.perf_counter() - start, 3), "stages": {}}
+    write_params(work_dir)
+
+    for stage, script in STAGES:
+        wall, report, error = run_stage(work_dir, script)
+        entry = {"script": script, "wall_s": round(wall, 3)}
+        if report is not None:
+            entry["peak_rss_mb"] = report["peak_rss_mb"]
+            entry["steps"] = {s["step"]: {k: s[k] for k in ("wall_s", "cpu_s", "peak_rss_mb", "rows")}
+                              for s in report["steps"]}
+        result["stages"][stage] = entry
+        if error is not None:
+            entry["error"] = error
+            print(f"   {stage}: HATA\n     " + "\n     ".join(error))
+            break
+        print(f"   {stage:20s} {wall:8.2f} sn | tepe bellek {entry.get('peak_rss_mb')} MB")
+    return result
+
+
+def find_regressions(results, baseline, tolerance=TOLERANCE, min_slowdown_s=MIN_SLOWDOWN_S):
+    """Baseline'daki aynı ölçek/aşama süresine göre belirgin yavaşlamalar."""
+    regressions = []
+    for scale, res in results["scales"].items():
+        base = baseline.get("scales", {}).get(scale)
+        if base is None:
+            continue
+        for stage, entry in res["stages"].items():
+            old = base["stages"].get(stage, {}).get("wall_s")
+            new = entry["wall_s"]
+            if old and new > old * (1 + tolerance) and new - old > min_slowdown_s:
+                regressions.append({"scale": scale, "stage": stage, "baseline_s": old, "wall_s": new,
+                                    "ratio": round(new / old, 2)})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sentetik veriyle pipeline benchmark'ı")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help=f"Virgülle ayrılmış ölçekler ({', '.join(SCALES)})")
+    parser.add_argument("--work-dir", default=WORK_DIR, help="Sentetik veri ve ara çıktıların klasörü")
+    parser.add_argument("--output", default=OUT_PATH)
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki pipeline.json")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "scales": {},
+    }
+    for scale in [s.strip() for s in args.scales.split(",") if s.strip()]:
+        print(f" Ölçek {scale}:")
+        results["scales"][scale] = bench_scale(scale, os.path.abspath(args.work_dir), args.seed)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            results["regressions"] = find_regressions(results, json.load(f))
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f" Sonuçlar kaydedildi: {args.output}")
+
+    failed = [s for s, r in results["scales"].items() if any("error" in e for e in r["stages"].values())]
+    for reg in results.get("regressions", []):
+        print(f" GERİLEME: {reg['scale']} / {reg['stage']}: {reg['baseline_s']:.2f} → {reg['wall_s']:.2f} sn "
+              f"(×{reg['ratio']})")
+    if failed or results.get("regressions"):
+        sys.exit(1)
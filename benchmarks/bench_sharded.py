@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+ Benchmark – Parçalı Çok Süreçli İteratif Tahmin (sharded_forecast.py)
+ Amaç:
+- Eğitilmiş modelle (model paketi outputs/best_model, yoksa best_model.joblib) aynı seri/ufuk kümesini 1, 2, 4, ... süreçle
+  tahmin edip süreyi ve seri×gün başına verimi ölçmek
+- Tüm süreç sayılarında çıktının tek süreçli forecast_recursive ile birebir aynı olduğunu doğrulamak
+- Sonuçları outputs/benchmarks/sharded_forecast.json dosyasına yazmak
+
+Seri sayısı senaryo çarpanıyla büyütülür (--copies): senaryo motorundaki gibi aynı mağaza×ürün
+evreni birden çok kez tahmin edilir. Dışsal özellikler sabit tohumla rastgele üretilir. Model
+forecast_generation.py ile aynı yoldan, eğitim özellik sırası doğrulanarak yüklenir (--backend).
+
+Kullanım (proje kökünden):
+    python benchmarks/bench_sharded.py
+    python benchmarks/bench_sharded.py --copies 8 --days 28 --jobs 1,2,4,8
+    python benchmarks/bench_sharded.py --backend lightgbm
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from forecast_engine import SalesRingBuffer, forecast_recursive
+from model_bundle import load_best_model, model_features
+from sharded_forecast import forecast_sharded
+from store_traffic import TRAFFIC_FEATURES
+
+OUT_PATH = os.path.join("outputs", "benchmarks", "sharded_forecast.json")
+N_PAIRS = 54 * 33          # Mağaza × ürün grubu
+FEATURES = [               # Eğitimdeki sıra (model_tuning.py); trafik özellikleri isteğe bağlı
+    "store_nbr", "onpromotion", "year", "month", "day", "day_of_week",
+    "is_holiday", "dcoilwtico", "rolling_sales_mean_7",
+    "sales_lag_7", "sales_lag_14", "is_weekend", "family_encoded"
+] + TRAFFIC_FEATURES
+WINDOW_COLUMNS = ("rolling_sales_mean_7", "sales_lag_7", "sales_lag_14")
+
+
+def make_inputs(n_series, n_days, features=FEATURES, seed=0):
+    """Geçmişi dolu halka tampon ve gün başına dışsal özellik tabloları."""
+    rng = np.random.default_rng(seed)
+    buf = SalesRingBuffer(n_series)
+    buf.values[:] = rng.gamma(2.0, 50.0, size=buf.values.shape)
+    buf.count[:] = buf.window
+    exog = [c for c in features if c not in WINDOW_COLUMNS]
+    steps = [pd.DataFrame({c: rng.random(n_series) * 10 for c in exog}) for _ in range(n_days)]
+    return buf, steps
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parçalı çok süreçli tahmin benchmark'ı")
+    parser.add_argument("--copies", type=int, default=4, help="Mağaza×ürün evreninin kaç kopyası tahmin edilecek")
+    parser.add_argument("--days", type=int, default=28)
+    parser.add_argument("--jobs", help="Virgülle ayrılmış süreç sayıları (varsayılan: 1, 2, 4, ... çekirdek sayısı)")
+    parser.add_argument("--backend", choices=("flat", "lightgbm"), default="flat", help="Model çıkarım arka ucu")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    jobs = ([int(j) for j in args.jobs.split(",")] if args.jobs
+            else sorted({1, cpus} | {2 ** k for k in range(1, 8) if 2 ** k < cpus}))
+    model = load_best_model(FEATURES, args.backend, optional=TRAFFIC_FEATURES)
+    features = model_features(model)
+    n_series = N_PAIRS * args.copies
+    buf, steps = make_inputs(n_series, args.days, features)
+
+    start = time.perf_counter()
+    ref = forecast_recursive(model, buf.take(np.arange(n_series)), steps, features, verbose=False)
+    base_s = time.perf_counter() - start
+    print(f" Tek süreç (forecast_recursive): {base_s:.2f} sn ({n_series} seri × {args.days} gün)")
+
+    results = {"cpu_count": cpus, "backend": args.backend, "n_series": n_series, "days": args.days,
+               "single_process_s": round(base_s, 3), "runs": []}
+    for n_jobs in jobs:
+        start = time.perf_counter()
+        preds = forecast_sharded(model, buf.take(np.arange(n_series)), steps, features, n_jobs=n_jobs, verbose=False)
+        wall = time.perf_counter() - start
+        assert np.array_equal(ref, preds), f"{n_jobs} süreç: çıktı tek süreçliden farklı"
+        row = {"n_jobs": n_jobs, "wall_s": round(wall, 3), "speedup": round(base_s / wall, 2),
+               "series_days_per_s": round(n_series * args.days / wall)}
+        results["runs"].append(row)
+        print(f" {n_jobs:>3} süreç | {wall:7.2f} sn | ×{row['speedup']:.2f} | {row['series_days_per_s']} seri·gün/sn (birebir aynı)")
+
+    os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
+    with open(OUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f" Sonuçlar kaydedildi: {OUT_PATH}")
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+ Doğruluk Kontrolü – Düz Dizi Ağaç Çıkarımı (tree_inference.py)
+ Amaç:
+- Küçük sentetik veriyle LightGBM modelleri eğitip FlatForest tahminlerinin lgb.Booster.predict ile
+  birebir aynı olduğunu doğrulamak (model dosyası ya da özellik deposu gerekmez)
+- Her iki çekirdeği ayrı ayrı denemek: numba (kuruluysa) ve NumPy yedeği
+- Eksik değer yönlendirmesini kapsamak: missing_type NaN / Zero / None, varsayılan yönün hem sol
+  hem sağ olduğu bölünmeler, eğitimde hiç NaN görmemiş özelliğe tahminde gelen NaN, eşik
+  değerinin kendisi ve sıfıra çok yakın değerler
+- Bellek eşlemeli diziler (save_arrays / load_arrays) üzerinden de aynı sonucu almak
+
+Kategorik özellik kullanılmaz (FlatForest yalnızca sayısal bölünmeleri destekler). Bir durum
+farklıysa ilk farklı satırlar yazdırılır ve betik 1 koduyla çıkar.
+
+Kullanım (proje kökünden):
+    python benchmarks/check_tree_inference.py
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import lightgbm as lgb
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from tree_inference import FlatForest, MISSING_NAN, MISSING_NONE, MISSING_ZERO, _get_numba_kernel
+
+N_ROWS = 5_000
+N_FEATURES = 6
+ROUNDS = 40
+
+# Eğitim ayarı → bu ayarda ağaçlarda görülmesi gereken missing_type değerleri
+CONFIGS = {
+    "varsayılan (NaN eksik)": ({}, {MISSING_NAN, MISSING_NONE}),
+    "zero_as_missing": ({"zero_as_missing": True}, {MISSING_ZERO}),
+    "use_missing=False": ({"use_missing": False}, {MISSING_NONE}),
+}
+
+
+def make_data(seed=0):
+    """Eksik değerli sentetik veri: sütun 0'da NaN yüksek, sütun 1'de NaN düşük hedefle gelir
+    (varsayılan yön iki tarafa da düşer), sütun 2 sık sıfır içerir, son sütunlarda NaN yoktur."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(N_ROWS, N_FEATURES))
+    X[:, 2] = np.where(rng.random(N_ROWS) < 0.3, 0.0, X[:, 2])
+    y = X[:, 0] * 3 + X[:, 1] * 2 - X[:, 2] + np.sin(X[:, 3]) + rng.normal(scale=0.1, size=N_ROWS)
+    nan0 = rng.random(N_ROWS) < 0.15
+    nan1 = rng.random(N_ROWS) < 0.15
+    y = y + np.where(nan0, 6.0, 0.0) - np.where(nan1, 6.0, 0.0)
+    X[nan0, 0] = np.nan
+    X[nan1, 1] = np.nan
+    return X, y
+
+
+def probe_rows(forest, X, seed=1):
+    """Eğitim satırları + zor durumlar: NaN (her sütunda), sıfır, ±1e-36, eşik değerleri."""
+    rng = np.random.default_rng(seed)
+    rows = [X[:1000]]
+    nan_rows = rng.normal(size=(200, N_FEATURES))
+    nan_rows[rng.random(nan_rows.shape) < 0.4] = np.nan
+    rows.append(nan_rows)
+    rows.append(np.zeros((1, N_FEATURES)))
+    rows.append(np.full((1, N_FEATURES), 1e-36))
+    rows.append(np.full((1, N_FEATURES), -1e-36))
+    rows.append(np.full((1, N_FEATURES), np.nan))
+    split = forest.feature >= 0
+    at_threshold = rng.normal(size=(int(split.sum()), N_FEATURES))
+    at_threshold[np.arange(len(at_threshold)), forest.feature[split]] = forest.threshold[split]
+    rows.append(at_threshold)
+    return np.vstack(rows)
+
+
+def compare(name, ref, pred, X):
+    if np.array_equal(ref, pred):
+        return True
+    bad = np.flatnonzero(ref != pred)
+    print(f"   HATA {name}: {len(bad)} / {len(ref)} satır farklı")
+    for i in bad[:5]:
+        print(f"      satır {i}: lightgbm {ref[i]!r}, flat {pred[i]!r}, X = {X[i].tolist()}")
+    return False
+
+
+def main():
+    X_train, y = make_data()
+    backends = ["numpy"] + (["numba"] if _get_numba_kernel() is not None else [])
+    print(f" Çekirdekler: {', '.join(backends)}" + ("" if "numba" in backends else " (numba kurulu değil)"))
+
+    all_ok = True
+    for label, (extra, expected_missing) in CONFIGS.items():
+        ok = True
+        params = {"objective": "regression", "num_leaves": 15, "min_data_in_leaf": 20,
+                  "seed": 0, "verbose": -1, **extra}
+        booster = lgb.train(params, lgb.Dataset(X_train, label=y, params=params), num_boost_round=ROUNDS)
+        forest = FlatForest.from_booster(booster, dtype=np.float64)
+
+        split = forest.feature >= 0
+        seen = set(np.unique(forest.missing_type[split]).tolist())
+        directions = set(forest.default_left[split & (forest.missing_type != MISSING_NONE)].astype(bool).tolist())
+        if not expected_missing <= seen:
+            print(f"   HATA {label}: beklenen missing_type {sorted(expected_missing)}, ağaçlarda {sorted(seen)}")
+            ok = False
+        if extra.get("use_missing", True) and directions != {True, False}:
+            print(f"   HATA {label}: varsayılan yön yalnızca {directions} (iki yön de sınanmalı)")
+            ok = False
+
+        X = probe_rows(forest, X_train)
+        ref = booster.predict(X)
+        with tempfile.TemporaryDirectory(prefix="flat_forest_") as tmp:
+            forest.save_arrays(tmp)
+            mapped = FlatForest.load_arrays(tmp, dtype=np.float64)
+            for backend in backends:
+                ok &= compare(f"{label} / {backend}", ref, forest.predict(X, backend=backend), X)
+                ok &= compare(f"{label} / {backend} (mmap)", ref, mapped.predict(X, backend=backend), X)
+            del mapped
+        print(f" {label:<24s} | {forest.n_trees} ağaç, {int(split.sum())} bölünme, missing_type {sorted(seen)}, "
+              f"{len(X)} satır | {'birebir aynı' if ok else 'FARKLI'}")
+        all_ok &= ok
+
+    if not all_ok:
+        sys.exit(1)
+    print(" Tüm durumlar lightgbm ile birebir aynı.")
+
+
+if __name__ == "__main__":
+    main()
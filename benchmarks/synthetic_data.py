@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+ Sentetik Veri Üreticisi (Benchmark)
+ Amaç:
+- Gerçek şemayla (train.csv, stores.csv, oil.csv, holidays_events.csv, transactions.csv) istenen boyutta
+  sentetik veri üretmek: mağaza × ürün grubu × tarih ızgarası, tarih sıralı ve id artan
+- Tahmin ufkunun ilk TEST_DAYS günü için test.csv (gerçek kampanya değerleriyle, id train.csv'nin
+  devamı) ve sample_submission.csv üretmek (submission.py skorlaması için)
+- Ölçekler: 1k, 100k, 3m, 30m satır (ya da herhangi bir satır sayısı)
+- stores.csv gerçek veride varsa aynen kullanılır (takvim indeksi mağazaları stores.csv'den çözer);
+  yoksa aynı kolonlarla sentetik mağazalar üretilir
+- Petrol (iş günleri, rastgele yürüyüş) ve tatiller (ulusal/bölgesel/yerel, taşınmış tatil ve
+  çalışma günü dahil) tüm tarih aralığını ve tahmin ufkunu kapsar
+- train.csv parça parça yazılır; 30m ölçekte bile bellek kullanımı parça boyutuyla sınırlıdır
+
+Kullanım (proje kökünden):
+    python benchmarks/synthetic_data.py --rows 100k --out outputs/benchmarks/work/100k/data
+"""
+
+import os
+import json
+import shutil
+import argparse
+
+import numpy as np
+import pandas as pd
+
+SCALES = {"1k": 1_000, "100k": 100_000, "3m": 3_000_000, "30m": 30_000_000}
+FAMILIES = [
+    "AUTOMOTIVE", "BABY CARE", "BEAUTY", "BEVERAGES", "BOOKS", "BREAD/BAKERY", "CELEBRATION",
+    "CLEANING", "DAIRY", "DELI", "EGGS", "FROZEN FOODS", "GROCERY I", "GROCERY II", "HARDWARE",
+    "HOME AND KITCHEN I", "HOME AND KITCHEN II", "HOME APPLIANCES", "HOME CARE", "LADIESWEAR",
+    "LAWN AND GARDEN", "LINGERIE", "LIQUOR,WINE,BEER", "MAGAZINES", "MEATS", "PERSONAL CARE",
+    "PET SUPPLIES", "PLAYERS AND ELECTRONICS", "POULTRY", "PREPARED FOODS", "PRODUCE",
+    "SCHOOL AND OFFICE SUPPLIES", "SEAFOOD",
+]
+WEIGHED_FAMILIES = {"DELI", "MEATS", "POULTRY", "PRODUCE", "SEAFOOD"}   # Satışı ondalıklı (kg) gruplar
+END_DATE = pd.Timestamp("2017-08-15")      # Gerçek train.csv'nin son günü
+MIN_DAYS = 60                              # Lag/rolling ve tahmin geçmişi için en az gün sayısı
+EXTRA_DAYS = 30                            # Petrol/tatil tabloları tahmin ufkunu da kapsar
+TEST_DAYS = 16                             # Gerçek test.csv'deki gibi 16 günlük ufuk
+CHUNK_ROWS = 1_000_000
+REAL_STORES_PATH = os.path.join("data", "stores.csv")
+OUTPUT_FILES = ("train.csv", "stores.csv", "oil.csv", "holidays_events.csv", "transactions.csv",
+                "test.csv", "sample_submission.csv")
+
+DOW_FACTOR = np.array([0.95, 0.9, 0.9, 0.95, 1.05, 1.25, 1.2])
+SYNTHETIC_CITIES = [("Quito", "Pichincha"), ("Guayaquil", "Guayas"), ("Cuenca", "Azuay"),
+                    ("Ambato", "Tungurahua"), ("Machala", "El Oro"), ("Loja", "Loja")]
+NATIONAL_HOLIDAYS = [("01-01", "Holiday", "Primer dia del ano"), ("05-01", "Holiday", "Dia del Trabajo"),
+                     ("08-10", "Holiday", "Primer Grito de Independencia"), ("11-02", "Holiday", "Dia de Difuntos"),
+                     ("11-03", "Holiday", "Independencia de Cuenca"), ("12-24", "Additional", "Navidad-1"),
+                     ("12-25", "Holiday", "Navidad"), ("12-26", "Additional", "Navidad+1"),
+                     ("05-12", "Event", "Dia de la Madre")]
+
+
+def parse_rows(value):
+    """"100k", "3m" ya da düz sayı → satır sayısı."""
+    value = str(value).lower()
+    if value in SCALES:
+        return SCALES[value]
+    for suffix, mult in (("k", 1_000), ("m", 1_000_000)):
+        if value.endswith(suffix):
+            return int(float(value[:-1]) * mult)
+    return int(value)
+
+
+def grid_shape(rows, n_all_series):
+    """Satır sayısına en yakın tam ızgara: (seri sayısı, gün sayısı)."""
+    n_days = max(MIN_DAYS, int(np.ceil(rows / n_all_series)))
+    n_series = min(n_all_series, max(1, int(np.ceil(rows / n_days))))
+    return n_series, n_days
+
+
+def make_stores(rng):
+    if os.path.exists(REAL_STORES_PATH):
+        return pd.read_csv(REAL_STORES_PATH)
+    n = 54
+    city = [SYNTHETIC_CITIES[i % len(SYNTHETIC_CITIES)] for i in range(n)]
+    return pd.DataFrame({
+        "store_nbr": np.arange(1, n + 1),
+        "city": [c for c, _ in city],
+        "state": [s for _, s in city],
+        "type": rng.choice(list("ABCDE"), n),
+        "cluster": rng.integers(1, 18, n),
+    })
+
+
+def make_oil(start, end, rng):
+    dates = pd.bdate_range(start, end)
+    price = 90 + np.cumsum(rng.normal(0, 1.2, len(dates)))
+    price = np.round(np.clip(price, 20, 140), 2)
+    price[rng.random(len(dates)) < 0.03] = np.nan     # Gerçek veride olduğu gibi eksik günler
+    price[0] = np.nan
+    return pd.DataFrame({"date": dates.strftime("%Y-%m-%d"), "dcoilwtico": price})
+
+
+def make_holidays(stores, start, end):
+    rows = []
+    for year in range(start.year, end.year + 1):
+        for md, kind, name in NATIONAL_HOLIDAYS:
+            rows.append((f"{year}-{md}", kind, "National", "Ecuador", name, False))
+        # Taşınmış tatil: asıl gün transferred=True, yeni gün Transfer
+        rows.append((f"{year}-10-09", "Holiday", "National", "Ecuador", "Independencia de Guayaquil", True))
+        rows.append((f"{year}-10-12", "Transfer", "National", "Ecuador", "Traslado Independencia de Guayaquil", False))
+        rows.append((f"{year}-01-04", "Work Day", "National", "Ecuador", "Recupero puente", False))
+        for i, state in enumerate(sorted(stores["state"].unique())):
+            day = pd.Timestamp(year=year, month=1 + i % 12, day=1 + (7 * i) % 28)
+            rows.append((day.strftime("%Y-%m-%d"), "Holiday", "Regional", state, f"Provincializacion de {state}", False))
+        for i, city in enumerate(sorted(stores["city"].unique())):
+            day = pd.Timestamp(year=year, month=1 + (5 * i) % 12, day=1 + (3 * i) % 28)
+            rows.append((day.strftime("%Y-%m-%d"), "Holiday", "Local", city, f"Fundacion de {city}", False))
+    df = pd.DataFrame(rows, columns=["date", "type", "locale", "locale_name", "description", "transferred"])
+    dates = pd.to_datetime(df["date"])
+    return df[(dates >= start) & (dates <= end)].sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def make_transactions(store_nbr, dates, rng):
+    """Mağaza başına günlük işlem sayısı; satış üretiminden bağımsız, aynı haftalık desenle."""
+    level = rng.lognormal(mean=7.3, sigma=0.4, size=len(store_nbr))
+    noise = rng.gamma(20.0, 0.05, size=(len(dates), len(store_nbr)))
+    counts = np.round(level * DOW_FACTOR[dates.dayofweek.to_numpy()][:, None] * noise).astype(np.int64)
+    open_day = (dates.month.to_numpy() != 12) | (dates.day.to_numpy() != 25)    # Gerçek veride Noel yok
+    d, s = np.nonzero(np.broadcast_to(open_day[:, None], counts.shape))
+    return pd.DataFrame({"date": dates[d].strftime("%Y-%m-%d"), "store_nbr": store_nbr[s], "transactions": counts[d, s]})
+
+
+def series_keys(stores, n_series):
+    """İlk n_series mağaza×ürün çifti (mağaza, ürün sırasıyla)."""
+    store_nbr = np.repeat(np.sort(stores["store_nbr"].to_numpy()), len(FAMILIES))[:n_series]
+    family_idx = np.tile(np.arange(len(FAMILIES)), len(stores))[:n_series]
+    return store_nbr, np.asarray(FAMILIES, dtype=object)[family_idx]
+
+
+def write_train(path, stores, n_series, n_days, rng, chunk_rows=CHUNK_ROWS):
+    """Tarih sıralı (tarih, mağaza, ürün) satırları parça parça yazar."""
+    store_nbr, family = series_keys(stores, n_series)
+    weighed = np.isin(family, list(WEIGHED_FAMILIES))
+
+    # Seri başına sabit özellikler: seviye, sıfır satış olasılığı, kampanya yoğunluğu
+    level = rng.lognormal(mean=3.0, sigma=1.5, size=n_series)
+    p_zero = rng.beta(1, 5, size=n_series)
+    promo_rate = rng.gamma(1.0, 2.0, size=n_series)
+
+    dates = pd.date_range(end=END_DATE, periods=n_days, freq="D")
+    days_per_chunk = max(1, chunk_rows // n_series)
+    next_id = 0
+    for lo in range(0, n_days, days_per_chunk):
+        d = dates[lo:lo + days_per_chunk]
+        n = len(d) * n_series
+        trend = 1 + 0.05 * ((d - dates[0]).days.to_numpy() / 365.0)
+        season = (DOW_FACTOR[d.dayofweek.to_numpy()] * trend)[:, None]
+        promo = rng.poisson(promo_rate, size=(len(d), n_series)) * (rng.random((len(d), n_series)) < 0.3)
+        sales = level * season * (1 + 0.15 * np.sqrt(promo)) * rng.gamma(5.0, 0.2, size=(len(d), n_series))
+        sales[rng.random((len(d), n_series)) < p_zero] = 0.0
+        sales = np.where(weighed, np.round(sales, 3), np.round(sales))
+
+        chunk = pd.DataFrame({
+            "id": np.arange(next_id, next_id + n),
+            "date": np.repeat(d.strftime("%Y-%m-%d").to_numpy(), n_series),
+            "store_nbr": np.tile(store_nbr, len(d)),
+            "family": np.tile(family, len(d)),
+            "sales": sales.reshape(-1),
+            "onpromotion": promo.reshape(-1),
+        })
+        chunk.to_csv(path, mode="w" if lo == 0 else "a", header=lo == 0, index=False)
+        next_id += n
+    return next_id, dates
+
+
+def write_test(out_dir, stores, n_series, first_id, start, rng):
+    """train.csv'nin son gününden sonraki TEST_DAYS gün: test.csv ve sıfır tahminli sample_submission.csv."""
+    store_nbr, family = series_keys(stores, n_series)
+    dates = pd.date_range(start, periods=TEST_DAYS, freq="D")
+    promo = rng.poisson(2.0, size=(len(dates), n_series)) * (rng.random((len(dates), n_series)) < 0.3)
+    ids = np.arange(first_id, first_id + len(dates) * n_series)
+    pd.DataFrame({
+        "id": ids,
+        "date": np.repeat(dates.strftime("%Y-%m-%d").to_numpy(), n_series),
+        "store_nbr": np.tile(store_nbr, len(dates)),
+        "family": np.tile(family, len(dates)),
+        "onpromotion": promo.reshape(-1),
+    }).to_csv(os.path.join(out_dir, "test.csv"), index=False)
+    pd.DataFrame({"id": ids, "sales": 0.0}).to_csv(os.path.join(out_dir, "sample_submission.csv"), index=False)
+
+
+def generate(rows, out_dir, seed=42, force=False):
+    """out_dir altına OUTPUT_FILES dosyalarını yazar; aynı tanım için var olanı kullanır."""
+    rows = parse_rows(rows)
+    meta_path = os.path.join(out_dir, "synthetic.json")
+    spec = {"requested_rows": rows, "seed": seed}
+    if not force and os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        complete = all(os.path.exists(os.path.join(out_dir, name)) for name in OUTPUT_FILES)
+        if {k: meta.get(k) for k in spec} == spec and complete:
+            print(f" Sentetik veri yeniden kullanılıyor: {out_dir} ({meta['rows']} satır)")
+            return meta
+
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+    rng = np.random.default_rng(seed)
+    stores = make_stores(rng)
+    n_series, n_days = grid_shape(rows, len(stores) * len(FAMILIES))
+    print(f" Sentetik veri üretiliyor: {n_series} seri × {n_days} gün → {out_dir}")
+
+    n_rows, dates = write_train(os.path.join(out_dir, "train.csv"), stores, n_series, n_days, rng)
+    end = dates[-1] + pd.Timedelta(days=EXTRA_DAYS)
+    stores.to_csv(os.path.join(out_dir, "stores.csv"), index=False)
+    make_oil(dates[0], end, rng).to_csv(os.path.join(out_dir, "oil.csv"), index=False)
+    make_holidays(stores, dates[0], end).to_csv(os.path.join(out_dir, "holidays_events.csv"), index=False)
+    train_stores = np.sort(stores["store_nbr"].to_numpy())[:int(np.ceil(n_series / len(FAMILIES)))]
+    make_transactions(train_stores, dates, rng).to_csv(os.path.join(out_dir, "transactions.csv"), index=False)
+    write_test(out_dir, stores, n_series, n_rows, dates[-1] + pd.Timedelta(days=1), rng)
+
+    meta = {**spec, "rows": int(n_rows), "n_series": int(n_series), "n_days": int(n_days),
+            "start": str(dates[0].date()), "end": str(dates[-1].date())}
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gerçek şemayla sentetik satış verisi")
+    parser.add_argument("--rows", default="100k", help="Satır sayısı: 1k, 100k, 3m, 30m ya da sayı")
+    parser.add_argument("--out", default=os.path.join("outputs", "benchmarks", "synthetic", "data"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="Var olan veriyi yeniden üret")
+    args = parser.parse_args()
+    meta = generate(args.rows, args.out, args.seed, args.force)
+    print(f" Hazır: {meta['rows']} satır ({meta['start']} ~ {meta['end']})")
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+ Akışkan Gruplu Toplama (Streaming Group Aggregation)
+ Amaç:
+- Parça parça gelen verilerde grup bazlı ortalamaları tutarak tüm veriyi
+  belleğe almadan özet tablolar üretmek
+- pandas groupby().mean() ile birebir aynı sonucu vermek: pandas grup ortalamasında
+  Kahan (compensated) toplama kullanır; aynı adımlar aynı satır sırasıyla uygulanır
+- Tahmin çıktıları için tüm özet seviyelerini (genel, ürün grubu, mağaza, mağaza×ürün;
+  isteğe bağlı senaryo gibi ön anahtarlarla) tek geçişte hesaplamak (ForecastAggregator)
+  ve hata bantlarını vektörel etiketlemek; girdi tek tablo ya da parça parça olabilir
+"""
+
+import numpy as np
+import pandas as pd
+
+# Özet seviyesi → gruplama kolonları (ForecastAggregator'da `by` kolonları başa eklenir)
+LEVELS = {
+    "overall": [],
+    "family": ["family"],
+    "store": ["store_nbr"],
+    "store_family": ["store_nbr", "family"],
+}
+ERROR_BAND_LIMIT = 5.0     # Ortalama hata (%) bu sınırın dışındaysa fazla/düşük tahmin sayılır
+ERROR_BANDS = ("Tahmin düşük (underpredict)", "Başarılı tahmin", "Tahmin fazla (overpredict)")
+KEY_BITS = 20              # Bileşik anahtarda kolon başına bit (kolon başına en fazla ~1M farklı değer)
+SCALAR_ROWS_PER_STEP = 64  # Vektörel Kahan adımı ≈ bu kadar satırlık skaler döngü; az gruplu parçalarda skaler döngü
+
+
+class GroupIndex:
+    """Tamsayı grup anahtarlarını (ör. store_nbr*1000 + family_encoded) sıfırdan başlayan
+    yoğun grup numaralarına çevirir; her grubun etiketini ilk görüldüğü satırdan saklar."""
+
+    def __init__(self):
+        self._ids = {}
+        self.keys = []
+        self.labels = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def encode(self, keys, label_of):
+        """`keys`: satır anahtarları, `label_of(row_index)`: yeni grup için etiket üretir."""
+        uniq, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        mapping = np.empty(len(uniq), dtype=np.int64)
+        for i, (key, row) in enumerate(zip(uniq.tolist(), first.tolist())):
+            gid = self._ids.get(key)
+            if gid is None:
+                gid = self._ids[key] = len(self.keys)
+                self.keys.append(key)
+                self.labels.append(label_of(row))
+            mapping[i] = gid
+        return mapping[inverse]
+
+
+class KahanGroupMean:
+    """pandas group_mean ile aynı Kahan adımlarını uygulayan artımlı grup ortalaması.
+
+    NaN değerler atlanır; +/-inf değerlerde telafi terimi sıfırlanır (pandas GH#50367).
+    Bir parça içinde her grup için satırlar orijinal sırayla işlenir; aynı adımdaki
+    farklı gruplar vektörel olarak güncellenir. Grup sayısı az olduğunda (ör. genel ortalama,
+    ürün grubu) adım sayısı satır sayısına yaklaşır; bu durumda satırlar skaler döngüyle işlenir.
+    """
+
+    def __init__(self):
+        self.sums = np.zeros(0)
+        self.comp = np.zeros(0)
+        self.nobs = np.zeros(0, dtype=np.int64)
+
+    def _grow(self, n_groups):
+        if n_groups > len(self.sums):
+            extra = n_groups - len(self.sums)
+            self.sums = np.concatenate([self.sums, np.zeros(extra)])
+            self.comp = np.concatenate([self.comp, np.zeros(extra)])
+            self.nobs = np.concatenate([self.nobs, np.zeros(extra, dtype=np.int64)])
+
+    def add(self, group_ids, values):
+        values = np.asarray(values, dtype=np.float64)
+        ok = ~np.isnan(values)
+        ids, values = np.asarray(group_ids)[ok], values[ok]
+        if len(ids) == 0:
+            return
+        self._grow(int(ids.max()) + 1)
+        counts = np.bincount(ids, minlength=len(self.nobs))
+        self.nobs += counts
+        if counts.max() * SCALAR_ROWS_PER_STEP > len(ids):
+            self._add_scalar(ids, values)
+            return
+
+        # Grup içi sıra (rank): her adımda her gruptan en fazla bir değer işlenir
+        order = np.argsort(ids, kind="stable")
+        g, v = ids[order], values[order]
+        n = len(g)
+        starts = np.r_[True, g[1:] != g[:-1]]
+        rank = np.arange(n) - np.maximum.accumulate(np.where(starts, np.arange(n), 0))
+
+        by_rank = np.argsort(rank, kind="stable")
+        bounds = np.searchsorted(rank[by_rank], np.arange(rank.max() + 2))
+        for r in range(rank.max() + 1):
+            sel = by_rank[bounds[r]:bounds[r + 1]]
+            gg, x = g[sel], v[sel]
+            s = self.sums[gg]
+            with np.errstate(invalid="ignore"):
+                y = x - self.comp[gg]
+                t = s + y
+                c = t - s - y
+            c[c != c] = 0.0
+            self.comp[gg] = c
+            self.sums[gg] = t
+
+    def _add_scalar(self, ids, values):
+        sums, comp = self.sums.tolist(), self.comp.tolist()
+        for g, x in zip(ids.tolist(), values.tolist()):
+            s = sums[g]
+            y = x - comp[g]
+            t = s + y
+            c = t - s - y
+            comp[g] = 0.0 if c != c else c
+            sums[g] = t
+        self.sums[:], self.comp[:] = sums, comp
+
+    def result(self, n_groups=None):
+        n = len(self.sums) if n_groups is None else n_groups
+        self._grow(n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.nobs[:n] > 0, self.sums[:n] / self.nobs[:n], np.nan)
+
+
+class GroupMinMax:
+    """Grup bazlı akışkan min/max (NaN değerler atlanır; değeri olmayan grupta NaN)."""
+
+    def __init__(self):
+        self.min = np.zeros(0)
+        self.max = np.zeros(0)
+
+    def _grow(self, n_groups):
+        if n_groups > len(self.min):
+            extra = n_groups - len(self.min)
+            self.min = np.concatenate([self.min, np.full(extra, np.inf)])
+            self.max = np.concatenate([self.max, np.full(extra, -np.inf)])
+
+    def add(self, group_ids, values):
+        values = np.asarray(values, dtype=np.float64)
+        ok = ~np.isnan(values)
+        ids, values = np.asarray(group_ids)[ok], values[ok]
+        if len(ids) == 0:
+            return
+        self._grow(int(ids.max()) + 1)
+        np.minimum.at(self.min, ids, values)
+        np.maximum.at(self.max, ids, values)
+
+    def result(self, n_groups=None):
+        n = len(self.min) if n_groups is None else n_groups
+        self._grow(n)
+        seen = self.min[:n] <= self.max[:n]
+        return np.where(seen, self.min[:n], np.nan), np.where(seen, self.max[:n], np.nan)
+
+
+def error_band_labels(error_percent, limit=ERROR_BAND_LIMIT):
+    """Ortalama hata (%) → hata bandı etiketi (vektörel; NaN "Başarılı tahmin" sayılır)."""
+    e = np.asarray(error_percent, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        codes = np.where(e > limit, 2, np.where(e < -limit, 0, 1))
+    return pd.Categorical.from_codes(codes, categories=list(ERROR_BANDS))
+
+
+class _ColumnCodes:
+    """Bir kolonun değerlerini parçalar arasında sabit kalan tamsayı kodlarına çevirir."""
+
+    def __init__(self):
+        self._ids = {}
+        self.values = []
+
+    def encode(self, column):
+        codes, uniques = pd.factorize(column)
+        mapping = np.empty(len(uniques) + 1, dtype=np.int64)
+        mapping[-1] = -1                                    # factorize: eksik değer → -1
+        for i, value in enumerate(uniques.tolist()):
+            code = self._ids.get(value)
+            if code is None:
+                code = self._ids[value] = len(self.values)
+                self.values.append(value)
+            mapping[i] = code
+        return mapping[codes]
+
+
+class ForecastAggregator:
+    """Tahmin satırlarından tüm özet seviyelerini tek geçişte toplar.
+
+    Her `add` çağrısında parça bir kez kodlanır ve her seviye için ortalama (pandas ile aynı
+    Kahan toplamı), min, max ve satır sayısı güncellenir. `actual` verilirse gerçek satış
+    ortalaması ve satır bazlı hata yüzdesinin ortalaması da tutulur (model_summary.py ile aynı formül).
+    `by`: tüm seviyelere eklenen ön anahtarlar (ör. ["scenario_id"]). Eksik anahtarlı satırlar,
+    pandas groupby'daki gibi o seviyeye katılmaz.
+    """
+
+    def __init__(self, value="predicted_sales", actual=None, by=(), levels=tuple(LEVELS)):
+        self.value = value
+        self.actual = actual
+        self.keys = {name: list(by) + LEVELS[name] for name in levels}
+        self.n_rows = 0
+        self._codes = {}
+        self._groups = {name: GroupIndex() for name in self.keys}
+        self._acc = {name: self._new_accumulators() for name in self.keys}
+
+    def _new_accumulators(self):
+        acc = {"value": KahanGroupMean(), "minmax": GroupMinMax()}
+        if self.actual is not None:
+            acc["actual"], acc["error_percent"] = KahanGroupMean(), KahanGroupMean()
+        return acc
+
+    def add(self, frame):
+        columns = sorted({c for keys in self.keys.values() for c in keys})
+        codes = {c: self._codes.setdefault(c, _ColumnCodes()).encode(frame[c]) for c in columns}
+        pred = frame[self.value].to_numpy(dtype=np.float64)
+        values = {"value": pred}
+        if self.actual is not None:
+            y_true = frame[self.actual].to_numpy(dtype=np.float64)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values["actual"], values["error_percent"] = y_true, ((pred - y_true) / y_true) * 100
+
+        for name, keys in self.keys.items():
+            key = np.zeros(len(frame), dtype=np.int64)
+            valid = np.ones(len(frame), dtype=bool)
+            for c in keys:
+                if len(self._codes[c].values) >= 1 << KEY_BITS:
+                    raise ValueError(f"{c}: {1 << KEY_BITS} farklı değerden fazlası birleşik anahtara sığmıyor.")
+                key = (key << KEY_BITS) | np.maximum(codes[c], 0)
+                valid &= codes[c] >= 0
+            rows = np.flatnonzero(valid) if not valid.all() else None
+            k = key if rows is None else key[rows]
+            label_codes = [codes[c] if rows is None else codes[c][rows] for c in keys]
+            ids = self._groups[name].encode(
+                k, lambda row: tuple(self._codes[c].values[lc[row]] for c, lc in zip(keys, label_codes)))
+            acc = self._acc[name]
+            for field, v in values.items():
+                acc[field].add(ids, v if rows is None else v[rows])
+            acc["minmax"].add(ids, pred if rows is None else pred[rows])
+        self.n_rows += len(frame)
+        return self
+
+    def result(self, level):
+        """Seviyenin özet tablosu (anahtarlara göre sıralı): count, mean, max, min
+        [+ actual_mean, mean_error_percent, error_band]."""
+        keys, groups, acc = self.keys[level], self._groups[level], self._acc[level]
+        n = len(groups)
+        lo, hi = acc["minmax"].result(n)
+        out = pd.DataFrame({c: [label[i] for label in groups.labels] for i, c in enumerate(keys)})
+        out["count"] = acc["value"].nobs[:n] if n else np.zeros(0, dtype=np.int64)
+        out["mean"] = acc["value"].result(n)
+        out["max"], out["min"] = hi, lo
+        if self.actual is not None:
+            out["actual_mean"] = acc["actual"].result(n)
+            out["mean_error_percent"] = acc["error_percent"].result(n)
+            out["error_band"] = error_band_labels(out["mean_error_percent"])
+        return out.sort_values(keys, kind="stable").reset_index(drop=True) if keys else out
+
+    def results(self):
+        return {level: self.result(level) for level in self.keys}
+
+
+def aggregate_forecasts(source, chunk_rows=None, **kwargs):
+    """DataFrame, DataFrame parçaları (iterable) ya da CSV yolu → ForecastAggregator.
+
+    CSV yolu verilirse `chunk_rows` satırlık parçalarla okunur; bellek parça boyutuyla sınırlıdır.
+    """
+    agg = ForecastAggregator(**kwargs)
+    if isinstance(source, pd.DataFrame):
+        chunks = [source]
+    elif isinstance(source, str):
+        chunks = pd.read_csv(source, chunksize=chunk_rows or 1_000_000)
+    else:
+        chunks = source
+    for chunk in chunks:
+        agg.add(chunk)
+    return agg
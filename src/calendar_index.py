@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+ Takvim / Dışsal Değişken İndeksi (Calendar & Exogenous Index)
+ Amaç:
+- (tarih, mağaza) başına tek satır olacak şekilde tatil bilgisini önceden çözmek:
+  National tüm mağazalara, Regional mağazanın eyaletine (state), Local şehrine (city) uygulanır
+- Taşınmış (transferred=True) tatiller ve "Work Day" günleri tatil sayılmaz;
+  aynı güne birden fazla olay düşerse en yerel kapsamdaki (Local > Regional > National) kullanılır
+- Petrol fiyatını tarih sıralı günlük seriye çevirmek (ham ve ileri doldurulmuş)
+- Milyonlarca satırda hash merge yerine tamsayı tarih/mağaza indeksiyle dizi erişimi yapmak
+- Özellik üretimi ve tahmin aşamaları aynı indeksi kullanır (tatil kopyalama sorunu olmadan)
+"""
+
+import numpy as np
+import pandas as pd
+
+STORE_COLUMNS = ["city", "state", "type", "cluster"]
+SCOPES = {"National": 0, "Regional": 1, "Local": 2}
+NON_HOLIDAY_TYPES = ("Work Day",)
+
+
+class CalendarIndex:
+    """Günlük tarih ekseni × mağaza ekseni üzerinde önceden hesaplanmış diziler.
+
+    - `holiday_code[d, s]`: gün d, mağaza s için geçerli tatil tipinin `holiday_types`
+      içindeki kodu (-1: tatil yok)
+    - `holiday_scope[d, s]`: geçerli olayın kapsamı (0 National, 1 Regional, 2 Local; -1 yok)
+    - `oil[d]`: ham günlük petrol fiyatı (bilinmeyen günler NaN), `oil_ffill[d]`: ileri doldurulmuş
+    """
+
+    def __init__(self, start, n_days, stores, holiday_code, holiday_scope, holiday_types, oil, oil_ffill):
+        self.start = np.datetime64(pd.Timestamp(start).date(), "D")
+        self.n_days = n_days
+        self.stores = stores.reset_index(drop=True)
+        self.holiday_code = holiday_code
+        self.holiday_scope = holiday_scope
+        self.holiday_types = list(holiday_types)
+        self.oil = oil
+        self.oil_ffill = oil_ffill
+
+        store_nbr = self.stores["store_nbr"].to_numpy(dtype=np.int64)
+        self._store_pos = np.full(store_nbr.max() + 1, -1, dtype=np.int64)
+        self._store_pos[store_nbr] = np.arange(len(store_nbr))
+
+    @property
+    def dates(self):
+        return pd.date_range(pd.Timestamp(self.start), periods=self.n_days, freq="D")
+
+    @property
+    def is_holiday(self):
+        return (self.holiday_code >= 0).astype(np.int8)
+
+    # --- Kurulum ---
+    @classmethod
+    def build(cls, stores, oil, holidays, start=None, end=None):
+        """stores/oil/holidays tablolarından indeksi kurar.
+
+        Tarih ekseni, verilen aralığı ve tatil/petrol tablolarının tamamını kapsar.
+        """
+        bounds = [oil["date"].min(), oil["date"].max(), holidays["date"].min(), holidays["date"].max()]
+        bounds += [pd.Timestamp(t) for t in (start, end) if t is not None]
+        first, last = min(bounds).normalize(), max(bounds).normalize()
+        n_days = (last - first).days + 1
+        day = lambda dates: ((pd.DatetimeIndex(dates) - first).days).to_numpy(dtype=np.int64)
+
+        # --- Petrol: tarih sıralı günlük seri ---
+        oil_daily = np.full(n_days, np.nan)
+        oil_sorted = oil.sort_values("date").drop_duplicates("date", keep="last")
+        oil_daily[day(oil_sorted["date"])] = oil_sorted["dcoilwtico"].to_numpy(dtype=np.float64)
+        oil_ffill = pd.Series(oil_daily).ffill().to_numpy()
+
+        # --- Tatiller: (gün × mağaza) çözümleme ---
+        stores = stores.sort_values("store_nbr").reset_index(drop=True)
+        holiday_code = np.full((n_days, len(stores)), -1, dtype=np.int16)
+        holiday_scope = np.full((n_days, len(stores)), -1, dtype=np.int8)
+
+        # Tatil kolonunu esnek yakala
+        type_col = "type" if "type" in holidays.columns else "description" if "description" in holidays.columns else None
+        if type_col is None:
+            print(" 'holidays_events.csv' dosyasında 'type' veya 'description' kolonu bulunamadı, tatil verisi eklenmeyecek.")
+            return cls(first, n_days, stores, holiday_code, holiday_scope, [], oil_daily, oil_ffill)
+
+        events = holidays
+        if "transferred" in events.columns:
+            events = events[~events["transferred"].astype(str).str.lower().eq("true")]
+        if type_col == "type":
+            events = events[~events["type"].isin(NON_HOLIDAY_TYPES)]
+        holiday_types = sorted(events[type_col].dropna().astype(str).unique())
+        type_code = {t: i for i, t in enumerate(holiday_types)}
+
+        locale = events["locale"] if "locale" in events.columns else pd.Series("National", index=events.index)
+        locale_name = events["locale_name"] if "locale_name" in events.columns else pd.Series("", index=events.index)
+        city, state = stores["city"].to_numpy(), stores["state"].to_numpy()
+
+        for d, kind, loc, name in zip(day(events["date"]), events[type_col].astype(str), locale, locale_name):
+            scope = SCOPES.get(loc, SCOPES["National"])
+            if scope == SCOPES["Local"]:
+                mask = city == name
+            elif scope == SCOPES["Regional"]:
+                mask = state == name
+            else:
+                mask = np.ones(len(stores), dtype=bool)
+            # Daha yerel kapsam kazanır; aynı kapsamda dosyadaki ilk olay korunur
+            mask &= holiday_scope[d] < scope
+            holiday_code[d, mask] = type_code[kind]
+            holiday_scope[d, mask] = scope
+
+        return cls(first, n_days, stores, holiday_code, holiday_scope, holiday_types, oil_daily, oil_ffill)
+
+    # --- İndeks çözümleme ---
+    def date_positions(self, dates):
+        """Tarihleri tamsayı gün indeksine çevirir (aralık dışı tarihlerde hata)."""
+        pos = (np.asarray(dates, dtype="datetime64[D]") - self.start).astype(np.int64)
+        if len(pos) and (pos.min() < 0 or pos.max() >= self.n_days):
+            raise ValueError(f"Tarihler takvim indeksinin dışında ({self.dates[0].date()} ~ {self.dates[-1].date()})")
+        return pos
+
+    def store_positions(self, store_nbr):
+        store_nbr = np.asarray(store_nbr, dtype=np.int64)
+        pos = np.full(len(store_nbr), -1, dtype=np.int64)
+        known = (store_nbr >= 0) & (store_nbr < len(self._store_pos))
+        pos[known] = self._store_pos[store_nbr[known]]
+        if (pos < 0).any():
+            raise ValueError(f"stores.csv'de olmayan mağazalar: {sorted(set(store_nbr[pos < 0].tolist()))}")
+        return pos
+
+    # --- Satır bazlı özellikler ---
+    def lookup(self, dates, store_nbr, oil_ffill=True):
+        """Her (tarih, mağaza) satırı için mağaza, tatil ve petrol kolonlarını döndürür (sözlük)."""
+        d, s = self.date_positions(dates), self.store_positions(store_nbr)
+        out = {col: self.stores[col].to_numpy()[s] for col in STORE_COLUMNS if col in self.stores.columns}
+        out["holiday_type"] = pd.Categorical.from_codes(self.holiday_code[d, s], categories=self.holiday_types)
+        out["is_holiday"] = (self.holiday_code[d, s] >= 0).astype(np.int8)
+        out["dcoilwtico"] = (self.oil_ffill if oil_ffill else self.oil)[d]
+        return out
+
+    def to_frame(self):
+        """İncelemek için (tarih, mağaza) başına bir satırlık uzun tablo."""
+        n_stores = len(self.stores)
+        frame = pd.DataFrame({
+            "date": np.repeat(self.dates, n_stores),
+            "store_nbr": np.tile(self.stores["store_nbr"].to_numpy(), self.n_days),
+        })
+        for col, values in self.lookup(frame["date"], frame["store_nbr"]).items():
+            frame[col] = values
+        frame["holiday_scope"] = self.holiday_scope.reshape(-1)
+        frame["oil_raw"] = np.repeat(self.oil, n_stores)
+        return frame
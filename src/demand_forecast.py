@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+ Birleşik Komut Satırı (demand-forecast)
+ Amaç:
+- Pipeline adımlarını tek giriş noktasından alt komutlarla çalıştırmak:
+  features, train, tune, forecast, analyze, summarize, report
+- Ağır kütüphaneler (pandas, lightgbm, sklearn, matplotlib/seaborn) yalnızca seçilen alt
+  komutun modülüyle yüklenir; bu dosya standart kütüphane dışında hiçbir şey içe aktarmaz
+- --timings ile soğuk başlangıç süresini raporlamak: yorumlayıcı açılışı, alt komut modülünün
+  içe aktarılması (yüklenen ağır kütüphanelerle birlikte) ve komutun çalışması ayrı ayrı
+
+Adımlar src/ altındaki betiklerin main() fonksiyonlarıdır; betikler pipeline.py tarafından
+ayrı süreçlerde de aynı şekilde çalıştırılır. Proje kökünden çalıştırılmalıdır (data/, outputs/).
+
+Kullanım:
+    python src/demand_forecast.py features [--incremental] [--new-data data/new_sales.csv]
+    python src/demand_forecast.py train [--plots]
+    python src/demand_forecast.py tune [--fast]
+    python src/demand_forecast.py forecast --days 14 --jobs 4
+    python src/demand_forecast.py analyze [--input outputs/scenario_forecasts.csv] [--plots]
+    python src/demand_forecast.py summarize
+    python src/demand_forecast.py report
+    python src/demand_forecast.py --timings report
+"""
+
+import time
+
+_STARTED = time.perf_counter()
+
+import os
+import sys
+import argparse
+import importlib
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ("numpy", "pandas", "pyarrow", "sklearn", "lightgbm", "numba", "matplotlib", "seaborn")
+
+
+def process_age():
+    """Sürecin başlangıcından bu yana geçen süre (Linux /proc; yoksa None)."""
+    try:
+        with open("/proc/self/stat", encoding="utf-8") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", encoding="utf-8") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Timings:
+    """Soğuk başlangıç ölçümleri: yorumlayıcı, modül içe aktarma ve çalışma süreleri."""
+
+    def __init__(self):
+        age = process_age()
+        # Yorumlayıcı açılışı: süreç başlangıcından bu dosyanın ilk satırına kadar
+        self.interpreter_s = None if age is None else max(0.0, age - (time.perf_counter() - _STARTED))
+        self.cli_s = time.perf_counter() - _STARTED    # argparse + bu modül
+        self.imports = []
+        self.run_s = None
+
+    def load(self, name):
+        """Alt komut modülünü içe aktarır; süreyi ve yeni yüklenen ağır kütüphaneleri kaydeder."""
+        before = {m for m in HEAVY_MODULES if m in sys.modules}
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        loaded = [m for m in HEAVY_MODULES if m in sys.modules and m not in before]
+        self.imports.append((name, time.perf_counter() - start, loaded))
+        return module
+
+    def report(self):
+        total = time.perf_counter() - _STARTED
+        interpreter_s = self.interpreter_s or 0.0
+        first_import = self.imports[0][1] if self.imports else 0.0
+        rows = []
+        if self.interpreter_s is not None:
+            rows.append(("yorumlayıcı açılışı", interpreter_s, ""))
+        rows.append(("CLI (argparse)", self.cli_s, ""))
+        for name, seconds, loaded in self.imports:
+            rows.append((f"import {name}", seconds, ", ".join(loaded) or "ağır kütüphane yok"))
+        rows.append(("soğuk başlangıç", interpreter_s + self.cli_s + first_import, "ilk adım çalışmaya başlayana kadar"))
+        if self.run_s is not None:
+            rows.append(("çalışma", self.run_s, ""))
+        rows.append(("toplam", interpreter_s + total, ""))
+
+        print("\n Başlangıç süreleri (--timings):")
+        for label, seconds, note in rows:
+            print(f"   {label:<28s} {seconds:7.3f} sn" + (f"  ({note})" if note else ""))
+
+
+# --- Alt komutlar: modül yalnızca burada, komut seçildikten sonra yüklenir ---
+def cmd_features(args, t):
+    t.load("feature_engineering").main(incremental=args.incremental, new_data=args.new_data)
+
+
+def cmd_train(args, t):
+    t.load("model_training").main()
+    t.load("model_comparison").main(plots=args.plots)
+
+
+def cmd_tune(args, t):
+    t.load("model_tuning_fast" if args.fast else "model_tuning").main()
+
+
+def cmd_forecast(args, t):
+    module = t.load("forecast_generation")
+    days = args.days if args.days is not None else module.FORECAST_DAYS
+    module.main(days=days, promo=args.promo, n_jobs=args.jobs or None)
+
+
+def cmd_analyze(args, t):
+    t.load("forecast_analysis").main(forecast_path=args.input)
+    if args.plots:
+        t.load("forecast_viz").main(show=False)
+
+
+def cmd_summarize(args, t):
+    t.load("model_summary").main()
+
+
+def cmd_report(args, t):
+    t.load("report_summary").main()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="demand-forecast", description="Talep tahmini pipeline adımları")
+    parser.add_argument("--timings", action="store_true", help="Soğuk başlangıç ve çalışma sürelerini raporla")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("features", help="Özellik deposunu üret (feature_engineering.py)")
+    p.add_argument("--incremental", action="store_true", help="Yalnızca yeni tarihleri işle ve depoya ekle")
+    p.add_argument("--new-data", default=None, help="Yeni satış satırlarını içeren CSV (train.csv şeması)")
+    p.set_defaults(func=cmd_features)
+
+    p = sub.add_parser("train", help="Modelleri eğit ve karşılaştır (model_training.py, model_comparison.py)")
+    p.add_argument("--plots", action="store_true", help="Karşılaştırma grafiklerini göster")
+    p.set_defaults(func=cmd_train)
+
+    p = sub.add_parser("tune", help="LightGBM ayarı ve en iyi model (model_tuning.py)")
+    p.add_argument("--fast", action="store_true", help="Ayar yapmadan kayıtlı parametrelerle eğit (model_tuning_fast.py)")
+    p.set_defaults(func=cmd_tune)
+
+    p = sub.add_parser("forecast", help="İteratif tahmin (forecast_generation.py)")
+    p.add_argument("--days", type=int, default=None, help="Tahmin ufku (varsayılan: FORECAST_DAYS)")
+    p.add_argument("--promo", type=int, default=0, help="Tahmin günleri için kampanya seviyesi")
+    p.add_argument("--jobs", type=int, default=1, help="Süreç sayısı (0: tüm çekirdekler)")
+    p.set_defaults(func=cmd_forecast)
+
+    p = sub.add_parser("analyze", help="Tahmin özetleri (forecast_analysis.py)")
+    p.add_argument("--input", default=os.path.join("outputs", "forecast_results.csv"),
+                   help="Tahmin dosyası (scenario_engine çıktısı da olabilir)")
+    p.add_argument("--plots", action="store_true", help="Özet grafiklerini de kaydet (forecast_viz.py)")
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser("summarize", help="Tahmin-gerçek iş özeti (model_summary.py)")
+    p.set_defaults(func=cmd_summarize)
+
+    p = sub.add_parser("report", help="Yönetim özeti (report_summary.py)")
+    p.set_defaults(func=cmd_report)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    timings = Timings()
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    try:
+        start = time.perf_counter()
+        args.func(args, timings)
+        timings.run_s = time.perf_counter() - start - sum(s for _, s, _ in timings.imports)
+    finally:
+        if args.timings:
+            timings.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+ Doğrudan Çok Ufuklu Tahmin (Direct Multi-Horizon Forecasting)
+ Amaç:
+- İteratif (recursive) döngü yerine her ufuk grubu (1-7, 8-14, 15-21, 22-28 gün) için ayrı bir
+  LightGBM modeli eğitmek; özellikler yalnızca tahmin başlangıcında (origin) bilinen satışlardan üretilir
+- Hedef günün takvim/tatil/petrol/kampanya bilgisi calendar_index.py'den okunur
+- Tüm seriler ve tüm ufuk günleri tek bir toplu tahminle (ufuk grubu başına bir predict) üretilir;
+  günler birbirini beklemez ve tahmin hataları lag özelliklerine taşınmaz
+- Parametreler model_tuning_fast.py ile aynı kaynaktan (tuning önbelleği → best_params_lightgbm.txt) okunur
+
+Kullanım:
+    python src/direct_forecast.py --train            # modelleri eğit ve kaydet
+    python src/direct_forecast.py --days 28          # son tarihten itibaren 28 günlük tahmin
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from joblib import dump, load
+from lightgbm import LGBMRegressor
+
+from calendar_index import CalendarIndex
+from tuning_cache import load_tuned_params
+from instrumentation import RunReport
+from store_traffic import TRAFFIC_FEATURES
+from sales_panel import SalesPanel
+
+DATA_DIR = "data"
+OUT_DIR = "outputs"
+DIRECT_MODEL_PATH = os.path.join(OUT_DIR, "direct_models.joblib")
+holidays_path = os.path.join(DATA_DIR, "holidays_events.csv")
+stores_path = os.path.join(DATA_DIR, "stores.csv")
+oil_path = os.path.join(DATA_DIR, "oil.csv")
+
+HORIZON = 28
+HORIZON_BUCKETS = [(1, 7), (8, 14), (15, 21), (22, 28)]   # Ufuk grubu başına bir model
+ORIGIN_STRIDE = 7          # Eğitim başlangıç günleri arası adım (gün)
+MAX_ORIGINS = 52           # En fazla bu kadar başlangıç günü (son ~1 yıl)
+MIN_HISTORY = 28           # Başlangıç gününden önce gereken en az gün sayısı
+
+# Recursive modelin özellik listesi: tuning önbelleğinde parametreler bu listeyle aranır
+TUNED_FEATURES = [
+    "store_nbr", "onpromotion", "year", "month", "day", "day_of_week",
+    "is_holiday", "dcoilwtico", "rolling_sales_mean_7",
+    "sales_lag_7", "sales_lag_14", "is_weekend", "family_encoded"
+] + TRAFFIC_FEATURES
+
+DIRECT_FEATURES = [
+    "horizon", "store_nbr", "family_encoded", "onpromotion",
+    "year", "month", "day", "day_of_week", "is_weekend", "is_holiday", "dcoilwtico",
+    "sales_last", "sales_mean_7", "sales_mean_14", "sales_mean_28",
+    "sales_same_dow", "sales_same_dow_mean_4",
+]
+
+
+def _window_mean(sales, end, k):
+    """Her seri için [end-k+1, end] aralığındaki satışların NaN hariç ortalaması."""
+    window = sales[:, max(0, end - k + 1):end + 1]
+    count = (~np.isnan(window)).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, np.nansum(window, axis=1) / count, np.nan)
+
+
+def direct_rows(panel, calendar, origin, horizons, promo=None):
+    """Başlangıç günü `origin` (panel gün indeksi) için tüm serilerin ufuk satırları.
+
+    Satır sırası: ufuk, seri. `promo`: None ise panelden (eğitim), değilse sabit ya da
+    (len(horizons) × n_series) kampanya seviyesi (tahmin). Hedef satış panelde varsa `sales` kolonunda.
+    """
+    n = panel.n_series
+    horizons = np.asarray(horizons, dtype=np.int64)
+    h = np.repeat(horizons, n)
+    series = np.tile(np.arange(n), len(horizons))
+    target = origin + h
+    dates = panel.dates[0] + pd.to_timedelta(target, unit="D")
+    store_nbr = panel.pairs["store_nbr"].to_numpy(dtype=np.int64)[series]
+
+    # Başlangıçta bilinen satış özellikleri
+    rows = {
+        "horizon": h,
+        "store_nbr": store_nbr,
+        "family_encoded": panel.pairs["family_encoded"].to_numpy(dtype=np.int64)[series],
+    }
+    if promo is None:
+        rows["onpromotion"] = panel.promo[series, target]
+    else:
+        rows["onpromotion"] = np.broadcast_to(promo, (len(horizons), n)).reshape(-1)
+
+    # Hedef günün takvim/tatil/petrol bilgisi
+    rows["year"] = dates.year.to_numpy()
+    rows["month"] = dates.month.to_numpy()
+    rows["day"] = dates.day.to_numpy()
+    rows["day_of_week"] = dates.dayofweek.to_numpy()
+    rows["is_weekend"] = np.isin(rows["day_of_week"], [5, 6]).astype(np.int64)
+    exog = calendar.lookup(dates, store_nbr)
+    rows["is_holiday"] = exog["is_holiday"].astype(np.int64)
+    rows["dcoilwtico"] = exog["dcoilwtico"]
+
+    rows["sales_last"] = panel.sales[series, origin]
+    for k in (7, 14, 28):
+        rows[f"sales_mean_{k}"] = _window_mean(panel.sales, origin, k)[series]
+
+    # Hedef günle aynı haftanın gününe denk gelen, başlangıçta bilinen son 4 gözlem
+    same_dow = target - 7 * np.ceil(h / 7).astype(np.int64)
+    lags = np.stack([same_dow - 7 * i for i in range(4)])
+    values = np.where(lags >= 0, panel.sales[series, np.maximum(lags, 0)], np.nan)
+    rows["sales_same_dow"] = values[0]
+    count = (~np.isnan(values)).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rows["sales_same_dow_mean_4"] = np.where(count > 0, np.nansum(values, axis=0) / count, np.nan)
+
+    frame = pd.DataFrame(rows)[DIRECT_FEATURES]
+    frame.insert(0, "date", dates)
+    frame.insert(2, "family", panel.pairs["family"].to_numpy(dtype=object)[series])
+    if promo is None:
+        frame["sales"] = panel.sales[series, target]
+    return frame
+
+
+def training_origins(panel, horizon=HORIZON, stride=ORIGIN_STRIDE, max_origins=MAX_ORIGINS):
+    """Hedefi panelde tam gözlenen en son başlangıçtan geriye doğru, `stride` aralıklı başlangıç günleri."""
+    last = len(panel.dates) - 1 - horizon
+    return sorted(range(last, MIN_HISTORY - 1, -stride))[-max_origins:]
+
+
+def train_direct_models(panel, calendar, params, buckets=HORIZON_BUCKETS, verbose=True):
+    """Ufuk grubu başına bir LGBMRegressor eğitir; kaydedilebilir sözlük döndürür."""
+    horizon = max(hi for _, hi in buckets)
+    origins = training_origins(panel, horizon)
+    if not origins:
+        raise ValueError(f"Eğitim için yeterli geçmiş yok (en az {MIN_HISTORY + horizon + 1} gün gerekli).")
+    models = []
+    for lo, hi in buckets:
+        frame = pd.concat([direct_rows(panel, calendar, o, range(lo, hi + 1)) for o in origins], ignore_index=True)
+        frame = frame[frame["sales"].notna()]
+        if verbose:
+            print(f" Ufuk {lo}-{hi}: {len(origins)} başlangıç günü, {len(frame)} satır ile eğitiliyor...")
+        model = LGBMRegressor(**params)
+        model.fit(frame[DIRECT_FEATURES], frame["sales"])
+        models.append(model)
+    return {
+        "features": DIRECT_FEATURES,
+        "buckets": [tuple(b) for b in buckets],
+        "models": models,
+        "params": params,
+        "last_date": str(panel.dates[-1].date()),
+    }
+
+
+def forecast_direct(bundle, panel, calendar, days=HORIZON, promo=0):
+    """Panelin son gününden itibaren `days` günlük tahmin; tüm ufuklar tek toplu geçişte."""
+    max_h = max(hi for _, hi in bundle["buckets"])
+    if not 1 <= days <= max_h:
+        raise ValueError(f"days 1 ile {max_h} arasında olmalı: {days}")
+    frame = direct_rows(panel, calendar, len(panel.dates) - 1, range(1, days + 1), promo=promo)
+
+    pred = np.zeros(len(frame))
+    h = frame["horizon"].to_numpy()
+    for (lo, hi), model in zip(bundle["buckets"], bundle["models"]):
+        mask = (h >= lo) & (h <= hi)
+        if mask.any():
+            pred[mask] = model.predict(frame.loc[mask, bundle["features"]])
+
+    out = frame[["date", "store_nbr", "family"]].assign(predicted_sales=np.maximum(pred, 0.0))
+    return out.sort_values(["store_nbr", "family", "date"], kind="stable").reset_index(drop=True)
+
+
+def build_calendar(end):
+    return CalendarIndex.build(
+        pd.read_csv(stores_path),
+        pd.read_csv(oil_path, parse_dates=["date"]),
+        pd.read_csv(holidays_path, parse_dates=["date"]),
+        end=end,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Doğrudan çok ufuklu tahmin (ufuk grubu başına model)")
+    parser.add_argument("--train", action="store_true", help="Modelleri eğit ve kaydet")
+    parser.add_argument("--days", type=int, default=HORIZON)
+    parser.add_argument("--promo", type=int, default=0, help="Tahmin günleri için kampanya seviyesi")
+    args = parser.parse_args()
+
+    run = RunReport("direct_forecast")
+    print(" Satış paneli açılıyor...")
+    with run.step("load_panel") as step:
+        panel = SalesPanel.load()
+        calendar = build_calendar(panel.dates[-1] + pd.Timedelta(days=HORIZON))
+        step.rows = panel.n_series
+
+    if args.train:
+        with run.step("train") as step:
+            bundle = train_direct_models(panel, calendar, load_tuned_params(TUNED_FEATURES))
+            dump(bundle, DIRECT_MODEL_PATH)
+        print(f" Modeller kaydedildi: {DIRECT_MODEL_PATH} ({step.record['wall_s']:.1f} sn)")
+
+    if not os.path.exists(DIRECT_MODEL_PATH):
+        raise FileNotFoundError(f"Bulunamadı: {DIRECT_MODEL_PATH} (önce --train ile eğitilmeli)")
+    bundle = load(DIRECT_MODEL_PATH)
+
+    with run.step("forecast") as step:
+        result = forecast_direct(bundle, panel, calendar, days=args.days, promo=args.promo)
+        step.rows = len(result)
+    print(f" {args.days} günlük doğrudan tahmin: {len(result)} satır, {step.record['wall_s']:.2f} sn")
+
+    out_path = os.path.join(OUT_DIR, "forecast_results_direct.csv")
+    result.to_csv(out_path, index=False, encoding="utf-8-sig")
+    print(f" Tahmin kaydedildi: {out_path}")
+    print(result.head(10))
@@ -1,8 +1,41 @@
 # src/feature_engineering.py
+"""
+ AŞAMA 3 – Feature Engineering
+ Amaç:
+- train.csv'den takvim, mağaza, tatil, petrol, hareketli ortalama ve lag özelliklerini üretmek
+- Mağaza/tatil/petrol bilgisi merge yerine (tarih, mağaza) indeksli takvimden okunur
+  (calendar_index.py); çok olaylı tatil günlerinde satırlar çoğalmaz
+- Mağaza trafiği (transactions.csv) lag/rolling özellikleri mağaza×gün düzeyinde bir kez
+  hesaplanıp aynı indeksle satırlara dağıtılır (store_traffic.py); tahmin için son günlerin
+  işlem sayıları deponun yanında tutulur
+- Kolon tipleri üretim sırasında schema.py'ye göre küçültülür; aşama bazında bellek kullanımı
+  outputs/memory_report.json dosyasına yazılır
+- Adım süreleri/bellek outputs/run_reports/feature_engineering.json dosyasına yazılır;
+  pencere hesabı PROFILE_STEPS=window ile profillenebilir (instrumentation.py)
+- Sonucu outputs/feature_store altına yıllara bölünmüş Parquet olarak kaydetmek
+- Artımlı mod (--incremental): yalnızca yeni gelen tarihler için özellik üretip
+  depoya eklemek; seri başına son satışlar (tail state) deponun yanında tutulur
+- Seri × gün satış/kampanya paneli (sales_panel.py) deponun yanına .npy olarak yazılır;
+  artımlı modda yalnızca yeni günler eklenir
+
+Kullanım:
+    python src/feature_engineering.py                       # tam yeniden üretim
+    python src/feature_engineering.py --incremental         # train.csv'deki yeni tarihler
+    python src/feature_engineering.py --incremental --new-data data/new_sales.csv
+"""
+import argparse
+import json
 import pandas as pd
 import numpy as np
 import os
-from sklearn.preprocessing import LabelEncoder
+
+from calendar_index import CalendarIndex
+from feature_store import FEATURE_STORE_DIR, load_features, partition_files, save_features
+from schema import apply_schema, csv_dtypes, report_memory
+from instrumentation import RunReport
+from window_features import LAG_FILL, WINDOW_SPEC, compute_window_features, lag_columns, required_history
+from store_traffic import StoreTraffic, save_traffic_state
+from sales_panel import PANEL_COLUMNS, PANEL_DIR, PANEL_META, SalesPanel
 
 # --- Dosya yolları ---
 DATA_DIR = "data"
@@ -12,75 +45,252 @@ oil_path = os.path.join(DATA_DIR, "oil.csv")
 holidays_path = os.path.join(DATA_DIR, "holidays_events.csv")
 transactions_path = os.path.join(DATA_DIR, "transactions.csv")
 
-# --- CSV Dosyalarını Okuma ---
-print(" Veriler okunuyor...")
-train = pd.read_csv(train_path, parse_dates=["date"])
-stores = pd.read_csv(stores_path)
-oil = pd.read_csv(oil_path, parse_dates=["date"])
-holidays = pd.read_csv(holidays_path, parse_dates=["date"])
-transactions = pd.read_csv(transactions_path, parse_dates=["date"])
-
-# --- Tarih bazlı özellikler üretme ---
-print(" Tarih bazlı özellikler üretiliyor...")
-train["year"] = train["date"].dt.year
-train["month"] = train["date"].dt.month
-train["day"] = train["date"].dt.day
-train["day_of_week"] = train["date"].dt.dayofweek
-
-# --- Mağaza bilgilerini ekleme ---
-train = train.merge(stores, on="store_nbr", how="left")
-
-# --- Tatil bilgilerini ekleme (esnek versiyon) ---
-print(" Tatil bilgileri ekleniyor...")
-
-if "type" in holidays.columns:
-    holidays_temp = holidays[["date", "type"]].rename(columns={"type": "holiday_type"})
-elif "description" in holidays.columns:
-    holidays_temp = holidays[["date", "description"]].rename(columns={"description": "holiday_type"})
-else:
-    print(" 'holidays_events.csv' dosyasında 'type' veya 'description' kolonu bulunamadı, tatil verisi eklenmeyecek.")
-    holidays_temp = pd.DataFrame(columns=["date", "holiday_type"])
-
-train = train.merge(holidays_temp, on="date", how="left")
-train["is_holiday"] = np.where(train["holiday_type"].notnull(), 1, 0)
-
-# --- Petrol fiyatlarını (oil) ekleme ---
-train = train.merge(oil, on="date", how="left")
-
-# --- Eksik değerleri doldurma ---
-train["dcoilwtico"].fillna(method="ffill", inplace=True)
-
-# --- Rolling mean (hareketli ortalama) özelliği ---
-print(" Hareketli ortalama hesaplanıyor...")
-train["rolling_sales_mean_7"] = train.groupby(["store_nbr", "family"])["sales"].transform(lambda x: x.rolling(7, 1).mean())
-
-# ---  Yeni Feature Engineering Aşaması ---
-print(" Ek feature’lar (lag ve davranışsal özellikler) ekleniyor...")
-
-# 7 ve 14 günlük gecikmeli satış değerleri
-train["sales_lag_7"] = train.groupby(["store_nbr", "family"])["sales"].shift(7)
-train["sales_lag_14"] = train.groupby(["store_nbr", "family"])["sales"].shift(14)
-
-# Hafta sonu bilgisi
-train["is_weekend"] = train["day_of_week"].isin([5, 6]).astype(int)
-
-# Eksik lag değerlerini doldur
-train[["sales_lag_7", "sales_lag_14"]] = train[["sales_lag_7", "sales_lag_14"]].fillna(0)
-
-# Ürün ailesi (family) encoding
-le = LabelEncoder()
-train["family_encoded"] = le.fit_transform(train["family"])
-
-# --- Gereksiz kolonları temizleme ---
-train.drop(columns=["id"], inplace=True)
-
-# --- Sonuç ---
-print(" Feature engineering tamamlandı!")
-print("Yeni veri şekli:", train.shape)
-print(train.head())
-
-# --- Kaydetme ---
-os.makedirs("outputs", exist_ok=True)
-output_path = "outputs/train_featured.csv"
-train.to_csv(output_path, index=False)
-print(f" Yeni veri dosyası kaydedildi: {output_path}")
+# --- Artımlı mod durumu ---
+SERIES_KEYS = ["store_nbr", "family"]
+TRAIN_COLUMNS = ["id", "date", "store_nbr", "family", "sales", "onpromotion"]
+TAIL_LENGTH = required_history(WINDOW_SPEC)   # Seri başına saklanan son satış sayısı
+TAIL_STATE_PATH = os.path.join(FEATURE_STORE_DIR, "tail_state.parquet")
+STATE_META_PATH = os.path.join(FEATURE_STORE_DIR, "tail_state.json")
+
+run = RunReport("feature_engineering", autosave=False)   # Rapor __main__ sonunda yazılır
+
+
+def read_sources():
+    """Yardımcı tabloları okur (stores, oil, holidays, transactions)."""
+    stores = pd.read_csv(stores_path)
+    oil = pd.read_csv(oil_path, parse_dates=["date"])
+    holidays = pd.read_csv(holidays_path, parse_dates=["date"])
+    transactions = pd.read_csv(transactions_path, parse_dates=["date"])
+    return stores, oil, holidays, transactions
+
+
+def add_calendar_features(df):
+    """Tarih bazlı özellikler."""
+    df["year"] = df["date"].dt.year
+    df["month"] = df["date"].dt.month
+    df["day"] = df["date"].dt.day
+    df["day_of_week"] = df["date"].dt.dayofweek
+    return apply_schema(df)
+
+
+def add_exogenous_features(df, calendar):
+    """Mağaza, tatil ve petrol bilgilerini (tarih, mağaza) indeksinden ekler.
+
+    Tatiller mağazanın şehir/eyaletine göre çözülmüş tek değerdir; petrol fiyatı
+    günlük seride ileri doldurulmuştur (tam ve artımlı üretimde aynı sonuç).
+    """
+    for col, values in calendar.lookup(df["date"], df["store_nbr"]).items():
+        df[col] = values
+    return apply_schema(df)
+
+
+def add_traffic_features(df, traffic):
+    """Mağaza trafiği özelliklerini (tarih, mağaza) indeksinden ekler (merge yok)."""
+    for col, values in traffic.lookup(df["date"], df["store_nbr"]).items():
+        df[col] = values
+    return apply_schema(df)
+
+
+def add_sales_features(df, tail=None, spec=WINDOW_SPEC):
+    """Hareketli ortalama ve lag özellikleri; `tail` verilirse serilerin geçmişi onunla tamamlanır."""
+    n_tail = 0 if tail is None else len(tail)
+    work = df[SERIES_KEYS + ["sales"]]
+    if n_tail:
+        work = pd.concat([tail[SERIES_KEYS + ["sales"]], work], ignore_index=True)
+
+    codes = work.groupby(SERIES_KEYS, sort=False, observed=True).ngroup().to_numpy()
+
+    # --- Rolling ve lag özellikleri (tek gruplu düzen, WINDOW_SPEC'teki tüm pencereler) ---
+    print(f" Pencere özellikleri hesaplanıyor: {', '.join(spec)}")
+    for name, values in compute_window_features(work["sales"].to_numpy(), codes, spec).items():
+        df[name] = values[n_tail:]
+
+    # Hafta sonu bilgisi
+    df["is_weekend"] = df["day_of_week"].isin([5, 6]).astype(int)
+
+    # Eksik lag değerlerini doldur (iteratif tahminle aynı değer: LAG_FILL)
+    lags = lag_columns(spec)
+    df[lags] = df[lags].fillna(LAG_FILL)
+    return apply_schema(df)
+
+
+def encode_family(df, classes=None):
+    """Ürün ailesi (family) encoding; artımlı modda kayıtlı sınıflar kullanılır."""
+    from sklearn.preprocessing import LabelEncoder
+    le = LabelEncoder()
+    if classes is None:
+        df["family_encoded"] = le.fit_transform(df["family"])
+    else:
+        unknown = set(df["family"].unique()) - set(classes)
+        if unknown:
+            raise ValueError(f"Yeni ürün grupları bulundu ({sorted(unknown)}); tam yeniden üretim gerekli.")
+        le.classes_ = np.asarray(classes, dtype=object)
+        df["family_encoded"] = le.transform(df["family"])
+    return apply_schema(df), list(le.classes_)
+
+
+def build_features(train, stores, oil, holidays, transactions, state=None):
+    """Ham satış satırlarından tüm özellikleri üretir (tam veya artımlı).
+
+    Dönüş: (özellik tablosu, ürün grubu sınıfları, mağaza trafiği indeksi).
+    """
+    tail, meta = state if state is not None else (None, {})
+
+    report_memory("feature_engineering.raw", train)
+    print(" Tarih bazlı özellikler üretiliyor...")
+    with run.step("calendar_features", rows=len(train)):
+        train = add_calendar_features(train)
+
+    print(" Tatil bilgileri ekleniyor...")
+    with run.step("exogenous_features", rows=len(train)):
+        calendar = CalendarIndex.build(stores, oil, holidays, start=train["date"].min(), end=train["date"].max())
+        train = add_exogenous_features(train, calendar)
+    with run.step("traffic_features", rows=len(train)):
+        traffic = StoreTraffic.build(transactions, stores, start=train["date"].min(), end=train["date"].max())
+        train = add_traffic_features(train, traffic)
+    report_memory("feature_engineering.exogenous", train)
+    with run.step("window", rows=len(train)):
+        train = add_sales_features(train, tail)
+    with run.step("encode_family", rows=len(train)):
+        train, classes = encode_family(train, meta.get("family_classes"))
+
+    # --- Gereksiz kolonları temizleme ---
+    train.drop(columns=["id"], inplace=True)
+    report_memory("feature_engineering.final", train)
+    return train, classes, traffic
+
+
+def build_tail_state(featured, prev_tail=None):
+    """Seri başına son TAIL_LENGTH satırı (satır sırasıyla) döndürür."""
+    cols = SERIES_KEYS + ["date", "sales"]
+    rows = featured[cols]
+    if prev_tail is not None:
+        rows = pd.concat([prev_tail[cols], rows], ignore_index=True)
+    rows = rows.assign(family=rows["family"].astype(str))
+    from_end = rows.groupby(SERIES_KEYS, sort=False).cumcount(ascending=False)
+    return rows[from_end < TAIL_LENGTH].reset_index(drop=True)
+
+
+def save_state(tail, featured, classes):
+    meta = {
+        "last_date": str(featured["date"].max().date()),
+        "family_classes": classes,
+        "tail_length": TAIL_LENGTH,
+    }
+    tail.to_parquet(TAIL_STATE_PATH, index=False)
+    with open(STATE_META_PATH, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+
+def load_state():
+    if not (os.path.exists(TAIL_STATE_PATH) and os.path.exists(STATE_META_PATH)):
+        raise FileNotFoundError(f"Artımlı durum bulunamadı: {TAIL_STATE_PATH} (önce tam üretim çalıştırılmalı)")
+    tail = pd.read_parquet(TAIL_STATE_PATH)
+    with open(STATE_META_PATH, encoding="utf-8") as f:
+        meta = json.load(f)
+    return tail, meta
+
+
+def update_panel(new_featured):
+    """Yeni satırları kayıtlı panele ekler; panel yoksa (eski depo) tüm depodan kurar."""
+    if os.path.exists(os.path.join(PANEL_DIR, PANEL_META)):
+        panel = SalesPanel.load(PANEL_DIR).append(new_featured[PANEL_COLUMNS])
+    else:
+        panel = SalesPanel.from_frame(load_features(columns=PANEL_COLUMNS))
+    return panel.save(PANEL_DIR)
+
+
+def append_features(new_featured):
+    """Yeni satırları ilgili yıl dosyalarına ekler; diğer yıllara dokunulmaz."""
+    years = sorted(new_featured["year"].unique())
+    existing_years = {int(os.path.basename(p).split("=")[1].split(".")[0]) for p in partition_files()}
+    parts = []
+    for year in years:
+        new_part = new_featured[new_featured["year"] == year]
+        if year in existing_years:
+            old_part = load_features(start_date=f"{year}-01-01", end_date=f"{year}-12-31")
+            for col in old_part.columns:
+                if isinstance(old_part[col].dtype, pd.CategoricalDtype):
+                    old_part[col] = old_part[col].astype(object)
+            new_part = pd.concat([old_part, new_part[old_part.columns]], ignore_index=True)
+        parts.append(new_part)
+    return save_features(pd.concat(parts, ignore_index=True), FEATURE_STORE_DIR, replace=False)
+
+
+def run_full():
+    # --- CSV Dosyalarını Okuma ---
+    print(" Veriler okunuyor...")
+    with run.step("read_csv") as step:
+        train = pd.read_csv(train_path, parse_dates=["date"], dtype=csv_dtypes(TRAIN_COLUMNS))
+        stores, oil, holidays, transactions = read_sources()
+        step.rows = len(train)
+
+    train, classes, traffic = build_features(train, stores, oil, holidays, transactions)
+
+    # --- Sonuç ---
+    print(" Feature engineering tamamlandı!")
+    print("Yeni veri şekli:", train.shape)
+    print(train.head())
+
+    # --- Kaydetme (yıllara bölünmüş Parquet özellik deposu) ---
+    os.makedirs("outputs", exist_ok=True)
+    with run.step("save_store", rows=len(train)):
+        written = save_features(train, FEATURE_STORE_DIR)
+        save_state(build_tail_state(train), train, classes)
+        save_traffic_state(traffic, FEATURE_STORE_DIR, train["date"].max())
+        SalesPanel.from_frame(train[PANEL_COLUMNS]).save(PANEL_DIR)
+    print(f" Özellik deposu kaydedildi: {FEATURE_STORE_DIR} ({len(written)} yıl dosyası)")
+
+
+def run_incremental(new_data_path=None):
+    tail, meta = load_state()
+    if meta.get("tail_length", 0) < TAIL_LENGTH:
+        raise ValueError(
+            f"Kayıtlı durum {meta.get('tail_length')} satır tutuyor, WINDOW_SPEC {TAIL_LENGTH} gerektiriyor; "
+            "tam yeniden üretim gerekli."
+        )
+    last_date = pd.Timestamp(meta["last_date"])
+
+    print(" Yeni veriler okunuyor...")
+    with run.step("read_csv") as step:
+        new_rows = pd.read_csv(new_data_path or train_path, parse_dates=["date"], dtype=csv_dtypes(TRAIN_COLUMNS))
+        if new_data_path is None:
+            new_rows = new_rows[new_rows["date"] > last_date].reset_index(drop=True)
+        step.rows = len(new_rows)
+    if new_data_path is not None and (new_rows["date"] <= last_date).any():
+        raise ValueError(f"Yeni veri {last_date.date()} veya öncesine ait satırlar içeriyor; artımlı mod yalnızca ekleme yapar.")
+
+    if new_rows.empty:
+        print(f" Yeni tarih yok (son tarih: {last_date.date()}), depo güncel.")
+        return
+
+    stores, oil, holidays, transactions = read_sources()
+    featured, classes, traffic = build_features(new_rows, stores, oil, holidays, transactions, state=(tail, meta))
+
+    print(f" {featured['date'].nunique()} yeni gün, {len(featured)} satır ekleniyor...")
+    with run.step("append_store", rows=len(featured)):
+        append_features(featured)
+        save_state(build_tail_state(featured, prev_tail=tail), featured, classes)
+        save_traffic_state(traffic, FEATURE_STORE_DIR, featured["date"].max())
+        update_panel(featured)
+    print(f" Özellik deposu güncellendi: {FEATURE_STORE_DIR} (son tarih: {featured['date'].max().date()})")
+
+
+def main(incremental=False, new_data=None):
+    """Tam ya da artımlı üretim; çalıştırma raporu hata olsa da yazılır."""
+    try:
+        if incremental:
+            run_incremental(new_data)
+        else:
+            run_full()
+    finally:
+        run.save()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feature engineering (tam veya artımlı)")
+    parser.add_argument("--incremental", action="store_true", help="Yalnızca yeni tarihleri işle ve depoya ekle")
+    parser.add_argument("--new-data", default=None, help="Yeni satış satırlarını içeren CSV (train.csv şeması)")
+    args = parser.parse_args()
+    main(args.incremental, args.new_data)
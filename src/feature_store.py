@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+ Özellik Deposu (Columnar Feature Store)
+ Amaç:
+- feature_engineering.py çıktısını CSV yerine tipli, yıllara bölünmüş Parquet
+  dosyaları olarak saklamak (outputs/feature_store/year=YYYY.parquet)
+- Kolonları schema.py'deki tiplerle (int8/int16/float32/category) saklamak ve okumak
+- Tüm aşamaların yalnızca ihtiyaç duyduğu kolonları ve tarih aralığını
+  (memory-map ile) okumasını sağlayan ortak yükleyiciyi sunmak
+"""
+
+import os
+import glob
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from schema import CATEGORICAL_COLUMNS, apply_schema
+
+OUT_DIR = "outputs"
+FEATURE_STORE_DIR = os.path.join(OUT_DIR, "feature_store")
+LEGACY_CSV_PATH = os.path.join(OUT_DIR, "train_featured.csv")
+
+PARTITION_COL = "year"
+
+def optimize_dtypes(df):
+    """Kolonları şema tiplerine çevirir (schema.FEATURE_SCHEMA); girdi değiştirilmez."""
+    df = apply_schema(df.copy())
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            # Kategori kümesi her zaman yalnızca kullanılan değerlerin sıralı listesidir
+            cat = df[col].cat.remove_unused_categories()
+            df[col] = cat.cat.reorder_categories(sorted(cat.cat.categories))
+    return df
+
+
+def _partition_path(store_dir, value):
+    return os.path.join(store_dir, f"{PARTITION_COL}={value}.parquet")
+
+
+def partition_files(store_dir=FEATURE_STORE_DIR):
+    """Depodaki bölüm dosyalarını yıl sırasıyla döndürür."""
+    files = glob.glob(os.path.join(store_dir, f"{PARTITION_COL}=*.parquet"))
+    return sorted(files, key=lambda p: int(os.path.basename(p).split("=")[1].split(".")[0]))
+
+
+def store_exists(store_dir=FEATURE_STORE_DIR):
+    return len(partition_files(store_dir)) > 0
+
+
+def save_features(df, store_dir=FEATURE_STORE_DIR, replace=True):
+    """Özellik tablosunu yıl bazında bölünmüş Parquet dosyalarına yazar.
+
+    Satır sırası korunur (her yıl dosyası kendi içinde orijinal sırayı taşır).
+    `replace=True` iken var olan tüm bölümler silinir; aksi halde yalnızca
+    df'te bulunan yılların dosyaları yeniden yazılır. Tip küçültme yıl bazında
+    yapılır, böylece bir yıl dosyası nasıl üretilirse üretilsin aynıdır.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    if replace:
+        for old in partition_files(store_dir):
+            os.remove(old)
+
+    for value, part in df.groupby(PARTITION_COL, sort=True, observed=True):
+        table = pa.Table.from_pandas(optimize_dtypes(part), preserve_index=False)
+        pq.write_table(table, _partition_path(store_dir, value), compression="snappy")
+    return partition_files(store_dir)
+
+
+def _restore_schema(df):
+    # Yıllar arasında kategori kümeleri farklı olabilir; birleşimden sonra tekrar category olur.
+    # Eski tiplerle yazılmış dosyalar (ör. float64 pencere kolonları) da burada şemaya çekilir.
+    return apply_schema(df)
+
+
+def _date_filters(start_date, end_date):
+    filters = []
+    if start_date is not None:
+        filters.append(("date", ">=", pd.Timestamp(start_date)))
+    if end_date is not None:
+        filters.append(("date", "<=", pd.Timestamp(end_date)))
+    return filters or None
+
+
+def _partitions_in_range(files, start_date, end_date):
+    lo = pd.Timestamp(start_date).year if start_date is not None else -np.inf
+    hi = pd.Timestamp(end_date).year if end_date is not None else np.inf
+    return [f for f in files if lo <= int(os.path.basename(f).split("=")[1].split(".")[0]) <= hi]
+
+
+_FILTER_OPS = {
+    "==": lambda col, v: col == v,
+    "!=": lambda col, v: col != v,
+    "<": lambda col, v: col < v,
+    "<=": lambda col, v: col <= v,
+    ">": lambda col, v: col > v,
+    ">=": lambda col, v: col >= v,
+    "in": lambda col, v: col.isin(v),
+    "not in": lambda col, v: ~col.isin(v),
+}
+
+
+def load_features(columns=None, start_date=None, end_date=None, store_dir=FEATURE_STORE_DIR, filters=None):
+    """Özellik deposundan yalnızca istenen kolonları ve tarih aralığını okur.
+
+    Aralık dışındaki yıl dosyaları hiç açılmaz; okunan dosyalar memory-map
+    ile açılır. Depo yoksa eski train_featured.csv dosyasına geri düşülür.
+    `filters`: ek satır filtreleri (pyarrow biçiminde), ör. [("store_nbr", "in", [1, 2])].
+    """
+    files = partition_files(store_dir)
+    if not files:
+        if not os.path.exists(LEGACY_CSV_PATH):
+            raise FileNotFoundError(f"Bulunamadı: {store_dir} (önce feature_engineering.py çalıştırılmalı)")
+        print(f" Uyarı: özellik deposu bulunamadı, {LEGACY_CSV_PATH} okunuyor.")
+        usecols = None if columns is None else list(dict.fromkeys(list(columns) + ["date"] + [f[0] for f in filters or []]))
+        df = pd.read_csv(LEGACY_CSV_PATH, usecols=usecols, parse_dates=["date"])
+        if start_date is not None:
+            df = df[df["date"] >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            df = df[df["date"] <= pd.Timestamp(end_date)]
+        for col, op, value in filters or []:
+            df = df[_FILTER_OPS[op](df[col], value)]
+        df = df[columns].reset_index(drop=True) if columns is not None else df.reset_index(drop=True)
+        return _restore_schema(df)
+
+    read_cols = None if columns is None else list(dict.fromkeys(columns))
+    filters = (_date_filters(start_date, end_date) or []) + list(filters or []) or None
+    parts = [
+        pq.read_table(f, columns=read_cols, filters=filters, memory_map=True).to_pandas()
+        for f in _partitions_in_range(files, start_date, end_date)
+    ]
+    if not parts:
+        return pd.DataFrame(columns=read_cols)
+
+    df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+    return _restore_schema(df)
+
+
+def iter_features(columns=None, batch_size=500_000, store_dir=FEATURE_STORE_DIR):
+    """Özellik deposunu sabit boyutlu parçalar halinde (orijinal satır sırasıyla) okur.
+
+    Bellek kullanımı toplam veri boyutuna değil parça boyutuna bağlıdır.
+    Depo yoksa eski CSV dosyası parça parça okunur.
+    """
+    files = partition_files(store_dir)
+    if not files:
+        if not os.path.exists(LEGACY_CSV_PATH):
+            raise FileNotFoundError(f"Bulunamadı: {store_dir} (önce feature_engineering.py çalıştırılmalı)")
+        usecols = None if columns is None else list(dict.fromkeys(columns))
+        parse_dates = ["date"] if usecols is None or "date" in usecols else False
+        for chunk in pd.read_csv(LEGACY_CSV_PATH, usecols=usecols, parse_dates=parse_dates, chunksize=batch_size):
+            yield _restore_schema(chunk[usecols] if usecols is not None else chunk)
+        return
+
+    read_cols = None if columns is None else list(dict.fromkeys(columns))
+    for f in files:
+        pf = pq.ParquetFile(f, memory_map=True)
+        for batch in pf.iter_batches(batch_size=batch_size, columns=read_cols):
+            yield _restore_schema(batch.to_pandas())
+
+
+def feature_store_last_date(store_dir=FEATURE_STORE_DIR):
+    """Depodaki en son tarihi yalnızca son yıl dosyasının date kolonunu okuyarak bulur."""
+    files = partition_files(store_dir)
+    if not files:
+        return load_features(columns=["date"], store_dir=store_dir)["date"].max()
+    dates = pq.read_table(files[-1], columns=["date"], memory_map=True).column("date")
+    return pd.Timestamp(pc.max(dates).as_py())
@@ -6,54 +6,69 @@ Forecast sonuçlarını iş açısından anlamlı hale getirmek:
 - En çok artış / düşüş gösteren kategoriler
 - Mağaza bazında satış tahmin ortalamaları
 - Genel satış trendi (ortalama tahmin)
+Tahmin dosyası parça parça okunur; genel, ürün grubu ve mağaza özetleri tek geçişte
+hesaplanır (aggregation.ForecastAggregator). Dosyada scenario_id kolonu varsa
+(scenario_engine.py çıktısı) özetler senaryo bazında ayrılır.
 """
 
 import pandas as pd
 import numpy as np
 import os
 
+from aggregation import aggregate_forecasts
+
 # --- Dosya yolu ---
 forecast_path = "outputs/forecast_results.csv"
-print(" Tahmin verisi yükleniyor...")
-
-df = pd.read_csv(forecast_path, parse_dates=["date"])
-print(f" Veri yüklendi: {df.shape}")
-
-# --- Genel ortalama satış ---
-overall_avg = df["predicted_sales"].mean()
-print(f"\n Genel Ortalama Tahmini Satış: {overall_avg:.2f}")
-
-# --- Kategori bazlı ortalama satış ---
-family_summary = (
-    df.groupby("family")["predicted_sales"]
-    .agg(["mean", "max", "min"])
-    .sort_values("mean", ascending=False)
-    .reset_index()
-)
-family_summary.rename(columns={"mean": "avg_pred_sales"}, inplace=True)
-
-# --- Mağaza bazlı ortalama satış ---
-store_summary = (
-    df.groupby("store_nbr")["predicted_sales"]
-    .agg(["mean", "max", "min"])
-    .sort_values("mean", ascending=False)
-    .reset_index()
-)
-store_summary.rename(columns={"mean": "avg_pred_sales"}, inplace=True)
-
-# --- En çok artış beklenen kategoriler ---
-print("\n En Yüksek Ortalama Satış Beklenen İlk 5 Kategori:")
-print(family_summary.head(5))
-
-# --- En az satış beklenen kategoriler ---
-print("\n En Düşük Ortalama Satış Beklenen 5 Kategori:")
-print(family_summary.tail(5))
-
-# --- Dosya olarak kaydet ---
-os.makedirs("outputs", exist_ok=True)
-family_summary.to_csv("outputs/family_forecast_summary.csv", index=False)
-store_summary.to_csv("outputs/store_forecast_summary.csv", index=False)
-
-print("\n Raporlar kaydedildi:")
-print(" - outputs/family_forecast_summary.csv")
-print(" - outputs/store_forecast_summary.csv")
+CHUNK_ROWS = 1_000_000     # Her parçada okunan satır sayısı (çok yıllık / çok senaryolu çıktılar için)
+
+
+def summarize(agg, level, by=()):
+    """Seviye özeti: ortalamaya göre azalan sıralı (senaryo varsa senaryo içinde)."""
+    by = list(by)
+    summary = agg.result(level).drop(columns="count")
+    summary = summary.sort_values(by + ["mean"], ascending=[True] * len(by) + [False]).reset_index(drop=True)
+    return summary.rename(columns={"mean": "avg_pred_sales"})
+
+
+def main(forecast_path=forecast_path):
+    """Tahmin dosyasını özetler; ürün grubu ve mağaza özet dosyalarını yazar."""
+    print(" Tahmin verisi yükleniyor...")
+    header = pd.read_csv(forecast_path, nrows=0).columns
+    by = [c for c in ("scenario_id",) if c in header]
+    agg = aggregate_forecasts(
+        pd.read_csv(forecast_path, usecols=by + ["store_nbr", "family", "predicted_sales"], chunksize=CHUNK_ROWS),
+        value="predicted_sales", by=by, levels=("overall", "family", "store"),
+    )
+    print(f" Veri yüklendi: ({agg.n_rows}, {len(header)})")
+
+    # --- Genel ortalama satış ---
+    overall = agg.result("overall")
+    for _, row in overall.iterrows():
+        prefix = "".join(f" [{row[c]}]" for c in by)
+        print(f"\n Genel Ortalama Tahmini Satış{prefix}: {row['mean']:.2f}")
+
+    # --- Kategori ve mağaza bazlı ortalama satış ---
+    family_summary = summarize(agg, "family", by)
+    store_summary = summarize(agg, "store", by)
+
+    # --- En çok artış beklenen kategoriler ---
+    print("\n En Yüksek Ortalama Satış Beklenen İlk 5 Kategori:")
+    print(family_summary.head(5))
+
+    # --- En az satış beklenen kategoriler ---
+    print("\n En Düşük Ortalama Satış Beklenen 5 Kategori:")
+    print(family_summary.tail(5))
+
+    # --- Dosya olarak kaydet ---
+    os.makedirs("outputs", exist_ok=True)
+    family_summary.to_csv("outputs/family_forecast_summary.csv", index=False)
+    store_summary.to_csv("outputs/store_forecast_summary.csv", index=False)
+
+    print("\n Raporlar kaydedildi:")
+    print(" - outputs/family_forecast_summary.csv")
+    print(" - outputs/store_forecast_summary.csv")
+    return family_summary, store_summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+ Toplu İteratif Tahmin Motoru (Batched Recursive Forecasting)
+ Amaç:
+- Tüm mağaza×ürün serilerinin lag/rolling durumunu (n_series × window) boyutlu
+  bir NumPy halka tamponunda (ring buffer) tutmak
+- Her tahmin günü için tüm serileri kapsayan tek bir özellik matrisi kurup
+  model.predict'i gün başına yalnızca bir kez çağırmak
+"""
+
+import numpy as np
+import pandas as pd
+
+from window_features import LAG_FILL
+
+LAG_WINDOW = 14            # Tamponda tutulan son satış sayısı (sales_lag_14 için yeterli)
+ROLLING_WINDOW = 7         # rolling_sales_mean_7 penceresi
+
+
+class SalesRingBuffer:
+    """Seri başına son `window` satış değerini tutan (n_series × window) halka tampon.
+
+    Tüm seriler aynı anda ilerlediği için yazma konumu (pos) ortaktır.
+    Geçerli olmayan (henüz dolmamış) hücreler 0 tutulur ve kronolojik
+    sırada her zaman en eski konumlarda kalır.
+    """
+
+    def __init__(self, n_series, window=LAG_WINDOW):
+        self.window = window
+        self.values = np.zeros((n_series, window), dtype=np.float64)
+        self.count = np.zeros(n_series, dtype=np.int64)
+        self.pos = 0
+
+    @property
+    def n_series(self):
+        return self.values.shape[0]
+
+    @classmethod
+    def from_history(cls, history, pairs, window=LAG_WINDOW):
+        """Uzun formatlı geçmişten (store_nbr, family, date, sales) tamponu doldurur.
+
+        `pairs` seri sırasını belirler (store_nbr, family). Geçmişi olmayan seriler
+        eski döngüdeki gibi pencere boyu sıfır satışla başlatılır.
+        """
+        buf = cls(len(pairs), window)
+        keys = pairs[["store_nbr", "family"]].reset_index(drop=True)
+        keys["series_idx"] = np.arange(len(keys))
+
+        h = history[["store_nbr", "family", "date", "sales"]].merge(keys, on=["store_nbr", "family"], how="inner")
+        h = h.sort_values(["series_idx", "date"], kind="stable")
+        from_end = h.groupby("series_idx").cumcount(ascending=False).to_numpy()
+        h = h[from_end < window]
+        from_end = from_end[from_end < window]
+
+        series_idx = h["series_idx"].to_numpy()
+        buf.values[series_idx, window - 1 - from_end] = h["sales"].to_numpy(dtype=np.float64)
+        buf.count[:] = np.bincount(series_idx, minlength=buf.n_series)
+
+        # Geçmişi hiç olmayan seriler: pencere boyu sıfır satış
+        buf.count[buf.count == 0] = window
+        return buf
+
+    def take(self, index):
+        """Seçilen serilerin (tekrar edebilir) bağımsız bir kopyasını döndürür."""
+        sub = SalesRingBuffer(len(index), self.window)
+        sub.values[:] = self.values[index]
+        sub.count[:] = self.count[index]
+        sub.pos = self.pos
+        return sub
+
+    def last(self, k):
+        """Her seri için son k değeri kronolojik sırayla (n_series × k) döndürür."""
+        idx = (self.pos - k + np.arange(k)) % self.window
+        return self.values[:, idx]
+
+    def push(self, new_values):
+        """Tüm serilere bir günlük yeni değer ekler."""
+        self.values[:, self.pos] = new_values
+        self.pos = (self.pos + 1) % self.window
+        self.count = np.minimum(self.count + 1, self.window)
+
+
+def exog_steps(calendar, dates, store_nbr, family_encoded, onpromotion=0, oil=None, oil_ffill=True, traffic=None):
+    """Her tahmin günü için dışsal özellik DataFrame'leri (seri başına bir satır).
+
+    `calendar`: calendar_index.CalendarIndex; tatiller mağaza bazında çözülmüş olarak okunur.
+    `onpromotion`: sabit, seri başına (n_series,) ya da gün×seri (n_days × n_series) kampanya seviyesi.
+    `oil`: (n_days × n_series) petrol fiyatı (senaryolar için); verilmezse takvimdeki
+    günlük seri kullanılır (oil_ffill=False ise bilinmeyen günler 0).
+    `traffic`: store_traffic.StoreTraffic; verilirse eksen son tahmin gününe kadar ileri taşınır
+    ve trafik özellikleri mağaza×gün matrislerinden seri satırlarına dağıtılır.
+    """
+    dates = pd.DatetimeIndex(dates)
+    d, s = calendar.date_positions(dates), calendar.store_positions(store_nbr)
+    if traffic is not None:
+        traffic.extend(dates[-1])
+        traffic_d, traffic_s = traffic.date_positions(dates), traffic.store_positions(store_nbr)
+        traffic_features = traffic.features()
+    if oil is None:
+        daily = calendar.oil_ffill if oil_ffill else calendar.oil
+        oil = np.broadcast_to(np.nan_to_num(daily[d], nan=0.0)[:, None], (len(dates), len(s)))
+    promo = np.broadcast_to(onpromotion, (len(dates), len(s)))
+
+    steps = []
+    for i, date in enumerate(dates):
+        step = pd.DataFrame({
+            "store_nbr": store_nbr,
+            "onpromotion": promo[i],
+            "year": date.year,
+            "month": date.month,
+            "day": date.day,
+            "day_of_week": date.dayofweek,
+            "is_weekend": int(date.dayofweek in (5, 6)),
+            "is_holiday": (calendar.holiday_code[d[i], s] >= 0).astype(np.int64),
+            "dcoilwtico": oil[i],
+            "family_encoded": family_encoded,
+        })
+        if traffic is not None:
+            for col, matrix in traffic_features.items():
+                step[col] = matrix[traffic_d[i], traffic_s]
+        steps.append(step)
+    return steps
+
+
+def recursive_features(buf):
+    """Tampondaki duruma göre lag ve rolling özelliklerini hesaplar.
+
+    Eğitimdeki (window_features.py) tanımlarla aynıdır: `sales_lag_k` serinin k gözlem
+    önceki değeridir (tamponda t-1 son konumdadır, t-k ondan k-1 önce); yeterli geçmiş
+    yoksa LAG_FILL (özellik deposundaki doldurmayla aynı). `rolling_sales_mean_7` son en fazla
+    7 değerin ortalamasıdır.
+    """
+    last_7 = buf.last(ROLLING_WINDOW)
+    last_14 = buf.last(LAG_WINDOW)
+    n_7 = np.minimum(buf.count, ROLLING_WINDOW)
+
+    rolling_7 = np.zeros(buf.n_series, dtype=np.float64)
+    full = n_7 == ROLLING_WINDOW
+    rolling_7[full] = np.mean(last_7[full], axis=1)
+    # Kısa geçmişli seriler: np.mean'in toplama sırasını korumak için ayrı ayrı
+    for m in np.unique(n_7[(n_7 > 0) & ~full]):
+        rows = n_7 == m
+        rolling_7[rows] = np.mean(last_7[rows][:, -m:], axis=1)
+
+    return {
+        "rolling_sales_mean_7": rolling_7,
+        "sales_lag_7": np.where(buf.count >= 7, last_14[:, -7], LAG_FILL),
+        "sales_lag_14": np.where(buf.count >= 14, last_14[:, -14], LAG_FILL),
+    }
+
+
+def forecast_recursive(model, buf, steps, features, verbose=True):
+    """Gün gün iteratif tahmin; her adımda tüm seriler için tek predict çağrısı.
+
+    `steps`: her tahmin adımı için dışsal (takvim/tatil/petrol/kampanya)
+    özellikleri içeren DataFrame listesi. Satır sırası tampondaki seri sırasıyla
+    aynı olmalıdır. Dönüş: (n_steps × n_series) tahmin matrisi.
+    """
+    preds = np.zeros((len(steps), buf.n_series), dtype=np.float64)
+
+    for i, exog in enumerate(steps):
+        if len(exog) != buf.n_series:
+            raise ValueError(f"Adım {i}: {len(exog)} satır var, {buf.n_series} seri bekleniyordu.")
+
+        X = exog.reset_index(drop=True).copy()
+        for col, values in recursive_features(buf).items():
+            X[col] = values
+
+        y_hat = np.maximum(model.predict(X[features]), 0.0)
+        buf.push(y_hat)
+        preds[i] = y_hat
+
+        if verbose:
+            print(f"{i + 1}/{len(steps)} gün tahmin edildi ({buf.n_series} seri)...")
+
+    return preds
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+ Tahmin Servisi (Forecast Serving)
+ Amaç:
+- best_model.joblib'i bir kez yükleyip bellekte sıcak tutmak
+- Her mağaza×ürün serisinin son satış geçmişini kompakt NumPy dizilerinde tutmak
+  (forecast_engine.SalesRingBuffer)
+- "44 nolu mağaza, X ve Y ürün grupları, önümüzdeki 14 gün, kampanya senaryosu Z"
+  gibi istekleri milisaniyeler içinde yanıtlamak
+- Eşzamanlı istekleri kısa bir pencerede toplayıp gün başına tek predict çağrısıyla işlemek
+
+Kullanım:
+    python src/forecast_service.py --port 8080
+    curl -X POST localhost:8080/forecast -d '{"store_nbr": 44, "families": ["BEVERAGES"], "days": 14, "promo": 5}'
+
+Python API:
+    service = ForecastService()
+    service.forecast(44, ["BEVERAGES", "DAIRY"], days=14, promo={"BEVERAGES": 10})
+"""
+
+import os
+import json
+import queue
+import argparse
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from feature_store import FEATURE_STORE_DIR
+from sales_panel import open_panel
+from calendar_index import CalendarIndex
+from forecast_engine import exog_steps, forecast_recursive
+from model_bundle import BEST_MODEL_BUNDLE, BEST_MODEL_JOBLIB, load_best_model, model_features
+from store_traffic import TRAFFIC_FEATURES, load_traffic_state, uses_traffic
+
+DATA_DIR = "data"
+OUT_DIR = "outputs"
+best_model_path = BEST_MODEL_JOBLIB    # Model paketi (outputs/best_model) yoksa
+holidays_path = os.path.join(DATA_DIR, "holidays_events.csv")
+stores_path = os.path.join(DATA_DIR, "stores.csv")
+oil_path = os.path.join(DATA_DIR, "oil.csv")
+
+HISTORY_DAYS = 30          # Başlangıç durumu için okunan son gün sayısı
+MAX_DAYS = 365             # Tek istekte izin verilen en uzun ufuk
+BATCH_WINDOW_S = 0.005     # Eşzamanlı istekleri toplama penceresi (5 ms)
+OIL_FFILL = True
+INFERENCE_BACKEND = "flat"  # Küçük toplularda predict yükü düşük: tree_inference.FlatForest ("lightgbm" da olur)
+
+FEATURES = [               # Eğitim sırası (model_tuning.py); model yüklenirken doğrulanır, trafik özellikleri isteğe bağlı
+    "store_nbr", "onpromotion", "year", "month", "day", "day_of_week",
+    "is_holiday", "dcoilwtico", "rolling_sales_mean_7",
+    "sales_lag_7", "sales_lag_14", "is_weekend", "family_encoded"
+] + TRAFFIC_FEATURES
+
+
+class ForecastService:
+    """Sıcak model + seri durumu; istekleri toplu (batched) iteratif tahminle yanıtlar."""
+
+    def __init__(self, model_path=best_model_path, store_dir=FEATURE_STORE_DIR, bundle_dir=BEST_MODEL_BUNDLE):
+        print(" Model ve seri durumu yükleniyor...")
+        self.model = load_best_model(FEATURES, INFERENCE_BACKEND, bundle_dir=bundle_dir, joblib_path=model_path,
+                                     optional=TRAFFIC_FEATURES)
+        self.features = model_features(self.model)
+
+        panel = open_panel(store_dir)
+        self.last_date = panel.dates[-1]
+        active = panel.active_series(HISTORY_DAYS + 1)
+        pairs = panel.pairs.iloc[active].reset_index(drop=True)
+
+        self.state = panel.ring_buffer(active, days=HISTORY_DAYS + 1)
+        self.store_nbr = pairs["store_nbr"].to_numpy(dtype=np.int64)
+        self.family = pairs["family"].to_numpy(dtype=object)
+        self.family_encoded = pairs["family_encoded"].to_numpy(dtype=np.int64)
+        self.series_index = {(int(s), f): i for i, (s, f) in enumerate(zip(self.store_nbr, self.family))}
+
+        # Ufuk boyunca takvim/tatil/petrol indeksi ve mağaza trafiği bir kez hazırlanır
+        self.dates = pd.date_range(self.last_date + pd.Timedelta(days=1), periods=MAX_DAYS, freq="D")
+        stores = pd.read_csv(stores_path)
+        self.calendar = CalendarIndex.build(
+            stores,
+            pd.read_csv(oil_path, parse_dates=["date"]),
+            pd.read_csv(holidays_path, parse_dates=["date"]),
+            end=self.dates[-1],
+        )
+        self.traffic = None
+        if uses_traffic(self.features):
+            self.traffic = load_traffic_state(store_dir, stores, self.last_date).extend(self.dates[-1])
+            self.traffic.features()
+
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._batch_loop, daemon=True)
+        self._worker.start()
+        print(f" Servis hazır: {len(pairs)} seri, son tarih {self.last_date.date()}")
+
+    # --- İstek çözümleme ---
+    def _resolve(self, store_nbr, families, days, promo):
+        if not 1 <= int(days) <= MAX_DAYS:
+            raise ValueError(f"days 1 ile {MAX_DAYS} arasında olmalı: {days}")
+        if families is None:
+            families = [f for (s, f) in self.series_index if s == int(store_nbr)]
+        rows, promos = [], []
+        for fam in families:
+            idx = self.series_index.get((int(store_nbr), fam))
+            if idx is None:
+                raise KeyError(f"Bilinmeyen seri: mağaza {store_nbr}, ürün grubu {fam}")
+            rows.append(idx)
+            promos.append(promo.get(fam, 0) if isinstance(promo, dict) else promo)
+        return np.asarray(rows, dtype=np.int64), np.asarray(promos, dtype=np.int64), int(days)
+
+    # --- Toplu çalıştırma ---
+    def _run_batch(self, requests):
+        """Birden çok isteği tek bir iteratif geçişte çalıştırır (gün başına tek predict)."""
+        rows = np.concatenate([r[0] for r in requests])
+        promos = np.concatenate([r[1] for r in requests])
+        horizon = max(r[2] for r in requests)
+
+        buf = self.state.take(rows)
+        steps = exog_steps(self.calendar, self.dates[:horizon], self.store_nbr[rows],
+                           self.family_encoded[rows], promos, oil_ffill=OIL_FFILL, traffic=self.traffic)
+        preds = forecast_recursive(self.model, buf, steps, self.features, verbose=False)
+
+        results, start = [], 0
+        for r_rows, _, days in requests:
+            block = preds[:days, start:start + len(r_rows)]
+            start += len(r_rows)
+            results.append(pd.DataFrame({
+                "date": np.repeat(self.dates[:days], len(r_rows)),
+                "store_nbr": np.tile(self.store_nbr[r_rows], days),
+                "family": np.tile(self.family[r_rows], days),
+                "predicted_sales": block.reshape(-1),
+            }).sort_values(["store_nbr", "family", "date"], kind="stable").reset_index(drop=True))
+        return results
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while True:
+                    batch.append(self._queue.get(timeout=BATCH_WINDOW_S))
+            except queue.Empty:
+                pass
+            try:
+                for (_, future), result in zip(batch, self._run_batch([req for req, _ in batch])):
+                    future.set_result(result)
+            except Exception as exc:     # Hata tüm bekleyen isteklere iletilir
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    def forecast(self, store_nbr, families=None, days=14, promo=0):
+        """Tek mağaza için seçilen ürün gruplarının `days` günlük tahmini.
+
+        `promo`: tüm ürünler için tek kampanya seviyesi ya da {family: seviye} sözlüğü.
+        Eşzamanlı çağrılar arka plandaki toplayıcıda birleştirilir.
+        """
+        future = Future()
+        self._queue.put((self._resolve(store_nbr, families, days, promo), future))
+        return future.result()
+
+
+def make_handler(service):
+    class ForecastHandler(BaseHTTPRequestHandler):
+        def _send(self, code, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "ok", "last_date": str(service.last_date.date())})
+            else:
+                self._send(404, {"error": "bulunamadı"})
+
+        def do_POST(self):
+            if self.path != "/forecast":
+                self._send(404, {"error": "bulunamadı"})
+                return
+            try:
+                req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                result = service.forecast(
+                    req["store_nbr"], req.get("families"), req.get("days", 14), req.get("promo", 0)
+                )
+            except (KeyError, ValueError, TypeError) as exc:
+                self._send(400, {"error": str(exc)})
+                return
+            result["date"] = result["date"].dt.strftime("%Y-%m-%d")
+            self._send(200, result.to_dict(orient="records"))
+
+        def log_message(self, format, *args):
+            pass
+
+    return ForecastHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yerel tahmin servisi")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    service = ForecastService()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f" Dinleniyor: http://{args.host}:{args.port}/forecast")
+    server.serve_forever()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+ Aşama Ölçümü (Run Report / Stage Instrumentation)
+ Amaç:
+- Her pipeline betiğinde adlandırılmış adımlar için duvar saati süresi, CPU süresi,
+  tepe bellek (peak RSS) ve satır sayısını kaydetmek
+- Çalıştırma sonunda JSON raporu yazmak: outputs/run_reports/<betik>.json (son çalıştırma)
+  ve outputs/run_reports/history.jsonl (her çalıştırma bir satır; gece koşuları karşılaştırılır)
+- Sıcak bölümler için isteğe bağlı cProfile kancası: PROFILE_STEPS ortam değişkeninde adı geçen
+  adımlar (ya da "all") profillenir ve outputs/profiles/<betik>.<adım>.prof dosyasına yazılır
+  (snakeviz / pstats ile okunur). py-spy için ek kanca gerekmez; adım adları rapordaki
+  zaman aralıklarıyla eşleştirilebilir:
+      py-spy record -o outputs/profiles/forecast.svg -- python src/forecast_generation.py
+
+Kullanım:
+    run = RunReport("forecast_generation")
+    with run.step("load") as step:
+        df = load_features(...)
+        step.rows = len(df)
+    # Rapor betik çıkışında otomatik yazılır (hata ile bitse de)
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import cProfile
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: tepe bellek ölçülmez
+    resource = None
+
+OUT_DIR = "outputs"
+RUN_REPORT_DIR = os.path.join(OUT_DIR, "run_reports")
+PROFILE_DIR = os.path.join(OUT_DIR, "profiles")
+PROFILE_ENV = "PROFILE_STEPS"
+
+
+def peak_rss_mb():
+    """Sürecin şimdiye kadarki tepe bellek kullanımı (MB); ölçülemiyorsa None."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux'ta KB, macOS'ta bayt
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def _profiled_steps():
+    value = os.environ.get(PROFILE_ENV, "")
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class Step:
+    """Tek bir adımın ölçümü; `rows` adım içinde atanabilir."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.record = {}
+
+
+class RunReport:
+    """Bir betik çalıştırmasının adım adım ölçümleri."""
+
+    def __init__(self, script, report_dir=RUN_REPORT_DIR, autosave=True):
+        self.script = script
+        self.report_dir = report_dir
+        self.started_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.steps = []
+        self._stack = []
+        self._start_wall = time.perf_counter()
+        self._start_cpu = os.times()
+        self._profile = _profiled_steps()
+        self._saved = False
+        if autosave:
+            atexit.register(self.save)
+
+    def _should_profile(self, name):
+        return "all" in self._profile or name in self._profile
+
+    @contextmanager
+    def step(self, name, rows=None):
+        """Adımı ölçer; iç içe adımlar "dış/iç" adıyla kaydedilir."""
+        full_name = "/".join(self._stack + [name])
+        step = Step(full_name)
+        step.rows = rows
+        profiler = cProfile.Profile() if self._should_profile(name) or self._should_profile(full_name) else None
+
+        self._stack.append(name)
+        cpu0, wall0 = os.times(), time.perf_counter()
+        error = None
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield step
+        except BaseException as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            wall, cpu1 = time.perf_counter() - wall0, os.times()
+            self._stack.pop()
+            step.record = {
+                "step": full_name,
+                "wall_s": round(wall, 4),
+                "cpu_s": round((cpu1.user - cpu0.user) + (cpu1.system - cpu0.system), 4),
+                "children_cpu_s": round((cpu1.children_user - cpu0.children_user)
+                                        + (cpu1.children_system - cpu0.children_system), 4),
+                "peak_rss_mb": peak_rss_mb(),
+                "rows": None if step.rows is None else int(step.rows),
+            }
+            if error is not None:
+                step.record["error"] = error
+            if profiler is not None:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                path = os.path.join(PROFILE_DIR, f"{self.script}.{full_name.replace('/', '.')}.prof")
+                profiler.dump_stats(path)
+                step.record["profile"] = path
+            self.steps.append(step.record)
+            rows_text = "" if step.rows is None else f", {int(step.rows)} satır"
+            print(f" [{self.script}] {full_name}: {wall:.2f} sn (CPU {step.record['cpu_s']:.2f} sn{rows_text})")
+
+    def summary(self):
+        cpu = os.times()
+        return {
+            "script": self.script,
+            "started_at": self.started_at,
+            "argv": sys.argv[1:],
+            "total_wall_s": round(time.perf_counter() - self._start_wall, 4),
+            "total_cpu_s": round((cpu.user - self._start_cpu.user) + (cpu.system - self._start_cpu.system), 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "steps": self.steps,
+        }
+
+    def save(self):
+        """Son çalıştırma raporunu yazar ve geçmiş dosyasına bir satır ekler (bir kez)."""
+        if self._saved or not self.steps:
+            return None
+        self._saved = True
+        report = self.summary()
+        os.makedirs(self.report_dir, exist_ok=True)
+        path = os.path.join(self.report_dir, f"{self.script}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        with open(os.path.join(self.report_dir, "history.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False) + "\n")
+        print(f" Çalıştırma raporu kaydedildi: {path} (toplam {report['total_wall_s']:.1f} sn)")
+        return path
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+ Yerel Model Paketi (Native Model Bundle)
+ Amaç:
+- best_model.joblib'in yanına sürümlü, pickle'sız bir model klasörü yazmak (outputs/best_model):
+    manifest.json   biçim sürümü, model sürümü (model.txt özeti), özellik sırası ve tipleri,
+                    LabelEncoder ürün grubu eşlemesi, eğitim verisi özeti, parametreler
+    model.txt       LightGBM'in kendi metin formatı (lgb.Booster(model_file=...) ile açılır)
+    forest/*.npy    aynı ağaçların düz dizileri (tree_inference.FlatForest.save_arrays)
+- Tahmin tarafında modeli sklearn/lightgbm içe aktarmadan ve unpickle etmeden açmak:
+  "flat" arka ucu dizileri bellek eşlemeli (mmap) okur, yalnızca NumPy (varsa numba) gerekir
+- Özellik sırasını yüklemede ucuzca doğrulamak: çağıranın özellik listesi manifestteki eğitim
+  sırasıyla birebir aynı olmalı (tahmin sütunları konumla eşlenir, isimle değil)
+
+Depodaki outputs/best_model.joblib, mağaza trafiği özelliklerinden (store_traffic.py) önceki 13
+özellikli temel modeldir. Tahmin betikleri trafik özelliklerini isteğe bağlı (`optional`) verir:
+model bunlar olmadan eğitilmişse temel liste kabul edilir ve betikler modelin kendi özellik
+listesiyle (model_features) tahmin eder; model, model_tuning.py ya da model_tuning_fast.py ile
+yeniden eğitilince (paket de o sırada yazılır) trafik özellikleri kendiliğinden kullanılır.
+Yeniden eğitilen best_model.joblib lgb.Booster taşır (eski dosyalar LGBMRegressor); load_best_model
+ikisini de açar ve "lightgbm" arka ucunda paketteki gibi lgb.Booster döndürür.
+
+Manifest en son ve geçici adla yazılıp yerine taşınır; yarım kalan bir kayıtta manifest ya eski
+model.txt özetiyle tutarsızdır ya da yoktur, klasör açılırken hata verir.
+
+Kullanım:
+    save_bundle(booster, features, target="sales", training=data.meta, params=best_params)
+    model = load_best_model(FEATURES, backend="flat", optional=TRAFFIC_FEATURES)   # paket yoksa best_model.joblib
+    features = model_features(model)                     # modelin eğitim sırası
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+
+import numpy as np
+
+from feature_store import FEATURE_STORE_DIR
+from schema import FEATURE_SCHEMA
+from tree_inference import FlatForest
+
+OUT_DIR = "outputs"
+BEST_MODEL_JOBLIB = os.path.join(OUT_DIR, "best_model.joblib")
+BEST_MODEL_BUNDLE = os.path.join(OUT_DIR, "best_model")
+BUNDLE_FORMAT = 1          # Dosya düzeni değişirse artırılır; farklı sürüm açılmaz
+MANIFEST = "manifest.json"
+BOOSTER_FILE = "model.txt"
+FOREST_SUBDIR = "forest"
+STATE_META = "tail_state.json"   # feature_engineering.py: ürün grubu sınıfları (LabelEncoder sırası)
+RETRAIN_HINT = "modeli güncel özelliklerle yeniden eğitin: python src/model_tuning_fast.py (ya da model_tuning.py)"
+
+
+def feature_lists(features, optional=()):
+    """Kabul edilen eğitim sıraları: tam liste ve (varsa) isteğe bağlı özellikler çıkarılmış hâli."""
+    features = list(features)
+    base = [f for f in features if f not in optional]
+    return [features] if base == features else [features, base]
+
+
+def model_features(model):
+    """Yüklenmiş modelin eğitim özellik sırası (FlatForest, lgb.Booster, LGBMRegressor ya da SegmentedModel)."""
+    if hasattr(model, "feature_names"):
+        return list(model.feature_names)
+    if hasattr(model, "features"):
+        return list(model.features)
+    model = model.booster_ if hasattr(model, "booster_") else model
+    return model.feature_name()
+
+
+def _note_missing(names, features):
+    missing = [f for f in features if f not in names]
+    if missing:
+        print(f" Not: model {', '.join(missing)} olmadan eğitilmiş; tahmin bu özellikler olmadan yapılır "
+              f"(kullanmak için {RETRAIN_HINT})")
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def family_classes(store_dir=FEATURE_STORE_DIR):
+    """Özellik deposunun LabelEncoder sınıfları; family_encoded = listedeki sıra."""
+    path = os.path.join(store_dir, STATE_META)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("family_classes")
+
+
+def save_bundle(booster, features, target="sales", directory=BEST_MODEL_BUNDLE, training=None, params=None,
+                store_dir=FEATURE_STORE_DIR):
+    """Eğitilmiş lightgbm.Booster'ı (ya da LGBMRegressor) paket klasörüne yazar; manifesti döndürür.
+
+    `training`: eğitim verisi özeti (ör. training_data.TrainingData.meta: özellik deposu özeti,
+    satır sayısı); `params`: modeli üreten parametreler.
+    """
+    import lightgbm as lgb
+
+    booster = booster.booster_ if hasattr(booster, "booster_") else booster
+    features = list(features)
+    if booster.feature_name() != features:
+        raise ValueError(f"Model özellik sırası verilen listeyle aynı değil: {booster.feature_name()} / {features}")
+
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    booster_path = os.path.join(directory, BOOSTER_FILE)
+    booster.save_model(booster_path)
+    forest = FlatForest.from_booster(booster, dtype=np.float64)
+    forest.save_arrays(os.path.join(directory, FOREST_SUBDIR))
+
+    digest = _sha256(booster_path)
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": digest[:12],
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "lightgbm_version": lgb.__version__,
+        "target": target,
+        "features": features,
+        "dtypes": {name: FEATURE_SCHEMA.get(name, "float64") for name in features},
+        "family_classes": family_classes(store_dir),
+        "training": {k: v for k, v in (training or {}).items() if k in ("fingerprint", "n_rows", "train_rows", "params")},
+        "params": params or {},
+        "n_trees": forest.n_trees,
+        "files": {"booster": BOOSTER_FILE, "booster_sha256": digest, "forest": FOREST_SUBDIR},
+    }
+    tmp = os.path.join(directory, f"{MANIFEST}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp, manifest_path)
+    return manifest
+
+
+class ModelBundle:
+    """Açılmış paket: manifest okunmuştur, model istenince yüklenir."""
+
+    def __init__(self, directory, manifest):
+        self.directory = directory
+        self.manifest = manifest
+
+    @classmethod
+    def open(cls, directory=BEST_MODEL_BUNDLE):
+        path = os.path.join(directory, MANIFEST)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model paketi bulunamadı: {directory} (önce model_tuning.py çalıştırılmalı)")
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"Desteklenmeyen model paketi biçimi: {manifest.get('format')} (beklenen {BUNDLE_FORMAT})")
+        return cls(directory, manifest)
+
+    @property
+    def features(self):
+        return self.manifest["features"]
+
+    @property
+    def version(self):
+        return self.manifest["version"]
+
+    def check_features(self, features, optional=()):
+        """Özellik listesi eğitim sırasıyla aynı değilse ilk farklı konumu bildiren ValueError.
+
+        `optional` içindeki özellikler olmadan eğitilmiş bir model de kabul edilir.
+        """
+        features = list(features)
+        if self.features in feature_lists(features, optional):
+            return
+        for i, (got, want) in enumerate(zip(features, self.features)):
+            if got != want:
+                break
+        else:
+            i = min(len(features), len(self.features))
+        raise ValueError(f"Özellik sırası model paketiyle uyuşmuyor ({self.directory}, sürüm {self.version}): "
+                         f"{i}. konumda {features[i] if i < len(features) else '-'!r}, "
+                         f"beklenen {self.features[i] if i < len(self.features) else '-'!r}; {RETRAIN_HINT}")
+
+    def load_model(self, backend="flat", verify=False):
+        """backend "flat": mmap FlatForest (sklearn/lightgbm yüklenmez); "lightgbm": lgb.Booster.
+
+        verify=True ise model.txt'nin özeti manifestteki ile karşılaştırılır.
+        """
+        booster_path = os.path.join(self.directory, self.manifest["files"]["booster"])
+        if verify and _sha256(booster_path) != self.manifest["files"]["booster_sha256"]:
+            raise ValueError(f"Model dosyası manifestle uyuşmuyor: {booster_path}")
+        if backend == "flat":
+            forest = FlatForest.load_arrays(os.path.join(self.directory, self.manifest["files"]["forest"]),
+                                            dtype=np.float64)
+            if forest.feature_names != self.features or forest.n_trees != self.manifest["n_trees"]:
+                raise ValueError(f"Ağaç dizileri manifestle uyuşmuyor: {self.directory}")
+            return forest
+        if backend == "lightgbm":
+            import lightgbm as lgb
+            return lgb.Booster(model_file=booster_path)
+        raise ValueError(f"Bilinmeyen arka uç: {backend}")
+
+
+def load_best_model(features, backend="flat", bundle_dir=BEST_MODEL_BUNDLE, joblib_path=BEST_MODEL_JOBLIB,
+                    optional=()):
+    """Tahmin için en iyi model: paket varsa oradan (özellik sırası doğrulanır), yoksa joblib dosyasından.
+
+    `optional` özellikleri olmadan eğitilmiş model de kabul edilir; tahminde model_features(model) kullanılmalı.
+    """
+    if os.path.exists(os.path.join(bundle_dir, MANIFEST)):
+        bundle = ModelBundle.open(bundle_dir)
+        bundle.check_features(features, optional)
+        _note_missing(bundle.features, features)
+        return bundle.load_model(backend)
+    if not os.path.exists(joblib_path):
+        raise FileNotFoundError(f"Bulunamadı: {bundle_dir} ya da {joblib_path}")
+    from joblib import load
+
+    model = load(joblib_path)
+    model = model.booster_ if hasattr(model, "booster_") else model
+    names = model.feature_name()
+    if names not in feature_lists(features, optional):
+        raise ValueError(f"Özellik sırası modelle uyuşmuyor ({joblib_path}, {len(names)} özellik, "
+                         f"beklenen {len(features)}): {list(features)} / {names}; {RETRAIN_HINT}")
+    _note_missing(names, features)
+    return FlatForest.from_model(model, dtype=np.float64) if backend == "flat" else model
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+ Segment Model Kaydı (Segmented Model Registry)
+ Amaç:
+- Tek global model yerine segment başına (stores.csv'deki mağaza kümesi `cluster` ya da ürün grubu
+  `family`) ayrı LightGBM modelleri eğitmek
+- Segmentleri süreç havuzunda paralel eğitmek; her segmentin verisi özellik deposundan
+  yalnızca o segmentin satırları filtrelenerek okunur
+- Segment verisinin/parametrelerin özeti (fingerprint) değişmeyen segmentleri yeniden eğitmemek
+- Tüm segmentleri tek bir dosyada saklamak (outputs/segmented_models.joblib)
+- Tahminde her satırı segment modeline vektörel gruplar halinde yönlendirmek (satır satır değil);
+  SegmentedModel.predict global modelle aynı arayüze sahiptir
+
+Kullanım:
+    python src/model_registry.py --by cluster
+    python src/model_registry.py --by family --retrain-all
+"""
+
+import os
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from joblib import dump, load
+
+from feature_store import FEATURE_STORE_DIR, load_features
+from tree_inference import FlatForest
+from model_bundle import feature_lists
+from tuning_cache import load_tuned_params
+from instrumentation import RunReport
+from store_traffic import TRAFFIC_FEATURES
+
+DATA_DIR = "data"
+OUT_DIR = "outputs"
+SEGMENTED_MODEL_PATH = os.path.join(OUT_DIR, "segmented_models.joblib")
+stores_path = os.path.join(DATA_DIR, "stores.csv")
+
+LGBM_THREADS = 4           # Segment başına LightGBM thread sayısı
+N_WORKERS = max(1, (os.cpu_count() or 1) // LGBM_THREADS)
+SEGMENT_BY = ("cluster", "family")
+
+target = "sales"
+features = [
+    "store_nbr", "onpromotion", "year", "month", "day", "day_of_week",
+    "is_holiday", "dcoilwtico", "rolling_sales_mean_7",
+    "sales_lag_7", "sales_lag_14", "is_weekend", "family_encoded"
+] + TRAFFIC_FEATURES
+
+
+class SegmentedModel:
+    """Segment → model eşlemesi ve satırları segmentlere yönlendiren tahmin arayüzü.
+
+    `segment_by="cluster"`: segment, store_nbr'ın stores.csv'deki kümesidir (store_to_segment tablosu).
+    `segment_by="family"`: segment, doğrudan family_encoded değeridir.
+    """
+
+    def __init__(self, segment_by, features, store_to_segment=None):
+        if segment_by not in SEGMENT_BY:
+            raise ValueError(f"segment_by {SEGMENT_BY} değerlerinden biri olmalı: {segment_by}")
+        self.segment_by = segment_by
+        self.features = list(features)
+        self.store_to_segment = store_to_segment      # store_nbr indeksli dizi (-1: bilinmiyor)
+        self.models = {}
+        self.fingerprints = {}
+        self.n_rows = {}
+
+    @property
+    def key_column(self):
+        return "store_nbr" if self.segment_by == "cluster" else "family_encoded"
+
+    def segments_of(self, X):
+        """Her satırın segment numarası (vektörel tablo erişimi)."""
+        if hasattr(X, "columns"):
+            keys = X[self.key_column].to_numpy(dtype=np.int64)
+        else:
+            keys = np.asarray(X)[:, self.features.index(self.key_column)].astype(np.int64)
+        if self.segment_by == "family":
+            return keys
+        seg = np.full(len(keys), -1, dtype=np.int64)
+        known = (keys >= 0) & (keys < len(self.store_to_segment))
+        seg[known] = self.store_to_segment[keys[known]]
+        return seg
+
+    def predict(self, X):
+        seg = self.segments_of(X)
+        out = np.empty(len(seg), dtype=np.float64)
+        order = np.argsort(seg, kind="stable")
+        values, starts = np.unique(seg[order], return_index=True)
+        for value, lo, hi in zip(values, starts, list(starts[1:]) + [len(seg)]):
+            model = self.models.get(int(value))
+            if model is None:
+                raise KeyError(f"{self.segment_by}={value} için eğitilmiş model yok.")
+            rows = order[lo:hi]
+            out[rows] = model.predict(X.iloc[rows] if hasattr(X, "iloc") else np.asarray(X)[rows])
+        return out
+
+    def check_features(self, features, optional=()):
+        """Özellik listesi segment modellerinin eğitim sırasıyla aynı değilse ValueError.
+
+        Tahmin sütunları konumla eşlenir; sırası ya da sayısı farklı bir liste sessizce yanlış tahmin üretir.
+        `optional` içindeki özellikler olmadan eğitilmiş modeller de kabul edilir (model_bundle.feature_lists).
+        """
+        if self.features not in feature_lists(features, optional):
+            raise ValueError(f"Özellik sırası segment modelleriyle uyuşmuyor: {list(features)} / {self.features}; "
+                             f"segment modellerini yeniden eğitin: python src/model_registry.py")
+
+    def flatten(self, dtype=np.float64):
+        """Segment modellerini tree_inference.FlatForest'a çevrilmiş bir kopya."""
+        flat = SegmentedModel(self.segment_by, self.features, self.store_to_segment)
+        flat.models = {s: FlatForest.from_model(m, dtype=dtype) for s, m in self.models.items()}
+        flat.fingerprints, flat.n_rows = dict(self.fingerprints), dict(self.n_rows)
+        return flat
+
+
+def store_segments(stores):
+    """store_nbr → cluster tablosu ve küme başına mağaza listesi."""
+    table = np.full(stores["store_nbr"].max() + 1, -1, dtype=np.int64)
+    table[stores["store_nbr"].to_numpy()] = stores["cluster"].to_numpy()
+    groups = stores.groupby("cluster")["store_nbr"].apply(lambda s: sorted(s.tolist())).to_dict()
+    return table, groups
+
+
+def segment_filters(segment_by, segment, cluster_stores=None):
+    if segment_by == "cluster":
+        return [("store_nbr", "in", cluster_stores[segment])]
+    return [("family_encoded", "==", segment)]
+
+
+def _train_segment(segment, filters, params, previous_fingerprint, store_dir):
+    """İşçi süreçte: segmentin satırlarını okur; özet değişmişse modeli eğitir.
+
+    Dönüş: (segment, fingerprint, satır sayısı, model ya da None [değişmedi], süre).
+    """
+    start = time.perf_counter()
+    df = load_features(columns=features + [target], store_dir=store_dir, filters=filters)
+    h = hashlib.sha256(repr((features, sorted(params.items()))).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    fingerprint = h.hexdigest()
+    if fingerprint == previous_fingerprint:
+        return segment, fingerprint, len(df), None, time.perf_counter() - start
+
+    from lightgbm import LGBMRegressor   # Yalnızca eğitimde; tahmin tarafı lightgbm'i yüklemeden içe aktarır
+
+    model = LGBMRegressor(**params, n_jobs=LGBM_THREADS, verbose=-1)
+    model.fit(df[features], df[target])
+    return segment, fingerprint, len(df), model, time.perf_counter() - start
+
+
+def train_registry(segment_by, params, registry=None, store_dir=FEATURE_STORE_DIR, workers=N_WORKERS):
+    """Segmentleri paralel eğitir; `registry` verilirse verisi değişmeyen segmentler korunur."""
+    stores = pd.read_csv(stores_path)
+    table, cluster_stores = store_segments(stores)
+    if segment_by == "cluster":
+        segments = sorted(cluster_stores)
+    else:
+        segments = sorted(int(v) for v in load_features(columns=["family_encoded"], store_dir=store_dir)
+                          ["family_encoded"].unique())
+
+    if registry is None or registry.segment_by != segment_by or registry.features != features:
+        registry = SegmentedModel(segment_by, features, table if segment_by == "cluster" else None)
+    registry.store_to_segment = table if segment_by == "cluster" else None
+
+    print(f" {len(segments)} segment ({segment_by}) eğitiliyor: {workers} işçi × {LGBM_THREADS} thread")
+    trained = reused = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = [pool.submit(_train_segment, seg, segment_filters(segment_by, seg, cluster_stores), params,
+                            registry.fingerprints.get(seg), store_dir)
+                for seg in segments]
+        for job in jobs:
+            seg, fingerprint, n_rows, model, seconds = job.result()
+            if model is None:
+                reused += 1
+                print(f"   {segment_by}={seg}: değişiklik yok, mevcut model korunuyor ({n_rows} satır)")
+                continue
+            registry.models[seg], registry.fingerprints[seg], registry.n_rows[seg] = model, fingerprint, n_rows
+            trained += 1
+            print(f"   {segment_by}={seg}: {n_rows} satır, {seconds:.1f} sn")
+
+    # Artık bulunmayan segmentler kayıttan çıkarılır
+    for seg in set(registry.models) - set(segments):
+        del registry.models[seg], registry.fingerprints[seg], registry.n_rows[seg]
+    print(f" Eğitilen: {trained}, değişmediği için korunan: {reused}")
+    return registry
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Segment başına model eğitimi (mağaza kümesi / ürün grubu)")
+    parser.add_argument("--by", choices=SEGMENT_BY, default="cluster")
+    parser.add_argument("--retrain-all", action="store_true", help="Özetlere bakmadan tüm segmentleri yeniden eğit")
+    parser.add_argument("--output", default=SEGMENTED_MODEL_PATH)
+    args = parser.parse_args()
+
+    previous = None
+    if os.path.exists(args.output) and not args.retrain_all:
+        previous = load(args.output)
+    params = load_tuned_params(features)
+
+    # Sınıf yolu pickle'da "model_registry.SegmentedModel" olarak kalsın (__main__ değil)
+    import model_registry
+
+    run = RunReport("model_registry")
+    with run.step("train_segments") as step:
+        registry = model_registry.train_registry(args.by, params, previous)
+        step.rows = sum(registry.n_rows.values())
+    with run.step("save"):
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        dump(registry, args.output)
+    print(f" Segment modelleri kaydedildi: {args.output} ({len(registry.models)} model)")
@@ -4,64 +4,90 @@
  Amaç:
 Tahmin edilen satışlar ile gerçek satışları karşılaştırarak
 işe yönelik anlamlı özet tablolar üretmek.
+- Özellik deposu sabit boyutlu parçalar halinde okunur ve her parça ayrı tahmin edilir
+- Sonuçlar mağaza×ürün bazında akışkan toplamlara işlenir; bellek kullanımı parça boyutuyla sınırlıdır
+- Adım süreleri/bellek: outputs/run_reports/model_summary.json (instrumentation.py)
 """
 
-import pandas as pd
+import numpy as np
 import os
+from joblib import load
+
+from feature_store import iter_features
+from aggregation import ForecastAggregator
+from model_bundle import BEST_MODEL_BUNDLE, BEST_MODEL_JOBLIB, load_best_model, model_features
+from model_registry import SEGMENTED_MODEL_PATH
+from instrumentation import RunReport
+from store_traffic import TRAFFIC_FEATURES
 
 # --- Dosya yolları ---
-data_path = "outputs/train_featured.csv"
 results_path = "outputs/model_results.csv"
 best_model_path = "outputs/best_model_summary.txt"
+CHUNK_ROWS = 500_000       # Her parçada okunup tahmin edilen satır sayısı
+INFERENCE_BACKEND = "flat"  # Model paketindeki mmap ağaç dizileri (sklearn/lightgbm yüklenmez); "lightgbm": model.txt
+MODEL_KIND = "global"      # "segmented": segment başına modeller (model_registry.py)
+model_path = SEGMENTED_MODEL_PATH if MODEL_KIND == "segmented" else BEST_MODEL_BUNDLE   # paket yoksa best_model.joblib
 
-# --- Veri yükleme ---
-print(" Veriler yükleniyor...")
-train_df = pd.read_csv(data_path, parse_dates=["date"])
-print(" train_featured yüklendi:", train_df.shape)
+# --- Özellikler (trafik özellikleri isteğe bağlı: model bunlar olmadan eğitilmişse okunmaz) ---
+features = [
+    "store_nbr", "onpromotion", "year", "month", "day", "day_of_week",
+    "is_holiday", "dcoilwtico", "rolling_sales_mean_7",
+    "sales_lag_7", "sales_lag_14", "is_weekend", "family_encoded"
+] + TRAFFIC_FEATURES
 
-# Model çıktısı (tahminler)
-# Burada, test verisinden gerçek satışlar (y_test) ve tahminler (y_pred) birleştiriliyor
-from joblib import load
 
-if os.path.exists("outputs/best_model.joblib"):
-    best_model = load("outputs/best_model.joblib")
-    print(" En iyi model yüklendi (LightGBM - Tuned)")
+def main():
+    """Özellik deposunu parça parça tahmin edip business_summary.csv yazar."""
+    # Model çıktısı (tahminler)
+    # Burada, özellik deposundaki gerçek satışlar ve tahminler parça parça karşılaştırılıyor
+    run = RunReport("model_summary")
+
+    if os.path.exists(model_path) or (MODEL_KIND != "segmented" and os.path.exists(BEST_MODEL_JOBLIB)):
+        with run.step("load_model"):
+            if MODEL_KIND == "segmented":
+                best_model = load(model_path)
+                best_model.check_features(features, TRAFFIC_FEATURES)
+                if INFERENCE_BACKEND == "flat":
+                    best_model = best_model.flatten(np.float64)
+            else:
+                best_model = load_best_model(features, INFERENCE_BACKEND, optional=TRAFFIC_FEATURES)
+            used = model_features(best_model)
+        print(f" En iyi model yüklendi (LightGBM - Tuned): {model_path}")
+
+        # Mağaza×ürün ortalamaları ve hata yüzdesi tek geçişte (aggregation.ForecastAggregator)
+        agg = ForecastAggregator(value="predicted_sales", actual="sales", levels=("store_family",))
+
+        print(f" Veriler parça parça işleniyor ({CHUNK_ROWS} satır/parça)...")
+        with run.step("score_chunks") as step:
+            n_rows = 0
+            for chunk in iter_features(columns=["family", "sales"] + used, batch_size=CHUNK_ROWS):
+                chunk["predicted_sales"] = best_model.predict(chunk[used])
+                agg.add(chunk[["store_nbr", "family", "sales", "predicted_sales"]])
+
+                n_rows += len(chunk)
+                print(f"   {n_rows} satır işlendi...")
+            step.rows = n_rows
+
+        # Mağaza ve ürün bazlı özet (groupby ile aynı sıra: mağaza, ürün grubu)
+        with run.step("summarize") as step:
+            summary = agg.result("store_family")
+            n_groups = len(summary)
+            business_summary = (
+                summary.rename(columns={"mean": "predicted_mean"})
+                [["store_nbr", "family", "actual_mean", "predicted_mean", "mean_error_percent"]]
+                .sort_values("mean_error_percent")
+            )
 
-    # Özellikler
-    features = [
-        "store_nbr", "onpromotion", "year", "month", "day", "day_of_week",
-        "is_holiday", "dcoilwtico", "rolling_sales_mean_7",
-        "sales_lag_7", "sales_lag_14", "is_weekend", "family_encoded"
-    ]
-    
-    X = train_df[features]
-    y_true = train_df["sales"]
-    y_pred = best_model.predict(X)
-    
-    # Tahmin-sonuç karşılaştırma tablosu
-    summary = train_df[["date", "store_nbr", "family"]].copy()
-    summary["actual_sales"] = y_true
-    summary["predicted_sales"] = y_pred
-    summary["error"] = summary["predicted_sales"] - summary["actual_sales"]
-    summary["error_percent"] = (summary["error"] / summary["actual_sales"]) * 100
+            # Sonuçları kaydet
+            os.makedirs("outputs", exist_ok=True)
+            output_path = "outputs/business_summary.csv"
+            business_summary.to_csv(output_path, index=False)
+            step.rows = n_groups
+        print(f" Özet tablo kaydedildi: {output_path}")
 
-    # Mağaza ve ürün bazlı özet
-    business_summary = (
-        summary.groupby(["store_nbr", "family"])
-        .agg(
-            actual_mean=("actual_sales", "mean"),
-            predicted_mean=("predicted_sales", "mean"),
-            mean_error_percent=("error_percent", "mean")
-        )
-        .reset_index()
-        .sort_values("mean_error_percent")
-    )
+    else:
+        print(f" Uyarı: {model_path} bulunamadı. Önce model_tuning.py (ya da model_registry.py) çalıştırılmalı.")
 
-    # Sonuçları kaydet
-    os.makedirs("outputs", exist_ok=True)
-    output_path = "outputs/business_summary.csv"
-    business_summary.to_csv(output_path, index=False)
-    print(f" Özet tablo kaydedildi: {output_path}")
 
-else:
-    print(" Uyarı: best_model.joblib bulunamadı. Önce model_tuning.py çalıştırılmalı.")
+if __name__ == "__main__":
+    main()
@@ -2,28 +2,39 @@
 """
  AŞAMA 4.3 – Hyperparameter Tuning (LightGBM)
  Amaç:
-LightGBM modelinin performansını optimize etmek için Grid Search yöntemiyle 
-en iyi parametre kombinasyonunu bulmak.
+LightGBM modelinin performansını optimize etmek için en iyi parametre kombinasyonunu bulmak.
+- Zaman sıralı, genişleyen pencereli (expanding-window) doğrulama katları
+- LightGBM Dataset binning'i özellik deposundan parça parça bir kez yapılır (training_data.py), ikili dosyaya
+  yazılır ve tüm kat/adaylarda ve sonraki çalıştırmalarda yeniden kullanılır
+- Adaylar süreç havuzunda paralel çalışır (çekirdek sayısı / LightGBM thread sayısı kadar işçi)
+- Successive halving ile zayıf adaylar düşük tur bütçelerinde elenir; adaylar early stopping olmadan,
+  bütçenin son turundaki doğrulama RMSE'siyle sıralanır (son eğitim de tüm n_estimators turunu kullanır)
+- Deneme sonuçları diskteki önbellekte (tuning_cache.py) tutulur; daha önce denenmiş kombinasyonlar yeniden eğitilmez
+- En iyi model best_model.joblib'in yanında model paketi olarak da yazılır (outputs/best_model, model_bundle.py)
 """
 
 # --- Kütüphaneler ---
 import pandas as pd
 import numpy as np
 import os
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_percentage_error
-from lightgbm import LGBMRegressor
-
-# --- Veri Yükleme ---
-print(" Veri yükleniyor...")
-data_path = "outputs/train_featured.csv"
-df = pd.read_csv(data_path, parse_dates=["date"])
-print(" Veri başarıyla yüklendi. Boyut:", df.shape)
-
-# --- Eksik değerleri doldurma ---
-numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
-for col in numeric_cols:
-    df[col] = df[col].fillna(df[col].median())
+import math
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import lightgbm as lgb
+
+from training_data import booster_params, build_training_dataset, predict_rows
+from tuning_cache import TrialCache, feature_store_fingerprint, trial_key
+from instrumentation import RunReport
+from model_bundle import BEST_MODEL_BUNDLE, save_bundle
+from store_traffic import TRAFFIC_FEATURES
+
+# --- Ayarlar ---
+OUT_DIR = "outputs"
+TEST_SIZE = 0.2            # Son %20'lik tarih dilimi test (holdout) olarak ayrılır
+N_FOLDS = 3                # Genişleyen pencereli doğrulama katı sayısı
+ETA = 3                    # Successive halving: her basamakta adayların 1/ETA'sı kalır
+LGBM_THREADS = 4           # Aday başına LightGBM thread sayısı
+N_WORKERS = max(1, (os.cpu_count() or 1) // LGBM_THREADS)
 
 # --- Özellikler / Hedef ---
 target = "sales"
@@ -31,19 +42,9 @@ features = [
     "store_nbr", "onpromotion", "year", "month", "day", "day_of_week",
     "is_holiday", "dcoilwtico", "rolling_sales_mean_7",
     "sales_lag_7", "sales_lag_14", "is_weekend", "family_encoded"
-]
-
-X = df[features]
-y = df[target]
-
-# --- Veri bölme ---
-print(" Veri train/test olarak ayrılıyor...")
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+] + TRAFFIC_FEATURES
 
-# --- LightGBM model tanımı ---
-model = LGBMRegressor(random_state=42)
-
-# --- Grid Search parametre ızgarası ---
+# --- Parametre ızgarası ---
 param_grid = {
     'num_leaves': [31, 50, 70],
     'max_depth': [5, 8, 12],
@@ -51,50 +52,198 @@ param_grid = {
     'n_estimators': [100, 300, 500]
 }
 
-# --- Grid Search başlat ---
-print("\n Grid Search başlatılıyor... (bu işlem birkaç dakika sürebilir)")
-grid_search = GridSearchCV(
-    estimator=model,
-    param_grid=param_grid,
-    cv=3,                  # 3-fold cross validation
-    scoring='neg_root_mean_squared_error',
-    verbose=2,
-    n_jobs=-1
-)
-
-grid_search.fit(X_train, y_train)
-
-# --- En iyi parametreleri göster ---
-best_params = grid_search.best_params_
-print("\n En iyi parametre kombinasyonu bulundu:")
-for k, v in best_params.items():
-    print(f"   {k}: {v}")
-
-# --- En iyi modelle test seti üzerinde tahmin ---
-best_model = grid_search.best_estimator_
-y_pred = best_model.predict(X_test)
-
-rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-mape = mean_absolute_percentage_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
-
-print(f"\n Optimize Edilmiş LightGBM Sonuçları:")
-print(f"   RMSE: {rmse:.2f}")
-print(f"   MAPE: {mape:.2f}")
-print(f"   R²:   {r2:.3f}")
-
-# --- Kaydetme ---
-os.makedirs("outputs", exist_ok=True)
-summary_path = "outputs/best_params_lightgbm.txt"
-with open(summary_path, "w", encoding="utf-8") as f:
-    f.write(" Best LightGBM Parameters:\n")
-    for k, v in best_params.items():
-        f.write(f"{k}: {v}\n")
-    f.write(f"\nRMSE: {rmse:.2f}\nMAPE: {mape:.2f}\nR²: {r2:.3f}\n")
-
-print(f"\n En iyi parametreler kaydedildi: {summary_path}")
 
-# --- En iyi modeli kaydet ---
-from joblib import dump
-dump(grid_search.best_estimator_, "outputs/best_model.joblib")
-print(" En iyi model kaydedildi: outputs/best_model.joblib")
+def time_split_index(dates, test_size):
+    """Tarihe göre sıralı veride, son `test_size` oranlık tarihlerin başladığı satır."""
+    unique_dates = np.unique(dates)
+    cutoff = unique_dates[int(len(unique_dates) * (1 - test_size))]
+    return int(np.searchsorted(dates, cutoff, side="left"))
+
+
+def holdout_train_rows(dates):
+    """Test diliminden önceki satırlar; bin sınırları yalnızca bunlardan belirlenir."""
+    return np.arange(time_split_index(dates, TEST_SIZE))
+
+
+def expanding_folds(dates, n_folds):
+    """Genişleyen pencere katları: [(train_end, valid_end), ...] satır sınırları.
+
+    Tarihler n_folds+1 bloğa bölünür; k. kat ilk k+1 blokla eğitilir, sonraki blokla doğrulanır.
+    """
+    unique_dates = np.unique(dates)
+    edges = [int(np.searchsorted(dates, unique_dates[len(unique_dates) * k // (n_folds + 1)], side="left"))
+             for k in range(1, n_folds + 1)] + [len(dates)]
+    return [(edges[k], edges[k + 1]) for k in range(n_folds)]
+
+
+def lgb_params(candidate):
+    """LGBMRegressor(random_state=42, ...) ile eşdeğer lgb.train parametreleri."""
+    return {
+        "objective": "regression",
+        "metric": "rmse",
+        "num_leaves": candidate["num_leaves"],
+        "max_depth": candidate["max_depth"],
+        "learning_rate": candidate["learning_rate"],
+        "seed": 42,
+        "num_threads": LGBM_THREADS,
+        "verbose": -1,
+    }
+
+
+# --- İşçi süreç tarafı: ikili Dataset her işçide bir kez yüklenir ---
+_worker_dataset = None
+
+
+def _init_worker(bin_path):
+    global _worker_dataset
+    _worker_dataset = lgb.Dataset(bin_path, params={"verbose": -1}).construct()
+
+
+def evaluate_candidate(candidate, rounds, folds, model_path=None):
+    """Adayı tüm katlarda tam `rounds` tur eğitir; son turdaki kat RMSE'lerini döndürür.
+
+    Early stopping kullanılmaz: doğrulama katı hem durma turunu seçip hem puanlasaydı puan iyimser olurdu.
+
+    `model_path` verilirse son katın (en çok veriyle eğitilen) modeli oraya kaydedilir.
+    """
+    scores = []
+    for train_end, valid_end in folds:
+        train_set = _worker_dataset.subset(np.arange(0, train_end))
+        valid_set = _worker_dataset.subset(np.arange(train_end, valid_end))
+        evals = {}
+        booster = lgb.train(
+            lgb_params(candidate), train_set,
+            num_boost_round=rounds,
+            valid_sets=[valid_set],
+            callbacks=[lgb.record_evaluation(evals)],
+        )
+        scores.append(float(evals["valid_0"]["rmse"][-1]))
+    if model_path is not None:
+        booster.save_model(model_path)
+    return scores
+
+
+def trial_params(candidate, rounds):
+    return {"candidate": candidate, "rounds": rounds}
+
+
+def successive_halving(candidates, folds, max_rounds, bin_path, cache, fingerprint):
+    """Adayları artan tur bütçeleriyle değerlendirir, her basamakta en iyi 1/ETA'yı tutar.
+
+    Önbellekte aynı (veri, özellik, kat, parametre, tur) denemesi varsa yeniden eğitilmez.
+    """
+    n_rungs = max(1, math.ceil(math.log(len(candidates), ETA)))
+    budgets = [max(1, math.ceil(max_rounds / ETA ** (n_rungs - 1 - r))) for r in range(n_rungs)]
+    survivors = list(candidates)
+    history = []
+
+    with ProcessPoolExecutor(max_workers=N_WORKERS, initializer=_init_worker, initargs=(bin_path,)) as pool:
+        for rung, budget in enumerate(budgets):
+            print(f"\n Basamak {rung + 1}/{len(budgets)}: {len(survivors)} aday, en fazla {budget} tur")
+            pending = {}
+            for i, cand in enumerate(survivors):
+                rounds = min(budget, cand["n_estimators"])
+                params = trial_params(cand, rounds)
+                key = trial_key(fingerprint, features, folds, params)
+                if cache.get(key) is None and key not in pending:
+                    full_budget = rounds == cand["n_estimators"]
+                    model_path = cache.model_path(key) if full_budget else None
+                    job = pool.submit(evaluate_candidate, cand, rounds, folds, model_path)
+                    pending[key] = (job, params, full_budget, model_path)
+            print(f"   {len(pending)} yeni deneme, {len(survivors) - len(pending)} önbellekten")
+
+            for key, (job, params, full_budget, model_path) in pending.items():
+                cache.put(key, fingerprint, features, folds, params, job.result(), full_budget, model_path)
+
+            results = []
+            for cand in survivors:
+                rounds = min(budget, cand["n_estimators"])
+                entry = cache.get(trial_key(fingerprint, features, folds, trial_params(cand, rounds)))
+                results.append((entry["mean_score"], cand))
+                history.append({"rung": rung + 1, "rounds": rounds, **cand, "cv_rmse": entry["mean_score"]})
+            results.sort(key=lambda r: r[0])
+            keep = len(survivors) if rung == len(budgets) - 1 else max(1, len(survivors) // ETA)
+            survivors = [cand for _, cand in results[:keep]]
+            print(f"   En iyi CV RMSE: {results[0][0]:.2f} -> {results[0][1]}")
+
+    removed = cache.evict()
+    if removed:
+        print(f" Önbellek boyut sınırı: {removed} eski deneme silindi.")
+    return survivors[0], pd.DataFrame(history)
+
+
+def main():
+    """Successive halving ile en iyi parametreleri bulur; en iyi modeli ve özetleri yazar."""
+    from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_percentage_error
+    from joblib import dump
+
+    # --- İkili Dataset: özellik deposundan parça parça, bir kez (depo değişmedikçe diskten) ---
+    run = RunReport("model_tuning")
+    print(" Eğitim verisi hazırlanıyor...")
+    with run.step("training_dataset") as step:
+        data = build_training_dataset(features, target, train_rows=holdout_train_rows)
+        step.rows = data.n_rows
+    print(" Veri hazır. Satır sayısı:", data.n_rows)
+
+    # --- Zaman sıralı bölme (depo tarih sıralıdır) ---
+    print(" Veri tarih sırasına göre train/test olarak ayrılıyor...")
+    dates = data.dates
+    split = time_split_index(dates, TEST_SIZE)
+    print("Train set:", split, "satır, Test set:", data.n_rows - split, "satır")
+
+    folds = expanding_folds(dates[:split], N_FOLDS)
+    candidates = [dict(zip(param_grid, values)) for values in itertools.product(*param_grid.values())]
+
+    print(f"\n Tuning başlatılıyor: {len(candidates)} aday × {N_FOLDS} zaman katı, "
+          f"{N_WORKERS} işçi × {LGBM_THREADS} thread")
+    cache = TrialCache()
+    fingerprint = feature_store_fingerprint()
+    with run.step("successive_halving", rows=split):
+        best_params, history = successive_halving(
+            candidates, folds, max(param_grid["n_estimators"]), data.path, cache, fingerprint
+        )
+    best_params = dict(sorted(best_params.items()))   # GridSearchCV.best_params_ ile aynı anahtar sırası
+    history.to_csv(os.path.join(OUT_DIR, "tuning_history.csv"), index=False)
+
+    # --- En iyi parametreleri göster ---
+    print("\n En iyi parametre kombinasyonu bulundu:")
+    for k, v in best_params.items():
+        print(f"   {k}: {v}")
+
+    # --- En iyi modeli tüm train dilimiyle eğit, test dilimi üzerinde değerlendir ---
+    params, rounds = booster_params({"random_state": 42, **best_params})
+    with run.step("final_fit", rows=split):
+        best_model = lgb.train(params, data.dataset().subset(np.arange(split)), num_boost_round=rounds)
+    with run.step("evaluate", rows=data.n_rows - split):
+        y_test, y_pred = predict_rows(best_model, features, target, np.arange(data.n_rows) >= split)
+
+    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+    mape = mean_absolute_percentage_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+
+    print(f"\n Optimize Edilmiş LightGBM Sonuçları:")
+    print(f"   RMSE: {rmse:.2f}")
+    print(f"   MAPE: {mape:.2f}")
+    print(f"   R²:   {r2:.3f}")
+
+    # --- Kaydetme ---
+    summary_path = "outputs/best_params_lightgbm.txt"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        f.write(" Best LightGBM Parameters:\n")
+        for k, v in best_params.items():
+            f.write(f"{k}: {v}\n")
+        f.write(f"\nRMSE: {rmse:.2f}\nMAPE: {mape:.2f}\nR²: {r2:.3f}\n")
+
+    print(f"\n En iyi parametreler kaydedildi: {summary_path}")
+
+    # --- En iyi modeli kaydet (lgb.Booster olarak; paket aynı Booster'dan yazılır) ---
+    dump(best_model, "outputs/best_model.joblib")
+    print(" En iyi model kaydedildi: outputs/best_model.joblib")
+    bundle = save_bundle(best_model, features, target, training={**data.meta, "train_rows": split},
+                         params=best_params)
+    print(f" Model paketi kaydedildi: {BEST_MODEL_BUNDLE} (sürüm {bundle['version']})")
+    return best_params
+
+
+if __name__ == "__main__":
+    main()
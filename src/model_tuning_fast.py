@@ -2,29 +2,22 @@
 """
  FAST MODEL TUNING (GridSearch'süz)
  Amaç:
-GridSearch sonucunda önceden belirlenmiş en iyi LightGBM parametreleriyle modeli hızlıca eğitmek
-ve best_model.joblib olarak kaydetmek.
+Tuning önbelleğindeki (tuning_cache.py) en iyi LightGBM parametreleriyle modeli hızlıca eğitmek
+ve best_model.joblib ile model paketi (outputs/best_model, model_bundle.py) olarak kaydetmek. Önbellekte aynı veri/özellik seti için kayıt yoksa
+outputs/best_params_lightgbm.txt dosyasındaki parametreler kullanılır.
+Eğitim verisi özellik deposundan parça parça kurulan ikili LightGBM Dataset'inden okunur (training_data.py).
 """
 
-# --- Kütüphaneler ---
-import pandas as pd
+# --- Kütüphaneler (sklearn/lightgbm main() içinde yüklenir) ---
 import numpy as np
 import os
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_percentage_error
-from lightgbm import LGBMRegressor
 from joblib import dump
 
-# --- Veri Yükleme ---
-print(" Veri yükleniyor...")
-data_path = "outputs/train_featured.csv"
-df = pd.read_csv(data_path, parse_dates=["date"])
-print(" Veri başarıyla yüklendi. Boyut:", df.shape)
-
-# --- Eksik değerleri doldurma ---
-numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
-for col in numeric_cols:
-    df[col] = df[col].fillna(df[col].median())
+from training_data import booster_params, build_training_dataset, predict_rows
+from tuning_cache import load_tuned_params
+from instrumentation import RunReport
+from model_bundle import BEST_MODEL_BUNDLE, save_bundle
+from store_traffic import TRAFFIC_FEATURES
 
 # --- Özellikler / Hedef ---
 target = "sales"
@@ -32,50 +25,77 @@ features = [
     "store_nbr", "onpromotion", "year", "month", "day", "day_of_week",
     "is_holiday", "dcoilwtico", "rolling_sales_mean_7",
     "sales_lag_7", "sales_lag_14", "is_weekend", "family_encoded"
-]
-
-X = df[features]
-y = df[target]
-
-# --- Train/Test bölme ---
-print(" Veri train/test olarak ayrılıyor...")
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# --- Önceden belirlenen en iyi parametreler ---
-best_params = {
-    'learning_rate': 0.1,
-    'max_depth': 12,
-    'n_estimators': 500,
-    'num_leaves': 70,
-    'random_state': 42
-}
-
-# --- Model oluşturma ve eğitme ---
-print(" En iyi parametrelerle LightGBM modeli eğitiliyor...")
-best_model = LGBMRegressor(**best_params)
-best_model.fit(X_train, y_train)
-
-# --- Test performansı ---
-y_pred = best_model.predict(X_test)
-rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-mape = mean_absolute_percentage_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
-
-print(f"\n Model Performansı:")
-print(f"RMSE: {rmse:.2f}")
-print(f"MAPE: {mape:.2f}")
-print(f"R²: {r2:.3f}")
-
-# --- Modeli kaydet ---
-os.makedirs("outputs", exist_ok=True)
-dump(best_model, "outputs/best_model.joblib")
-print(" Model kaydedildi: outputs/best_model.joblib")
-
-# --- Özet bilgiyi .txt olarak da kaydet ---
-summary_path = "outputs/best_params_lightgbm.txt"
-with open(summary_path, "w", encoding="utf-8") as f:
-    f.write(" Best LightGBM Parameters (Fast Mode):\n")
-    for k, v in best_params.items():
-        f.write(f"{k}: {v}\n")
-    f.write(f"\nRMSE: {rmse:.2f}\nMAPE: {mape:.2f}\nR²: {r2:.3f}\n")
-print(f" Özet kaydedildi: {summary_path}")
+] + TRAFFIC_FEATURES
+
+
+def split_rows(n_rows):
+    """train_test_split(test_size=0.2, random_state=42) ile aynı satırlar; (train, test) artan sıralı."""
+    from sklearn.model_selection import ShuffleSplit
+    train_idx, test_idx = next(ShuffleSplit(n_splits=1, test_size=0.2, random_state=42).split(np.empty((n_rows, 1))))
+    return np.sort(train_idx), np.sort(test_idx)
+
+
+def main():
+    """En iyi parametrelerle modeli eğitir; best_model.joblib ve best_params_lightgbm.txt yazar."""
+    from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_percentage_error
+    import lightgbm as lgb
+
+    # --- İkili Dataset (özellik deposundan parça parça; depo değişmedikçe diskten) ---
+    run = RunReport("model_tuning_fast")
+
+    print(" Eğitim verisi hazırlanıyor...")
+    with run.step("training_dataset") as step:
+        data = build_training_dataset(features, target, train_rows=lambda dates: split_rows(len(dates))[0])
+        dataset = data.dataset()
+        step.rows = data.n_rows
+    print(" Veri hazır. Satır sayısı:", data.n_rows)
+
+    # --- Train/Test bölme (train_test_split ile aynı satırlar; X/y kopyası yerine Dataset.subset;
+    #     bin sınırları yalnızca train satırlarından) ---
+    print(" Veri train/test olarak ayrılıyor...")
+    train_idx, test_idx = split_rows(data.n_rows)
+    is_test = np.zeros(data.n_rows, dtype=bool)
+    is_test[test_idx] = True
+
+    # --- En iyi parametreler (önbellek → best_params_lightgbm.txt) ---
+    best_params = load_tuned_params(features)
+
+    # --- Model oluşturma ve eğitme ---
+    print(" En iyi parametrelerle LightGBM modeli eğitiliyor...")
+    params, rounds = booster_params(best_params)
+    with run.step("fit", rows=len(train_idx)):
+        best_model = lgb.train(params, dataset.subset(train_idx), num_boost_round=rounds)
+
+    # --- Test performansı (test satırları parça parça tahmin edilir) ---
+    with run.step("evaluate", rows=len(test_idx)):
+        y_test, y_pred = predict_rows(best_model, features, target, is_test)
+    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+    mape = mean_absolute_percentage_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+
+    print(f"\n Model Performansı:")
+    print(f"RMSE: {rmse:.2f}")
+    print(f"MAPE: {mape:.2f}")
+    print(f"R²: {r2:.3f}")
+
+    # --- Modeli kaydet (lgb.Booster olarak; paket aynı Booster'dan yazılır) ---
+    os.makedirs("outputs", exist_ok=True)
+    dump(best_model, "outputs/best_model.joblib")
+    print(" Model kaydedildi: outputs/best_model.joblib")
+    bundle = save_bundle(best_model, features, target, training={**data.meta, "train_rows": len(train_idx)},
+                         params=best_params)
+    print(f" Model paketi kaydedildi: {BEST_MODEL_BUNDLE} (sürüm {bundle['version']})")
+
+    # --- Özet bilgiyi .txt olarak da kaydet ---
+    summary_path = "outputs/best_params_lightgbm.txt"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        f.write(" Best LightGBM Parameters (Fast Mode):\n")
+        for k, v in best_params.items():
+            f.write(f"{k}: {v}\n")
+        f.write(f"\nRMSE: {rmse:.2f}\nMAPE: {mape:.2f}\nR²: {r2:.3f}\n")
+    print(f" Özet kaydedildi: {summary_path}")
+    return best_model
+
+
+if __name__ == "__main__":
+    main()
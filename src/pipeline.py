@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+ Pipeline Çalıştırıcı (DAG + İçerik Özetli Önbellek)
+ Amaç:
+- Aşamaları girdi/çıktı dosyalarıyla tanımlamak; bağımlılıklar girdi/çıktı eşleşmesinden çıkarılır
+- Her aşama için girdi dosyalarının, betiğin ve betiğin içe aktardığı src/ modüllerinin içerik
+  özetini (sha256) hesaplamak; özet ve çıktılar değişmediyse aşamayı atlamak
+- Birbirinden bağımsız dalları (ör. tahmin analizi/görselleştirme ile model özeti/yönetim raporu)
+  eşzamanlı çalıştırmak
+- Tek bir aşamayı (ve gerekiyorsa bayat olan öncüllerini) aynı giriş noktasından çalıştırmak
+
+Aşamalar ayrı süreçlerde, proje kökünden çalıştırılır; her aşamanın çıktısı
+outputs/pipeline_logs/<aşama>.log dosyasına yazılır. Durum: outputs/pipeline_state.json.
+
+Kullanım:
+    python src/pipeline.py                    # tüm aşamalar (güncel olanlar atlanır)
+    python src/pipeline.py forecast           # forecast ve bayat öncülleri
+    python src/pipeline.py report --only      # yalnızca report (öncüllere bakmadan)
+    python src/pipeline.py --status           # hangi aşama güncel / bayat
+    python src/pipeline.py features --force   # features'ı güncel olsa da yeniden çalıştır
+"""
+
+import os
+import ast
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = "data"
+OUT_DIR = "outputs"
+STATE_PATH = os.path.join(OUT_DIR, "pipeline_state.json")
+LOG_DIR = os.path.join(OUT_DIR, "pipeline_logs")
+MAX_JOBS = 2               # Aynı anda çalışan aşama sayısı (bağımsız dallar)
+HASH_BLOCK = 1 << 20
+
+CALENDAR_INPUTS = [os.path.join(DATA_DIR, f) for f in ("stores.csv", "oil.csv", "holidays_events.csv")]
+RAW_INPUTS = [os.path.join(DATA_DIR, "train.csv")] + CALENDAR_INPUTS + [os.path.join(DATA_DIR, "transactions.csv")]
+FEATURE_STORE = os.path.join(OUT_DIR, "feature_store")
+BEST_MODEL = os.path.join(OUT_DIR, "best_model.joblib")
+BEST_MODEL_BUNDLE = os.path.join(OUT_DIR, "best_model")     # model_bundle.py: manifest + model.txt + ağaç dizileri
+
+
+class Stage:
+    """Bir betik, okuduğu dosyalar/klasörler ve ürettikleri."""
+
+    def __init__(self, name, script, inputs, outputs):
+        self.name = name
+        self.script = script
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+
+
+STAGES = [
+    Stage("features", "feature_engineering.py", RAW_INPUTS, [FEATURE_STORE]),
+    Stage("training", "model_training.py", [FEATURE_STORE], [os.path.join(OUT_DIR, "model_results.csv")]),
+    Stage("comparison", "model_comparison.py", [os.path.join(OUT_DIR, "model_results.csv")],
+          [os.path.join(OUT_DIR, "best_model_summary.txt")]),
+    Stage("tuning", "model_tuning.py", [FEATURE_STORE],
+          [BEST_MODEL, BEST_MODEL_BUNDLE, os.path.join(OUT_DIR, "best_params_lightgbm.txt"), os.path.join(OUT_DIR, "tuning_history.csv")]),
+    Stage("forecast", "forecast_generation.py", [FEATURE_STORE, BEST_MODEL, BEST_MODEL_BUNDLE] + CALENDAR_INPUTS,
+          [os.path.join(OUT_DIR, "forecast_results.csv")]),
+    Stage("analysis", "forecast_analysis.py", [os.path.join(OUT_DIR, "forecast_results.csv")],
+          [os.path.join(OUT_DIR, "family_forecast_summary.csv"), os.path.join(OUT_DIR, "store_forecast_summary.csv")]),
+    Stage("viz", "forecast_viz.py",
+          [os.path.join(OUT_DIR, "family_forecast_summary.csv"), os.path.join(OUT_DIR, "store_forecast_summary.csv")],
+          [os.path.join(OUT_DIR, f) for f in ("top10_families.png", "bottom10_families.png", "top10_stores.png")]),
+    Stage("submission", "submission.py",
+          [FEATURE_STORE, BEST_MODEL, BEST_MODEL_BUNDLE] + CALENDAR_INPUTS + [os.path.join(DATA_DIR, f) for f in ("test.csv", "sample_submission.csv")],
+          [os.path.join(OUT_DIR, "submission.csv")]),
+    Stage("summary", "model_summary.py", [FEATURE_STORE, BEST_MODEL, BEST_MODEL_BUNDLE], [os.path.join(OUT_DIR, "business_summary.csv")]),
+    Stage("report", "report_summary.py", [os.path.join(OUT_DIR, "business_summary.csv")],
+          [os.path.join(OUT_DIR, "management_report.csv")]),
+]
+
+
+def dependencies(stages=STAGES):
+    """Aşama → girdilerini üreten aşamalar."""
+    producer = {out: s.name for s in stages for out in s.outputs}
+    return {s.name: sorted({producer[i] for i in s.inputs if i in producer and producer[i] != s.name})
+            for s in stages}
+
+
+def upstream_closure(targets, deps):
+    seen, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in seen:
+            seen.add(name)
+            todo.extend(deps[name])
+    return seen
+
+
+# --- İçerik özetleri ---
+class Hasher:
+    """Dosya özetleri; (boyut, mtime) değişmeyen dosyalar yeniden okunmaz."""
+
+    def __init__(self, memo=None):
+        self.memo = dict(memo or {})
+
+    def file(self, path):
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        cached = self.memo.get(path)
+        if cached is not None and cached[:2] == stamp:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                h.update(block)
+        self.memo[path] = stamp + [h.hexdigest()]
+        return h.hexdigest()
+
+    def path(self, path):
+        """Dosya ya da klasör (içindeki tüm dosyalar, göreli yollarıyla) özeti; yoksa None."""
+        if os.path.isfile(path):
+            return self.file(path)
+        if not os.path.isdir(path):
+            return None
+        h = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                h.update(os.path.relpath(full, path).encode("utf-8"))
+                h.update(self.file(full).encode("ascii"))
+        return h.hexdigest()
+
+
+def local_modules(script, src_dir=SRC_DIR):
+    """Betik ve içe aktardığı src/ modülleri (geçişli), sıralı dosya listesi."""
+    found, todo = set(), [os.path.join(src_dir, script)]
+    while todo:
+        path = todo.pop()
+        if path in found:
+            continue
+        found.add(path)
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            names = [a.name for a in node.names] if isinstance(node, ast.Import) else \
+                    [node.module] if isinstance(node, ast.ImportFrom) and node.module and not node.level else []
+            for name in names:
+                candidate = os.path.join(src_dir, name.split(".")[0] + ".py")
+                if os.path.exists(candidate):
+                    todo.append(candidate)
+    return sorted(found)
+
+
+def stage_key(stage, hasher):
+    """Betik + yerel modüller + girdilerin özeti; eksik girdi varsa None."""
+    h = hashlib.sha256(stage.name.encode("utf-8"))
+    for path in local_modules(stage.script):
+        h.update(os.path.basename(path).encode("utf-8"))
+        h.update(hasher.file(path).encode("ascii"))
+    for path in stage.inputs:
+        digest = hasher.path(path)
+        if digest is None:
+            return None
+        h.update(path.encode("utf-8"))
+        h.update(digest.encode("ascii"))
+    return h.hexdigest()
+
+
+def load_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {"stages": {}, "hashes": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def is_current(stage, state, hasher):
+    """Kayıtlı özet aynı ve çıktılar kaydedildiği haliyle duruyorsa True."""
+    record = state["stages"].get(stage.name)
+    if record is None:
+        return False
+    key = stage_key(stage, hasher)
+    if key is None or key != record["key"]:
+        return False
+    return all(hasher.path(out) == record["outputs"].get(out) for out in stage.outputs)
+
+
+def run_stage(stage):
+    """Aşamayı ayrı süreçte çalıştırır; (başarılı mı, süre, log yolu)."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f"{stage.name}.log")
+    env = dict(os.environ, MPLBACKEND="Agg")     # plt.show() aşamayı bekletmesin
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.run([sys.executable, os.path.join(SRC_DIR, stage.script)],
+                              stdout=log, stderr=subprocess.STDOUT, env=env)
+    return proc.returncode == 0, time.perf_counter() - start, log_path
+
+
+def run_pipeline(targets=None, only=False, force=False, jobs=MAX_JOBS, stages=STAGES):
+    """Hedef aşamaları (varsayılan: tümü) bağımlılık sırasıyla, bağımsız olanları paralel çalıştırır.
+
+    Her aşama, öncülleri bittikten sonra özetine bakılarak ya atlanır ya çalıştırılır;
+    bu sayede öncülü yeniden çalışıp aynı çıktıyı üreten aşamalar da atlanır.
+    """
+    by_name = {s.name: s for s in stages}
+    deps = dependencies(stages)
+    unknown = set(targets or []) - set(by_name)
+    if unknown:
+        raise ValueError(f"Bilinmeyen aşama(lar): {sorted(unknown)} (mevcut: {', '.join(by_name)})")
+    selected = set(targets) if targets and only else upstream_closure(targets or list(by_name), deps)
+    forced = (set(targets) if targets else selected) if force else set()
+
+    state = load_state()
+    hasher = Hasher(state.get("hashes"))
+    pending = {name: [d for d in deps[name] if d in selected] for name in by_name if name in selected}
+    done, failed, results = set(), set(), {}
+
+    def finish(name, status, wall=0.0):
+        results[name] = status
+        (failed if status in ("failed", "blocked") else done).add(name)
+        if status != "blocked":
+            print(f" [{name:10s}] {status:8s} {wall:7.1f} sn")
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        running = {}
+        while pending or running:
+            for name in [n for n, d in pending.items() if all(x in done or x in failed for x in d)]:
+                del pending[name]
+                stage = by_name[name]
+                if any(d in failed for d in deps[name] if d in selected):
+                    finish(name, "blocked")
+                    print(f" [{name:10s}] atlandı: öncül aşama başarısız")
+                elif name not in forced and is_current(stage, state, hasher):
+                    finish(name, "cached")
+                else:
+                    print(f" [{name:10s}] çalışıyor: {stage.script}")
+                    running[pool.submit(run_stage, stage)] = name
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                stage = by_name[name]
+                ok, wall, log_path = future.result()
+                if ok and all(os.path.exists(out) for out in stage.outputs):
+                    state["stages"][name] = {
+                        "key": stage_key(stage, hasher),
+                        "outputs": {out: hasher.path(out) for out in stage.outputs},
+                        "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                        "wall_s": round(wall, 3),
+                    }
+                    state["hashes"] = hasher.memo
+                    save_state(state)
+                    finish(name, "ran", wall)
+                else:
+                    state["stages"].pop(name, None)
+                    finish(name, "failed", wall)
+                    with open(log_path, encoding="utf-8") as f:
+                        tail = f.read().strip().splitlines()[-15:]
+                    print(f"   Hata ({log_path}):\n     " + "\n     ".join(tail))
+
+    state["hashes"] = hasher.memo
+    save_state(state)
+    return results
+
+
+def print_status(stages=STAGES):
+    state = load_state()
+    hasher = Hasher(state.get("hashes"))
+    deps = dependencies(stages)
+    for stage in stages:
+        current = is_current(stage, state, hasher)
+        record = state["stages"].get(stage.name, {})
+        after = f" ← {', '.join(deps[stage.name])}" if deps[stage.name] else ""
+        print(f" {stage.name:10s} {'güncel' if current else 'bayat':7s} {record.get('finished_at', '-'):19s} "
+              f"{stage.script}{after}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline aşamalarını bağımlılık sırasıyla çalıştırır")
+    parser.add_argument("stages", nargs="*", help=f"Aşamalar ({', '.join(s.name for s in STAGES)}); boşsa tümü")
+    parser.add_argument("--only", action="store_true", help="Yalnızca verilen aşamalar (öncüller çalıştırılmaz)")
+    parser.add_argument("--force", action="store_true", help="Verilen aşamaları (boşsa tümünü) güncel olsa da yeniden çalıştır")
+    parser.add_argument("--jobs", type=int, default=MAX_JOBS, help="Eşzamanlı aşama sayısı")
+    parser.add_argument("--status", action="store_true", help="Aşamaların güncel/bayat durumunu göster")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status()
+        sys.exit(0)
+    try:
+        results = run_pipeline(args.stages, only=args.only, force=args.force, jobs=args.jobs)
+    except ValueError as exc:
+        parser.error(str(exc))
+    sys.exit(1 if any(status in ("failed", "blocked") for status in results.values()) else 0)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+ Seri × Gün Satış Paneli (Dense Sales Panel)
+ Amaç:
+- Mağaza×ürün serilerinin satış ve kampanya geçmişini (seri × gün) yoğun matrisler olarak tutmak;
+  seri sırası mağaza, ürün grubu, gün ekseni kesintisiz takvim günleri
+- Paneli özellik deposunun yanında .npy dosyaları olarak saklamak (outputs/feature_store/panel);
+  aşamalar Parquet tablosunu okumadan milisaniyeler içinde bellek eşlemeli (mmap) açar
+- Gecikme/pencere dilimleri ve iteratif tahmin başlangıç durumu (halka tampon) uzun formatlı
+  satırlar üzerinde groupby yerine doğrudan matris dilimlerinden üretilir
+- Artımlı modda yeni günler (ve yeni seriler) mevcut panele eklenir
+
+Tipler özellik şemasındakiyle aynıdır (schema.py): satış float64 (başlangıç durumu özellik
+deposundan okunanla bit düzeyinde aynı kalır), kampanya int16. Verisi olmayan günler
+(ör. 25 Aralık, açılış öncesi) satışta NaN, kampanyada 0 tutulur.
+"""
+
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from feature_store import FEATURE_STORE_DIR
+from schema import FEATURE_SCHEMA
+from forecast_engine import LAG_WINDOW, SalesRingBuffer
+
+PANEL_SUBDIR = "panel"     # Özellik deposu klasörü altında
+PANEL_DIR = os.path.join(FEATURE_STORE_DIR, PANEL_SUBDIR)
+PANEL_META = "panel.json"
+PANEL_COLUMNS = ["date", "store_nbr", "family", "family_encoded", "sales", "onpromotion"]
+SERIES_KEYS = ["store_nbr", "family"]
+SALES_DTYPE = np.dtype(FEATURE_SCHEMA["sales"])
+PROMO_DTYPE = np.dtype(FEATURE_SCHEMA["onpromotion"])
+
+
+class SalesPanel:
+    """(seri × gün) satış ve kampanya matrisleri; seri sırası mağaza, ürün grubu.
+
+    - `pairs`: seri başına store_nbr, family, family_encoded (DataFrame, panel sırası)
+    - `dates`: kesintisiz günlük tarih ekseni; gün indeksi (tarih - ilk gün) gün sayısıdır
+    - `sales`, `promo`: (n_series × n_dates) diziler (bellekte ya da mmap)
+    """
+
+    def __init__(self, pairs, dates, sales, promo):
+        self.pairs = pairs
+        self.dates = dates
+        self.sales = sales
+        self.promo = promo
+
+    @classmethod
+    def from_frame(cls, df):
+        """Uzun formatlı satırlardan (PANEL_COLUMNS) paneli kurar."""
+        df = df.assign(family=df["family"].astype(str))
+        codes = df.groupby(SERIES_KEYS, sort=True).ngroup().to_numpy()
+        pairs = df.groupby(SERIES_KEYS, sort=True)["family_encoded"].first().reset_index()
+        pairs["family_encoded"] = pairs["family_encoded"].astype(np.int64)
+        dates = pd.date_range(df["date"].min(), df["date"].max(), freq="D")
+        day = (df["date"] - dates[0]).dt.days.to_numpy()
+
+        sales = np.full((len(pairs), len(dates)), np.nan, dtype=SALES_DTYPE)
+        promo = np.zeros((len(pairs), len(dates)), dtype=PROMO_DTYPE)
+        sales[codes, day] = df["sales"].to_numpy(dtype=SALES_DTYPE)
+        promo[codes, day] = df["onpromotion"].to_numpy(dtype=PROMO_DTYPE)
+        return cls(pairs, dates, sales, promo)
+
+    # --- Kalıcılık ---
+    @classmethod
+    def load(cls, directory=PANEL_DIR, mmap_mode="r"):
+        """Kayıtlı paneli açar; matrisler varsayılan olarak salt okunur mmap'tir (kopya yok)."""
+        meta_path = os.path.join(directory, PANEL_META)
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Satış paneli bulunamadı: {directory} (önce feature_engineering.py çalıştırılmalı)")
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        pairs = pd.DataFrame(meta["series"])
+        dates = pd.date_range(meta["start"], periods=meta["n_dates"], freq="D")
+        sales = np.load(os.path.join(directory, "sales.npy"), mmap_mode=mmap_mode)
+        promo = np.load(os.path.join(directory, "onpromotion.npy"), mmap_mode=mmap_mode)
+        if sales.shape != (len(pairs), len(dates)) or promo.shape != sales.shape:
+            raise ValueError(f"Panel dosyaları tutarsız: {sales.shape} / {promo.shape}, "
+                             f"beklenen {(len(pairs), len(dates))}")
+        return cls(pairs, dates, sales, promo)
+
+    def save(self, directory=PANEL_DIR):
+        """Matrisleri .npy, seri/tarih eksenlerini panel.json olarak yazar.
+
+        Dosyalar geçici adla yazılıp yerlerine taşınır; meta en son yazıldığından yarım
+        kalan bir kayıt eski meta ile tutarsız görünür ve açılırken hata verir.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name, values in (("sales", self.sales), ("onpromotion", self.promo)):
+            tmp = os.path.join(directory, f"{name}.{os.getpid()}.tmp.npy")
+            np.save(tmp, values)
+            os.replace(tmp, os.path.join(directory, f"{name}.npy"))
+        meta = {
+            "start": str(self.dates[0].date()),
+            "n_dates": len(self.dates),
+            "series": {
+                "store_nbr": self.pairs["store_nbr"].astype(int).tolist(),
+                "family": self.pairs["family"].astype(str).tolist(),
+                "family_encoded": self.pairs["family_encoded"].astype(int).tolist(),
+            },
+        }
+        tmp = os.path.join(directory, f"{PANEL_META}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(directory, PANEL_META))
+        return directory
+
+    def append(self, df):
+        """Yeni satırları (PANEL_COLUMNS) ekleyen yeni panel; gerekirse gün ekseni ve seri listesi büyür."""
+        new = SalesPanel.from_frame(df)
+        pairs = (pd.concat([self.pairs, new.pairs], ignore_index=True)
+                 .drop_duplicates(SERIES_KEYS).sort_values(SERIES_KEYS).reset_index(drop=True))
+        dates = pd.date_range(min(self.dates[0], new.dates[0]), max(self.dates[-1], new.dates[-1]), freq="D")
+        position = pd.MultiIndex.from_frame(pairs[SERIES_KEYS])
+
+        sales = np.full((len(pairs), len(dates)), np.nan, dtype=SALES_DTYPE)
+        promo = np.zeros((len(pairs), len(dates)), dtype=PROMO_DTYPE)
+        for part in (self, new):
+            rows = position.get_indexer(pd.MultiIndex.from_frame(part.pairs[SERIES_KEYS]))
+            lo = (part.dates[0] - dates[0]).days
+            cols = slice(lo, lo + len(part.dates))
+            block = np.asarray(part.sales)
+            seen = ~np.isnan(block)
+            target_sales, target_promo = sales[rows, cols], promo[rows, cols]
+            target_sales[seen] = block[seen]
+            target_promo[seen] = np.asarray(part.promo)[seen]
+            sales[rows, cols], promo[rows, cols] = target_sales, target_promo
+        return SalesPanel(pairs, dates, sales, promo)
+
+    # --- Dilimler ---
+    @property
+    def n_series(self):
+        return len(self.pairs)
+
+    def date_index(self, date):
+        return int((pd.Timestamp(date) - self.dates[0]).days)
+
+    def truncate(self, last_date):
+        """`last_date` dahil önceki günlerden oluşan panel (geriye dönük test için)."""
+        end = self.date_index(last_date) + 1
+        return SalesPanel(self.pairs, self.dates[:end], self.sales[:, :end], self.promo[:, :end])
+
+    def active_series(self, days):
+        """Son `days` günde en az bir gözlemi olan serilerin indeksleri (panel sırası)."""
+        return np.flatnonzero((~np.isnan(self.sales[:, -days:])).any(axis=1))
+
+    def ring_buffer(self, series=None, days=None, window=LAG_WINDOW):
+        """Seçilen serilerin son `days` gündeki gözlemlerinden iteratif tahmin başlangıç durumu.
+
+        SalesRingBuffer.from_history ile aynı durum: seri başına son en fazla `window` gözlem
+        (boş günler atlanır), hiç gözlemi olmayan seriler pencere boyu sıfır satışla başlar.
+        """
+        block = self.sales[:, -days:] if days else self.sales
+        block = np.asarray(block if series is None else block[series], dtype=np.float64)
+        seen = ~np.isnan(block)
+        from_end = np.cumsum(seen[:, ::-1], axis=1)[:, ::-1] - 1     # 0: son gözlem
+        keep = seen & (from_end < window)
+
+        buf = SalesRingBuffer(len(block), window)
+        r, c = np.nonzero(keep)
+        buf.values[r, window - 1 - from_end[r, c]] = block[r, c]
+        buf.count[:] = keep.sum(axis=1)
+        buf.count[buf.count == 0] = window
+        return buf
+
+
+def open_panel(store_dir=FEATURE_STORE_DIR, mmap_mode="r"):
+    """Özellik deposunun yanındaki paneli açar (store_dir/panel)."""
+    return SalesPanel.load(os.path.join(store_dir, PANEL_SUBDIR), mmap_mode=mmap_mode)
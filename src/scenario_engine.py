@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+ Senaryo Motoru (Promotion / Oil What-if Forecasts)
+ Amaç:
+- Kampanya ve petrol fiyatı senaryolarını tek çalıştırmada, toplu olarak tahmin etmek
+- Veri/model yükleme ve takvim/tatil özellikleri tüm senaryolar için bir kez hazırlanır
+- Tüm senaryoların tüm serileri tek bir iteratif geçişte ilerler (gün başına tek predict)
+- --jobs N ile senaryo×seri satırları süreç havuzuna bölünür (sharded_forecast.py)
+- Çıktı: outputs/scenario_forecasts.csv (senaryo kimliğiyle uzun format)
+
+Senaryo tanımı (JSON listesi):
+    [
+      {"id": "baz"},
+      {"id": "icecek_kampanya",
+       "promo": {"default": 0, "rules": [{"family": "BEVERAGES", "level": 10},
+                                         {"store_nbr": 44, "family": "DAIRY", "level": 5}]}},
+      {"id": "petrol_yuksek", "oil": {"scale": 1.2}},
+      {"id": "petrol_yolu", "oil": [80.0, 82.5, 85.0]}
+    ]
+
+- "promo": tek sayı ya da {"default": seviye, "rules": [...]}; kurallar sırayla uygulanır,
+  verilmeyen store_nbr/family alanı tüm değerlerle eşleşir (sonraki kural öncekini ezer)
+- "oil": "ffill" (varsayılan, son bilinen fiyat), "none" (bilinmeyen günler 0),
+  sabit sayı, gün gün fiyat listesi (kısa liste son değerle uzatılır) ya da {"scale": x}
+
+Kullanım:
+    python src/scenario_engine.py --scenarios senaryolar.json --days 14
+    python src/scenario_engine.py --scenarios senaryolar.json --days 28 --jobs 8
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+from feature_store import FEATURE_STORE_DIR
+from sales_panel import open_panel
+from calendar_index import CalendarIndex
+from forecast_engine import exog_steps, forecast_recursive
+from sharded_forecast import forecast_sharded
+from model_bundle import BEST_MODEL_BUNDLE, BEST_MODEL_JOBLIB, load_best_model, model_features
+from instrumentation import RunReport
+from store_traffic import TRAFFIC_FEATURES, load_traffic_state, uses_traffic
+
+DATA_DIR = "data"
+OUT_DIR = "outputs"
+best_model_path = BEST_MODEL_JOBLIB    # Model paketi (outputs/best_model) yoksa
+holidays_path = os.path.join(DATA_DIR, "holidays_events.csv")
+stores_path = os.path.join(DATA_DIR, "stores.csv")
+oil_path = os.path.join(DATA_DIR, "oil.csv")
+output_path = os.path.join(OUT_DIR, "scenario_forecasts.csv")
+
+FORECAST_DAYS = 14
+HISTORY_DAYS = 30          # Başlangıç durumu için okunan son gün sayısı
+INFERENCE_BACKEND = "flat"  # Model paketindeki mmap ağaç dizileri (sklearn/lightgbm yüklenmez); "lightgbm": model.txt
+
+# Senaryo dosyası verilmezse kullanılan örnek senaryolar
+DEFAULT_SCENARIOS = [
+    {"id": "baz", "promo": 0, "oil": "ffill"},
+    {"id": "genel_kampanya_5", "promo": 5},
+    {"id": "petrol_yuzde_20_artis", "oil": {"scale": 1.2}},
+    {"id": "petrol_yuzde_20_dusus", "oil": {"scale": 0.8}},
+]
+
+FEATURES = [               # Eğitim sırası (model_tuning.py); model yüklenirken doğrulanır, trafik özellikleri isteğe bağlı
+    "store_nbr", "onpromotion", "year", "month", "day", "day_of_week",
+    "is_holiday", "dcoilwtico", "rolling_sales_mean_7",
+    "sales_lag_7", "sales_lag_14", "is_weekend", "family_encoded"
+] + TRAFFIC_FEATURES
+
+
+def promo_levels(spec, store_nbr, family):
+    """Senaryonun kampanya tanımını seri başına seviyeye çevirir (n_series,)."""
+    if spec is None or isinstance(spec, (int, float)):
+        return np.full(len(store_nbr), spec or 0, dtype=np.int64)
+    levels = np.full(len(store_nbr), spec.get("default", 0), dtype=np.int64)
+    for rule in spec.get("rules", []):
+        mask = np.ones(len(store_nbr), dtype=bool)
+        if "store_nbr" in rule:
+            mask &= store_nbr == int(rule["store_nbr"])
+        if "family" in rule:
+            mask &= family == rule["family"]
+        levels[mask] = rule["level"]
+    return levels
+
+
+def oil_path_for(spec, oil_raw, oil_ffill):
+    """Senaryonun petrol tanımını gün başına fiyat dizisine çevirir (n_days,).
+
+    `oil_raw` / `oil_ffill`: takvim indeksinden tahmin günlerinin ham ve ileri doldurulmuş fiyatları.
+    """
+    n_days = len(oil_ffill)
+    if spec is None or spec == "ffill":
+        return np.nan_to_num(oil_ffill, nan=0.0)
+    if spec == "none":
+        return np.nan_to_num(oil_raw, nan=0.0)
+    if isinstance(spec, (int, float)):
+        return np.full(n_days, float(spec))
+    if isinstance(spec, list):
+        if not spec:
+            raise ValueError("Petrol fiyat listesi boş olamaz.")
+        path = np.asarray(spec[:n_days], dtype=np.float64)
+        return np.concatenate([path, np.full(n_days - len(path), path[-1])])
+    if isinstance(spec, dict) and "scale" in spec:
+        return np.nan_to_num(oil_ffill, nan=0.0) * float(spec["scale"])
+    raise ValueError(f"Tanınmayan petrol senaryosu: {spec!r}")
+
+
+def load_scenarios(path):
+    with open(path, encoding="utf-8") as f:
+        scenarios = json.load(f)
+    ids = [s["id"] for s in scenarios]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Senaryo kimlikleri tekil olmalı.")
+    return scenarios
+
+
+def run_scenarios(scenarios, days=FORECAST_DAYS, model_path=best_model_path, store_dir=FEATURE_STORE_DIR, n_jobs=1,
+                  bundle_dir=BEST_MODEL_BUNDLE):
+    """Tüm senaryoları tek bir toplu iteratif geçişte tahmin eder; uzun formatlı DataFrame döndürür.
+
+    `n_jobs` > 1 ise senaryo×seri satırları süreçlere bölünür (sonuç aynıdır).
+    """
+    model = load_best_model(FEATURES, INFERENCE_BACKEND, bundle_dir=bundle_dir, joblib_path=model_path,
+                            optional=TRAFFIC_FEATURES)
+    features = model_features(model)
+
+    # --- Ortak hazırlık: seri durumu ve takvim (bir kez) ---
+    panel = open_panel(store_dir)
+    last_date = panel.dates[-1]
+    active = panel.active_series(HISTORY_DAYS + 1)
+    pairs = panel.pairs.iloc[active].reset_index(drop=True)
+    state = panel.ring_buffer(active, days=HISTORY_DAYS + 1)
+
+    store_nbr = pairs["store_nbr"].to_numpy(dtype=np.int64)
+    family = pairs["family"].to_numpy(dtype=object)
+    family_encoded = pairs["family_encoded"].to_numpy(dtype=np.int64)
+    n_series, n_scen = len(pairs), len(scenarios)
+
+    dates = pd.date_range(last_date + pd.Timedelta(days=1), periods=days, freq="D")
+    stores = pd.read_csv(stores_path)
+    calendar = CalendarIndex.build(
+        stores,
+        pd.read_csv(oil_path, parse_dates=["date"]),
+        pd.read_csv(holidays_path, parse_dates=["date"]),
+        end=dates[-1],
+    )
+    traffic = load_traffic_state(store_dir, stores, last_date) if uses_traffic(features) else None
+    d = calendar.date_positions(dates)
+
+    # --- Senaryo matrisleri: (senaryo × seri) promosyon, (gün × senaryo) petrol ---
+    promo = np.stack([promo_levels(s.get("promo"), store_nbr, family) for s in scenarios])
+    oil_paths = np.stack([oil_path_for(s.get("oil"), calendar.oil[d], calendar.oil_ffill[d])
+                          for s in scenarios], axis=1)
+
+    print(f"Senaryo tahmini: {n_scen} senaryo × {n_series} seri, {days} gün "
+          f"({dates[0].date()} ~ {dates[-1].date()})")
+
+    # Tüm senaryoların serileri art arda: satır = senaryo * n_series + seri
+    buf = state.take(np.tile(np.arange(n_series), n_scen))
+    steps = exog_steps(calendar, dates, np.tile(store_nbr, n_scen), np.tile(family_encoded, n_scen),
+                       promo.reshape(-1), oil=np.repeat(oil_paths, n_series, axis=1), traffic=traffic)
+    if n_jobs == 1:
+        preds = forecast_recursive(model, buf, steps, features)
+    else:
+        preds = forecast_sharded(model, buf, steps, features, n_jobs=n_jobs)
+
+    # --- Uzun format: senaryo, tarih, mağaza, ürün ---
+    out = pd.DataFrame({
+        "scenario_id": np.tile(np.repeat([s["id"] for s in scenarios], n_series), days),
+        "date": np.repeat(dates.to_numpy(), n_scen * n_series),
+        "store_nbr": np.tile(store_nbr, n_scen * days),
+        "family": np.tile(family, n_scen * days),
+        "onpromotion": np.tile(promo.reshape(-1), days),
+        "dcoilwtico": np.repeat(oil_paths.reshape(-1), n_series),
+        "predicted_sales": preds.reshape(-1),
+    })
+    scen_order = {s["id"]: i for i, s in enumerate(scenarios)}
+    out["_scen"] = out["scenario_id"].map(scen_order)
+    return (out.sort_values(["_scen", "store_nbr", "family", "date"], kind="stable")
+            .drop(columns="_scen").reset_index(drop=True))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kampanya / petrol senaryolarının toplu tahmini")
+    parser.add_argument("--scenarios", help="Senaryo tanımlarını içeren JSON dosyası")
+    parser.add_argument("--days", type=int, default=FORECAST_DAYS)
+    parser.add_argument("--output", default=output_path)
+    parser.add_argument("--jobs", type=int, default=1, help="Süreç sayısı (0: tüm çekirdekler)")
+    args = parser.parse_args()
+
+    run = RunReport("scenario_engine")
+    scenarios = load_scenarios(args.scenarios) if args.scenarios else DEFAULT_SCENARIOS
+    with run.step("run_scenarios") as step:
+        result = run_scenarios(scenarios, days=args.days, n_jobs=args.jobs or None)
+        step.rows = len(result)
+
+    with run.step("write_csv", rows=len(result)):
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        result.to_csv(args.output, index=False, encoding="utf-8-sig")
+    print(f" Senaryo tahminleri kaydedildi: {args.output}")
+    print(result.groupby("scenario_id", sort=False)["predicted_sales"].sum().rename("toplam_tahmin"))
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+ Özellik Şeması ve Bellek Raporu (Feature Schema)
+ Amaç:
+- Özellik tablosundaki her kolonun tipini tek yerde tanımlamak (int8/int16/float32/category)
+- Tipleri üretimde (feature_engineering.py), kayıtta ve okumada (feature_store.py) uygulamak;
+  tamsayı kolonlara sığmayan bir değer gelirse sessizce taşmak yerine hata vermek
+- Aşama bazında bellek kullanımını ölçmek ve outputs/memory_report.json dosyasına yazmak
+  (her aşamanın son ölçümü saklanır; gerilemeler aşamalar arası karşılaştırılarak izlenir)
+
+Hedef kolon `sales` float64 kalır: metrikler ve akışkan ortalamalar tam duyarlıkla hesaplanır.
+"""
+
+import os
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from window_features import WINDOW_SPEC
+from store_traffic import TRAFFIC_SPEC
+
+OUT_DIR = "outputs"
+MEMORY_REPORT_PATH = os.path.join(OUT_DIR, "memory_report.json")
+
+FEATURE_SCHEMA = {
+    "id": "int32",
+    "date": "datetime64[ns]",
+    "store_nbr": "int8",
+    "family": "category",
+    "sales": "float64",
+    "onpromotion": "int16",
+    "year": "int16",
+    "month": "int8",
+    "day": "int8",
+    "day_of_week": "int8",
+    "is_weekend": "int8",
+    "city": "category",
+    "state": "category",
+    "type": "category",
+    "cluster": "int8",
+    "holiday_type": "category",
+    "is_holiday": "int8",
+    "dcoilwtico": "float32",
+    "family_encoded": "int8",
+    # Rolling/lag kolonları WINDOW_SPEC'ten gelir (yeni pencere eklemek şemayı değiştirmeyi gerektirmez)
+    **{name: "float32" for name in WINDOW_SPEC},
+    **{name: "float32" for name in TRAFFIC_SPEC},     # Mağaza trafiği (store_traffic.py)
+}
+
+CATEGORICAL_COLUMNS = [col for col, dtype in FEATURE_SCHEMA.items() if dtype == "category"]
+
+
+def csv_dtypes(columns, schema=FEATURE_SCHEMA):
+    """pd.read_csv(dtype=...) için şemadaki tipler (tarih kolonları parse_dates ile okunur)."""
+    return {col: schema[col] for col in columns if col in schema and not schema[col].startswith("datetime")}
+
+
+def _cast_integer(values, dtype, col):
+    info = np.iinfo(dtype)
+    if values.isna().any():
+        raise ValueError(f"{col}: eksik değer {dtype} tipine çevrilemez.")
+    lo, hi = values.min(), values.max()
+    if len(values) and (lo < info.min or hi > info.max):
+        raise ValueError(f"{col}: [{lo}, {hi}] aralığı {dtype} tipine sığmıyor; schema.py güncellenmeli.")
+    return values.astype(dtype)
+
+
+def apply_schema(df, schema=FEATURE_SCHEMA):
+    """Kolonları şemadaki tiplere çevirir (yerinde; df döner).
+
+    Şemada olmayan tamsayı kolonlar kayıpsız küçültülür, diğerlerine dokunulmaz.
+    Zaten doğru tipteki kolonlar kopyalanmaz.
+    """
+    for col in df.columns:
+        dtype = schema.get(col)
+        values = df[col]
+        if dtype is None:
+            if pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                df[col] = pd.to_numeric(values, downcast="integer")
+        elif dtype == "category":
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                df[col] = values.astype("category")
+        elif values.dtype != np.dtype(dtype):
+            if np.issubdtype(np.dtype(dtype), np.integer):
+                df[col] = _cast_integer(values, dtype, col)
+            else:
+                df[col] = values.astype(dtype)
+    return df
+
+
+def frame_memory(df):
+    """Kolon başına bayt (object kolonlarda gerçek string boyutu dahil)."""
+    return df.memory_usage(index=False, deep=True)
+
+
+def report_memory(stage, df, path=MEMORY_REPORT_PATH):
+    """Aşamanın bellek kullanımını yazdırır ve rapor dosyasına kaydeder."""
+    by_col = frame_memory(df)
+    total = int(by_col.sum())
+    print(f" Bellek [{stage}]: {total / 2**20:.1f} MB ({len(df)} satır × {df.shape[1]} kolon)")
+
+    report = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+    report[stage] = {
+        "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "rows": int(len(df)),
+        "total_mb": round(total / 2**20, 2),
+        "columns": {col: {"dtype": str(df[col].dtype), "bytes": int(n)} for col, n in by_col.items()},
+    }
+    # Eşzamanlı aşamalar (pipeline.py) yarım yazılmış dosya okumasın: geçici dosya + atomik değiştirme
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return total
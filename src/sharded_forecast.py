@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+ Parçalı Çok Süreçli Tahmin (Sharded Recursive Forecasting)
+ Amaç:
+- Mağaza×ürün serilerini süreç havuzundaki işçilere bölerek iteratif tahmini çok çekirdekte
+  çalıştırmak (forecast_engine.forecast_recursive ile aynı arayüz ve aynı sonuç)
+- Model (tree_inference.FlatForest dizileri), seri durumu (halka tampon) ve dışsal özellikler
+  işçilere pickle ile kopyalanmaz: bir kez .npy olarak paylaşımlı belleğe (/dev/shm, yoksa
+  geçici klasör) yazılır ve her işçi bellek eşlemeli (mmap) olarak okur
+- Her işçi kendi seri aralığının tahminlerini ortak (gün × seri) çıktı dizisindeki ayrık
+  sütunlara yazar; birleştirme seri sırasıyla ve deterministiktir (süreç sayısından bağımsız)
+
+Seriler birbirinden bağımsız ilerlediği için her seri tek süreçli yoldakiyle aynı özellikleri görür;
+FlatForest float64 girdide model.predict ile birebir aynı sonucu verdiğinden çıktılar da aynıdır.
+İşçi başına tek thread kullanılır (çekirdekler süreçlerle doldurulur).
+
+Kullanım:
+    preds = forecast_sharded(model, buf, steps, FEATURES, n_jobs=8)   # (n_steps × n_series)
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from forecast_engine import SalesRingBuffer, forecast_recursive
+from tree_inference import FlatForest
+from model_registry import SegmentedModel
+
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None   # tmpfs: dosyalar RAM'de kalır
+MIN_SERIES_PER_SHARD = 64  # Daha küçük parçalarda süreç yükü tahmin süresini aşar
+
+
+# --- Paylaşılan model ---
+def export_model(model, directory):
+    """Global LightGBM/FlatForest ya da SegmentedModel'i düz dizi dosyalarına yazar."""
+    os.makedirs(directory, exist_ok=True)
+    if isinstance(model, SegmentedModel):
+        meta = {"kind": "segmented", "segment_by": model.segment_by, "features": model.features,
+                "segments": sorted(int(s) for s in model.models)}
+        for segment, seg_model in model.models.items():
+            flat = seg_model if isinstance(seg_model, FlatForest) else FlatForest.from_model(seg_model, dtype=np.float64)
+            flat.save_arrays(os.path.join(directory, f"segment_{int(segment)}"))
+        if model.store_to_segment is not None:
+            np.save(os.path.join(directory, "store_to_segment.npy"), np.asarray(model.store_to_segment))
+    else:
+        meta = {"kind": "global"}
+        flat = model if isinstance(model, FlatForest) else FlatForest.from_model(model, dtype=np.float64)
+        flat.save_arrays(os.path.join(directory, "forest"))
+    with open(os.path.join(directory, "model.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def load_model(directory, n_threads=1):
+    """`export_model` çıktısını bellek eşlemeli dizilerle yükler (kopya yok)."""
+    with open(os.path.join(directory, "model.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    load_forest = lambda sub: FlatForest.load_arrays(os.path.join(directory, sub), dtype=np.float64, n_threads=n_threads)
+    if meta["kind"] == "global":
+        return load_forest("forest")
+    table_path = os.path.join(directory, "store_to_segment.npy")
+    model = SegmentedModel(meta["segment_by"], meta["features"],
+                           np.load(table_path) if os.path.exists(table_path) else None)
+    model.models = {s: load_forest(f"segment_{s}") for s in meta["segments"]}
+    return model
+
+
+# --- İşçi süreç ---
+_worker = {}
+
+
+def _init_worker(shared_dir):
+    """Her işçide bir kez: modeli ve paylaşılan dizileri bellek eşlemeli açar."""
+    with open(os.path.join(shared_dir, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    _worker.update(meta=meta, model=load_model(os.path.join(shared_dir, "model")))
+    for name in ("values", "count", "exog"):
+        _worker[name] = np.load(os.path.join(shared_dir, f"{name}.npy"), mmap_mode="r")
+    _worker["preds"] = np.load(os.path.join(shared_dir, "preds.npy"), mmap_mode="r+")
+
+
+def _run_shard(lo, hi):
+    """[lo, hi) serilerini tüm ufuk boyunca tahmin eder ve ortak çıktıya yazar."""
+    meta = _worker["meta"]
+    buf = SalesRingBuffer(hi - lo, meta["window"])
+    buf.values[:] = _worker["values"][lo:hi]
+    buf.count[:] = _worker["count"][lo:hi]
+    buf.pos = meta["pos"]
+
+    exog = _worker["exog"]
+    steps = [pd.DataFrame(exog[i, lo:hi], columns=meta["columns"]) for i in range(exog.shape[0])]
+    preds = forecast_recursive(_worker["model"], buf, steps, meta["features"], verbose=False)
+    _worker["preds"][:, lo:hi] = preds
+    _worker["preds"].flush()
+    return lo, hi
+
+
+# --- Ana süreç ---
+def _prepare_kernel(model_dir):
+    """numba varsa çekirdeği ana süreçte bellek eşlemeli dizilerle bir kez derler; işçiler fork ile
+    derlenmiş hali devralır. numba katmanı henüz başlatılmadıysa fork-güvenli workqueue seçilir
+    (GNU OpenMP katmanı fork sonrası kilitlenebilir). Dönüş: havuzun süreç başlatma bağlamı.
+
+    Bu süreçte daha önce tahmin yapılıp OpenMP katmanı başlatıldıysa fork yerine forkserver
+    kullanılır; işçiler çekirdeği numba önbelleğinden yükler.
+    """
+    try:
+        import numba
+    except ImportError:
+        return None
+    try:
+        if numba.threading_layer() == "omp":
+            return multiprocessing.get_context("forkserver")
+    except ValueError:
+        numba.config.THREADING_LAYER = "workqueue"
+    model = load_model(model_dir)
+    forest = next(iter(model.models.values())) if isinstance(model, SegmentedModel) else model
+    forest.predict(np.zeros((1, len(forest.feature_names))))
+    return None
+
+
+def shard_bounds(n_series, n_jobs, min_series=MIN_SERIES_PER_SHARD):
+    """Serileri ardışık, eşit boyutlu (en az min_series) aralıklara böler."""
+    n_shards = max(1, min(n_jobs, n_series // max(1, min_series)))
+    edges = np.linspace(0, n_series, n_shards + 1).astype(np.int64)
+    return [(int(lo), int(hi)) for lo, hi in zip(edges[:-1], edges[1:]) if hi > lo]
+
+
+def forecast_sharded(model, buf, steps, features, n_jobs=None, shared_dir=SHARED_DIR, verbose=True):
+    """forecast_recursive'in çok süreçli karşılığı; dönüş: (n_steps × n_series) tahmin matrisi.
+
+    `steps`: exog_steps çıktısı (her gün için seri başına bir satırlık DataFrame).
+    Tek parçaya düşülürse (n_jobs=1 ya da az seri) aynı süreçte forecast_recursive çalışır.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    bounds = shard_bounds(buf.n_series, n_jobs)
+    if len(bounds) == 1:
+        return forecast_recursive(model, buf, steps, features, verbose=verbose)
+
+    columns = list(steps[0].columns)
+    work_dir = tempfile.mkdtemp(prefix="forecast_shards_", dir=shared_dir)
+    try:
+        export_model(model, os.path.join(work_dir, "model"))
+        context = _prepare_kernel(os.path.join(work_dir, "model"))
+        np.save(os.path.join(work_dir, "values.npy"), buf.values)
+        np.save(os.path.join(work_dir, "count.npy"), buf.count)
+        exog = np.lib.format.open_memmap(os.path.join(work_dir, "exog.npy"), mode="w+", dtype=np.float64,
+                                         shape=(len(steps), buf.n_series, len(columns)))
+        for i, step in enumerate(steps):
+            if len(step) != buf.n_series:
+                raise ValueError(f"Adım {i}: {len(step)} satır var, {buf.n_series} seri bekleniyordu.")
+            exog[i] = step[columns].to_numpy(dtype=np.float64)
+        exog.flush()
+        del exog
+        preds = np.lib.format.open_memmap(os.path.join(work_dir, "preds.npy"), mode="w+", dtype=np.float64,
+                                          shape=(len(steps), buf.n_series))
+        del preds
+        with open(os.path.join(work_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"window": buf.window, "pos": buf.pos, "columns": columns, "features": list(features)}, f)
+
+        if verbose:
+            print(f" {len(bounds)} parça × ~{buf.n_series // len(bounds)} seri, {len(steps)} gün "
+                  f"({len(bounds)} süreç, paylaşılan dizin: {work_dir})")
+        with ProcessPoolExecutor(max_workers=len(bounds), mp_context=context, initializer=_init_worker,
+                                 initargs=(work_dir,)) as pool:
+            for lo, hi in pool.map(_run_shard, *zip(*bounds)):
+                if verbose:
+                    print(f"   seriler {lo}-{hi - 1} tamamlandı")
+
+        result = np.array(np.load(os.path.join(work_dir, "preds.npy"), mmap_mode="r"))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    # Tek süreçli yolla aynı son durum: tahminler tampona sırayla eklenir
+    for row in result:
+        buf.push(row)
+    return result
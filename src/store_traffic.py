@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+ Mağaza Trafiği Özellikleri (Store Traffic / transactions.csv)
+ Amaç:
+- Günlük işlem (transactions) sayılarından mağaza bazında lag ve rolling özellikleri üretmek
+- Hesabı mağaza×gün düzeyinde (54 mağaza) bir kez yapmak ve mağaza×ürün satırlarına
+  merge yerine (tarih, mağaza) tamsayı indeksiyle dağıtmak (calendar_index.py ile aynı yaklaşım)
+- Tahmin aşamasında aynı durumu (son günlerin işlem sayıları) kullanarak özellikleri gün gün
+  ileri taşımak: yalnızca eklenen günlerin özellikleri hesaplanır, geçmiş yeniden hesaplanmaz
+
+İşlem sayısı tahmin anında aynı gün ve son günler için bilinmez; bu nedenle tüm özellikler
+en az TRAFFIC_LAG gün geridedir (rolling pencereler de t - TRAFFIC_LAG gününde biter).
+Gelecek günlerin işlem sayısı bilinmediğinden bir hafta önceki aynı günün değeriyle doldurulur;
+TRAFFIC_LAG = 7 olduğundan ilk 7 tahmin gününün özellikleri tamamen gözlenmiş veriden gelir.
+Eksik günler (kapalı mağaza, açılış öncesi) pencere istatistiklerine katılmaz; hiç gözlem
+yoksa özellik 0'dır (satış lag'leri gibi). Pencereler yalnızca kendi günlerinden hesaplandığı
+için artımlı üretim tam üretimle bit düzeyinde aynıdır.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+TRAFFIC_LAG = 7            # En kısa gecikme (gün)
+# Özellik adı -> (istatistik, pencere). "lag" için pencere gecikme miktarıdır;
+# "mean" pencereleri t - TRAFFIC_LAG gününde biter.
+TRAFFIC_SPEC = {
+    "transactions_lag_7": ("lag", 7),
+    "transactions_lag_14": ("lag", 14),
+    "rolling_transactions_mean_7": ("mean", 7),
+    "rolling_transactions_mean_28": ("mean", 28),
+}
+TRAFFIC_FEATURES = list(TRAFFIC_SPEC)
+TRAFFIC_STATE_FILE = "traffic_state.parquet"   # Özellik deposu klasöründe, tail_state'in yanında
+
+
+def required_days(spec=TRAFFIC_SPEC):
+    """Bir günün özellikleri için gereken geçmiş gün sayısı."""
+    need = 0
+    for stat, window in spec.values():
+        if stat == "lag":
+            if window < TRAFFIC_LAG:
+                raise ValueError(f"Trafik lag'i en az {TRAFFIC_LAG} gün olmalı: {window}")
+            need = max(need, window)
+        else:
+            need = max(need, TRAFFIC_LAG + window - 1)
+    return need
+
+
+class StoreTraffic:
+    """Günlük tarih ekseni × mağaza ekseni üzerinde işlem sayıları ve özellik matrisleri.
+
+    - `values[d, s]`: gün d, mağaza s için işlem sayısı (bilinmeyen NaN)
+    - `observed_days`: gözlenmiş günlerin sayısı; sonrası `extend` ile doldurulmuş günlerdir
+    - Özellik matrisleri (gün × mağaza) ilk ihtiyaçta hesaplanır, `extend` ile yalnızca
+      yeni satırlar eklenir
+    """
+
+    def __init__(self, start, store_nbr, values, spec=TRAFFIC_SPEC):
+        self.start = np.datetime64(pd.Timestamp(start).date(), "D")
+        self.store_nbr = np.asarray(store_nbr, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.observed_days = len(self.values)
+        self.spec = dict(spec)
+        self._features = {name: np.zeros((0, len(self.store_nbr)), dtype=np.float32) for name in self.spec}
+
+        self._store_pos = np.full(self.store_nbr.max() + 1, -1, dtype=np.int64)
+        self._store_pos[self.store_nbr] = np.arange(len(self.store_nbr))
+
+    @property
+    def n_days(self):
+        return len(self.values)
+
+    @property
+    def dates(self):
+        return pd.date_range(pd.Timestamp(self.start), periods=self.n_days, freq="D")
+
+    # --- Kurulum ---
+    @classmethod
+    def build(cls, transactions, stores, start=None, end=None, spec=TRAFFIC_SPEC):
+        """transactions.csv satırlarından (date, store_nbr, transactions) yoğun matrisi kurar.
+
+        Tarih ekseni `start`tan required_days() gün önce başlar (ilk günlerin lag'leri için)
+        ve `end`e kadar uzanır; verilmezlerse işlem tablosunun tarih aralığı kullanılır.
+        Mağaza ekseni stores.csv'deki mağazalardır (işlemi hiç olmayanlar dahil).
+        """
+        dates = pd.DatetimeIndex(transactions["date"])
+        first = (pd.Timestamp(start) if start is not None else dates.min()).normalize()
+        first -= pd.Timedelta(days=required_days(spec))
+        last = (pd.Timestamp(end) if end is not None else dates.max()).normalize()
+        n_days = (last - first).days + 1
+
+        store_nbr = np.sort(stores["store_nbr"].to_numpy(dtype=np.int64))
+        traffic = cls(first, store_nbr, np.full((n_days, len(store_nbr)), np.nan), spec)
+
+        keep = np.asarray((dates >= first) & (dates <= last))
+        rows = transactions[keep]
+        d = traffic.date_positions(rows["date"])
+        s = traffic.store_positions(rows["store_nbr"])
+        traffic.values[d, s] = rows["transactions"].to_numpy(dtype=np.float64)
+        return traffic
+
+    def to_state(self, days=None):
+        """Gözlenmiş son `days` günün (varsayılan required_days) işlem sayıları, uzun format
+        (eksik hücreler yazılmaz)."""
+        days = required_days(self.spec) if days is None else days
+        lo = max(0, self.observed_days - days)
+        block = self.values[lo:self.observed_days]
+        d, s = np.nonzero(~np.isnan(block))
+        return pd.DataFrame({
+            "date": self.dates[lo:self.observed_days][d],
+            "store_nbr": self.store_nbr[s],
+            "transactions": block[d, s],
+        })
+
+    # --- İndeks çözümleme ---
+    def date_positions(self, dates):
+        pos = (np.asarray(dates, dtype="datetime64[D]") - self.start).astype(np.int64)
+        if len(pos) and (pos.min() < 0 or pos.max() >= self.n_days):
+            raise ValueError(f"Tarihler trafik indeksinin dışında ({self.dates[0].date()} ~ {self.dates[-1].date()})")
+        return pos
+
+    def store_positions(self, store_nbr):
+        store_nbr = np.asarray(store_nbr, dtype=np.int64)
+        pos = np.full(len(store_nbr), -1, dtype=np.int64)
+        known = (store_nbr >= 0) & (store_nbr < len(self._store_pos))
+        pos[known] = self._store_pos[store_nbr[known]]
+        if (pos < 0).any():
+            raise ValueError(f"stores.csv'de olmayan mağazalar: {sorted(set(store_nbr[pos < 0].tolist()))}")
+        return pos
+
+    # --- İleri taşıma ---
+    def extend(self, end):
+        """Ekseni `end` gününe kadar uzatır; yeni günler bir hafta önceki değerle doldurulur."""
+        extra = (np.datetime64(pd.Timestamp(end).date(), "D") - self.start).astype(np.int64) + 1 - self.n_days
+        if extra <= 0:
+            return self
+        self.values = np.concatenate([self.values, np.full((extra, len(self.store_nbr)), np.nan)])
+        for d in range(self.n_days - extra, self.n_days):
+            if d >= 7:
+                self.values[d] = self.values[d - 7]
+        return self
+
+    # --- Özellikler ---
+    def _compute(self, lo, hi):
+        """[lo, hi) günlerinin özellik matrisleri; yalnızca pencerelerdeki günler okunur."""
+        need = required_days(self.spec)
+        pad = max(0, need - lo)
+        block = np.concatenate([np.full((pad, len(self.store_nbr)), np.nan), self.values[max(0, lo - need):hi]])
+        n = hi - lo
+        out = {}
+        for name, (stat, window) in self.spec.items():
+            if stat == "lag":
+                out[name] = block[need - window:need - window + n]
+            elif stat == "mean":
+                end = need - TRAFFIC_LAG                     # pencerenin son günü: t - TRAFFIC_LAG
+                view = sliding_window_view(block, window, axis=0)[end - window + 1:end - window + 1 + n]
+                seen = ~np.isnan(view)
+                count = seen.sum(axis=2)
+                total = np.where(seen, view, 0.0).sum(axis=2)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    out[name] = np.where(count > 0, total / count, np.nan)
+            else:
+                raise ValueError(f"Bilinmeyen trafik istatistiği: {stat} (geçerli: 'lag', 'mean')")
+        return out
+
+    def features(self):
+        """{özellik adı: (gün × mağaza) float32 matris (özellik deposundaki tip)}; eksikler 0.
+        Yeni günler için artımlı hesaplanır."""
+        done = len(next(iter(self._features.values())))
+        if done < self.n_days:
+            for name, values in self._compute(done, self.n_days).items():
+                self._features[name] = np.concatenate([self._features[name], np.nan_to_num(values, nan=0.0).astype(np.float32)])
+        return self._features
+
+    def lookup(self, dates, store_nbr):
+        """Her (tarih, mağaza) satırı için trafik özelliklerini döndürür (sözlük)."""
+        d, s = self.date_positions(dates), self.store_positions(store_nbr)
+        return {name: matrix[d, s] for name, matrix in self.features().items()}
+
+
+def save_traffic_state(traffic, store_dir, last_date):
+    """Tahmin için gereken son günleri yazar; `last_date` özellik deposunun son günüdür."""
+    path = os.path.join(store_dir, TRAFFIC_STATE_FILE)
+    state = traffic.to_state()
+    state = state[state["date"] <= pd.Timestamp(last_date)]
+    state.to_parquet(path, index=False)
+    return path
+
+
+def uses_traffic(features):
+    """Özellik listesi trafik özelliklerini içeriyor mu; içermeyen (eski) modellerde durum hiç okunmaz."""
+    return any(name in TRAFFIC_SPEC for name in features)
+
+
+def load_traffic_state(store_dir, stores, last_date):
+    """Kayıtlı durumdan `last_date` sonrasını tahmin etmeye hazır StoreTraffic kurar."""
+    path = os.path.join(store_dir, TRAFFIC_STATE_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Trafik durumu bulunamadı: {path} (önce feature_engineering.py çalıştırılmalı)")
+    state = pd.read_parquet(path)
+    last_date = pd.Timestamp(last_date)
+    return StoreTraffic.build(state, stores, start=last_date + pd.Timedelta(days=1), end=last_date)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+ Test Seti Skorlama ve Submission (data/test.csv → outputs/submission.csv)
+ Amaç:
+- data/test.csv'yi parça parça okuyup her satırı (tahmin günü, seri) hücresine yerleştirmek;
+  gerçek `onpromotion` değerleri gün × seri kampanya matrisine yazılır (PROMO_SCENARIO varsayımı yok)
+- Seri evreni test.csv'deki mağaza×ürün çiftleridir; başlangıç durumu seri × gün panelinin
+  (sales_panel.py) son günlerinden, tatil/petrol takvim indeksinden, trafik kayıtlı trafik durumundan gelir
+- Özellik deposunun son gününden test.csv'nin son gününe kadar iteratif tahmin (gün başına tek
+  predict; --jobs ile sharded_forecast.py)
+- Çıktı: sample_submission.csv'deki id sırasıyla `id,sales` (outputs/submission.csv)
+
+Test günleri özellik deposunun son gününden hemen sonra başlamıyorsa aradaki günler de tahmin
+edilir (kampanya 0) ama dosyaya yazılmaz. Negatif tahminler 0'a kırpılır (satış negatif olamaz;
+RMSLE negatif değer kabul etmez). Satış lag'leri ve rolling ortalama her gün
+forecast_engine.recursive_features'tan gelir (eğitimle aynı gerçek t-7/t-14 tanımı); ilk 7 test
+günü lag_7'yi gözlenmiş satıştan, sonrakiler kendi tahminlerinden okur.
+
+Kullanım:
+    python src/submission.py
+    python src/submission.py --test data/test.csv --output outputs/submission.csv --jobs 4
+"""
+
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from feature_store import FEATURE_STORE_DIR
+from sales_panel import open_panel
+from calendar_index import CalendarIndex
+from forecast_engine import exog_steps, forecast_recursive
+from sharded_forecast import forecast_sharded
+from model_bundle import BEST_MODEL_BUNDLE, BEST_MODEL_JOBLIB, load_best_model, model_features
+from instrumentation import RunReport
+from store_traffic import TRAFFIC_FEATURES, load_traffic_state, uses_traffic
+
+DATA_DIR = "data"
+OUT_DIR = "outputs"
+best_model_path = BEST_MODEL_JOBLIB    # Model paketi (outputs/best_model) yoksa
+test_path = os.path.join(DATA_DIR, "test.csv")
+sample_path = os.path.join(DATA_DIR, "sample_submission.csv")
+holidays_path = os.path.join(DATA_DIR, "holidays_events.csv")
+stores_path = os.path.join(DATA_DIR, "stores.csv")
+oil_path = os.path.join(DATA_DIR, "oil.csv")
+output_path = os.path.join(OUT_DIR, "submission.csv")
+
+HISTORY_DAYS = 30          # Başlangıç durumu için okunan son gün sayısı
+OIL_FFILL = True           # Bilinmeyen günlerde son bilinen petrol fiyatı
+CHUNK_ROWS = 100_000       # test.csv parça boyutu
+INFERENCE_BACKEND = "flat"  # Model paketindeki mmap ağaç dizileri (sklearn/lightgbm yüklenmez); "lightgbm": model.txt
+
+FEATURES = [               # Eğitim sırası (model_tuning.py); model yüklenirken doğrulanır, trafik özellikleri isteğe bağlı
+    "store_nbr", "onpromotion", "year", "month", "day", "day_of_week",
+    "is_holiday", "dcoilwtico", "rolling_sales_mean_7",
+    "sales_lag_7", "sales_lag_14", "is_weekend", "family_encoded"
+] + TRAFFIC_FEATURES
+
+
+def series_table(pairs, families):
+    """(store_nbr, aile kodu) → seri sırası tablosu; bilinmeyen çiftler -1."""
+    codes = pd.Categorical(pairs["family"], categories=families).codes
+    table = np.full((int(pairs["store_nbr"].max()) + 1, len(families)), -1, dtype=np.int64)
+    table[pairs["store_nbr"].to_numpy(dtype=np.int64), codes] = np.arange(len(pairs))
+    return table
+
+
+def read_test(path, start_date, table, families, chunk_rows=CHUNK_ROWS):
+    """test.csv'yi parça parça okur; satır başına (id, gün, seri, kampanya) tamsayı dizileri.
+
+    Gün, `start_date`ten (ilk tahmin günü) itibaren sıradır. Özellik deposunda geçmişi
+    olmayan çiftler ya da tahmin başlangıcından önceki tarihler hata verir.
+    """
+    parts = []
+    for chunk in pd.read_csv(path, chunksize=chunk_rows, parse_dates=["date"],
+                             dtype={"id": "int64", "store_nbr": "int64", "onpromotion": "int64"}):
+        day = (chunk["date"] - start_date).dt.days.to_numpy()
+        if (day < 0).any():
+            raise ValueError(f"test.csv tahmin başlangıcından ({start_date.date()}) önceki tarihler içeriyor: "
+                             f"{chunk['date'][day < 0].min().date()}")
+        store = chunk["store_nbr"].to_numpy()
+        fam = pd.Categorical(chunk["family"], categories=families).codes.astype(np.int64)
+        series = np.full(len(chunk), -1, dtype=np.int64)
+        known = (fam >= 0) & (store >= 0) & (store < table.shape[0])
+        series[known] = table[store[known], fam[known]]
+        if (series < 0).any():
+            bad = chunk.loc[series < 0, ["store_nbr", "family"]].drop_duplicates().head(5)
+            raise ValueError(f"Özellik deposunda geçmişi olmayan mağaza×ürün çiftleri: {bad.values.tolist()}")
+        parts.append((chunk["id"].to_numpy(), day, series, chunk["onpromotion"].to_numpy()))
+    ids, day, series, promo = (np.concatenate(a) for a in zip(*parts))
+    return ids, day, series, promo
+
+
+def score_test(test_file=test_path, model_path=best_model_path, store_dir=FEATURE_STORE_DIR, n_jobs=1, run=None,
+               bundle_dir=BEST_MODEL_BUNDLE):
+    """test.csv satırlarını tahmin eder; test.csv sırasıyla (id, sales) DataFrame döndürür."""
+    run = run or RunReport("submission", autosave=False)
+    with run.step("load_model"):
+        model = load_best_model(FEATURES, INFERENCE_BACKEND, bundle_dir=bundle_dir, joblib_path=model_path,
+                                optional=TRAFFIC_FEATURES)
+        features = model_features(model)
+
+    with run.step("load_history") as step:
+        panel = open_panel(store_dir)
+        last_date = panel.dates[-1]
+        active = panel.active_series(HISTORY_DAYS + 1)
+        pairs = panel.pairs.iloc[active].reset_index(drop=True)
+        families = np.sort(pairs["family"].unique())
+        step.rows = len(active)
+
+    start_date = last_date + pd.Timedelta(days=1)
+    with run.step("read_test") as step:
+        ids, day, series, promo_rows = read_test(test_file, start_date, series_table(pairs, families), families)
+        step.rows = len(ids)
+    cell = day * len(pairs) + series
+    if len(np.unique(cell)) != len(cell):
+        raise ValueError("test.csv aynı (tarih, mağaza, ürün) için birden fazla satır içeriyor.")
+
+    # Yalnızca test.csv'de geçen seriler tahmin edilir (seri sırası korunur)
+    used, series = np.unique(series, return_inverse=True)
+    pairs = pairs.iloc[used].reset_index(drop=True)
+    active = active[used]
+    dates = pd.date_range(start_date, periods=int(day.max()) + 1, freq="D")
+    promo = np.zeros((len(dates), len(pairs)), dtype=np.int64)
+    promo[day, series] = promo_rows
+
+    with run.step("prepare_state") as step:
+        buf = panel.ring_buffer(active, days=HISTORY_DAYS + 1)
+        stores = pd.read_csv(stores_path)
+        calendar = CalendarIndex.build(
+            stores,
+            pd.read_csv(oil_path, parse_dates=["date"]),
+            pd.read_csv(holidays_path, parse_dates=["date"]),
+            end=dates[-1],
+        )
+        traffic = load_traffic_state(store_dir, stores, last_date) if uses_traffic(features) else None
+        steps = exog_steps(
+            calendar, dates,
+            store_nbr=pairs["store_nbr"].to_numpy(dtype=np.int64),
+            family_encoded=pairs["family_encoded"].to_numpy(dtype=np.int64),
+            onpromotion=promo,
+            oil_ffill=OIL_FFILL,
+            traffic=traffic,
+        )
+        step.rows = len(pairs)
+
+    print(f"Test skorlama: {len(ids)} satır, {len(pairs)} seri × {len(dates)} gün "
+          f"({dates[0].date()} ~ {dates[-1].date()})")
+    with run.step("forecast_loop", rows=len(pairs) * len(dates)):
+        if n_jobs == 1:
+            preds = forecast_recursive(model, buf, steps, features)
+        else:
+            preds = forecast_sharded(model, buf, steps, features, n_jobs=n_jobs)
+    return pd.DataFrame({"id": ids, "sales": np.clip(preds[day, series], 0.0, None)})
+
+
+def align_submission(scored, sample_file=sample_path):
+    """Tahminleri sample_submission.csv'deki id sırasına dizer; eksik id hata verir."""
+    sample = pd.read_csv(sample_file, usecols=["id"], dtype={"id": "int64"})
+    pos = pd.Index(scored["id"]).get_indexer(sample["id"])
+    if (pos < 0).any():
+        missing = sample["id"][pos < 0]
+        raise ValueError(f"test.csv'de olmayan {len(missing)} submission id'si (ilk: {missing.iloc[0]})")
+    return pd.DataFrame({"id": sample["id"].to_numpy(), "sales": scored["sales"].to_numpy()[pos]})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="test.csv skorlama ve submission dosyası")
+    parser.add_argument("--test", default=test_path)
+    parser.add_argument("--sample", default=sample_path, help="id sırası için sample_submission.csv")
+    parser.add_argument("--output", default=output_path)
+    parser.add_argument("--jobs", type=int, default=1, help="Süreç sayısı (0: tüm çekirdekler)")
+    args = parser.parse_args()
+
+    run = RunReport("submission")
+    scored = score_test(args.test, n_jobs=args.jobs or None, run=run)
+    with run.step("write_csv", rows=len(scored)):
+        submission = align_submission(scored, args.sample)
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        submission.to_csv(args.output, index=False)
+    print(f" Submission kaydedildi: {args.output} ({len(submission)} satır, "
+          f"toplam tahmin {submission['sales'].sum():,.0f})")
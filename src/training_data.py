@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+ Bellek Dışı Eğitim Verisi (Out-of-core LightGBM Dataset)
+ Amaç:
+- Özellik deposunu parça parça okuyarak (lightgbm.Sequence) LightGBM ikili Dataset'ini bir kez kurmak
+  ve diske kaydetmek (outputs/training_dataset.bin); tüm tablo hiçbir zaman pandas'a alınmaz
+- Depo ve özellik listesi değişmedikçe sonraki eğitim/tuning çalıştırmalarında ikili dosyayı
+  yeniden kullanmak (yan dosya: training_dataset.json, tarih dizisi: training_dataset.dates.npy)
+- Train/test/kat bölmelerini Dataset.subset ile yapmak (X/y kopyaları ve medyan doldurma yok;
+  eksik değerler LightGBM'in kendi eksik değer yönetimine bırakılır)
+- Bin sınırlarını yalnızca eğitim satırlarından belirlemek: `train_rows` verilirse bu satırlardan
+  alınan örnekle bir referans Dataset kurulur ve tüm satırlar onun sınırlarıyla binlenir
+  (test satırları sınırları etkilemez; raporlanan test metriklerine sızıntı olmaz)
+- Test satırlarının tahminini ve metriklerini yine parça parça hesaplamak
+"""
+
+import os
+import json
+import hashlib
+
+import numpy as np
+import pyarrow.parquet as pq
+import lightgbm as lgb
+
+from feature_store import FEATURE_STORE_DIR, iter_features, partition_files
+from tuning_cache import feature_store_fingerprint
+
+OUT_DIR = "outputs"
+TRAINING_DATASET_PATH = os.path.join(OUT_DIR, "training_dataset.bin")
+CHUNK_ROWS = 500_000                   # Dataset'e tek seferde itilen / tahmin edilen satır sayısı
+DATASET_PARAMS = {"max_bin": 255, "verbose": -1}
+BIN_SAMPLE_ROWS = 200_000              # Bin sınırları için örnek (LightGBM bin_construct_sample_cnt varsayılanı)
+
+
+class ParquetSequence(lgb.Sequence):
+    """Bir yıl dosyasının özellik kolonlarına satır grubu (row group) bazlı erişim.
+
+    LightGBM önce artan sırada örnek satırlar, sonra ardışık parçalar ister;
+    bellekte aynı anda yalnızca bir satır grubu açık tutulur.
+    """
+
+    def __init__(self, path, features, batch_size=CHUNK_ROWS):
+        self.file = pq.ParquetFile(path, memory_map=True)
+        self.features = list(features)
+        self.batch_size = batch_size
+        meta = self.file.metadata
+        self.starts = np.cumsum([0] + [meta.row_group(i).num_rows for i in range(meta.num_row_groups)])
+        self._group_id, self._group = None, None
+
+    def __len__(self):
+        return int(self.starts[-1])
+
+    def _row_group(self, g):
+        if g != self._group_id:
+            table = self.file.read_row_group(g, columns=self.features)
+            self._group = np.column_stack([table.column(c).to_numpy().astype(np.float64) for c in self.features])
+            self._group_id = g
+        return self._group
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, _ = idx.indices(len(self))
+            parts = []
+            while start < stop:
+                g = int(np.searchsorted(self.starts, start, side="right")) - 1
+                end = min(stop, int(self.starts[g + 1]))
+                parts.append(self._row_group(g)[start - self.starts[g]:end - self.starts[g]])
+                start = end
+            return np.concatenate(parts) if len(parts) > 1 else parts[0]
+        g = int(np.searchsorted(self.starts, idx, side="right")) - 1
+        return self._row_group(g)[idx - self.starts[g]]
+
+
+class TrainingData:
+    """Diskteki ikili Dataset ve ona eşlik eden satır tarihleri."""
+
+    def __init__(self, path, meta, dates):
+        self.path = path
+        self.meta = meta
+        self.dates = dates
+
+    @property
+    def n_rows(self):
+        return len(self.dates)
+
+    def dataset(self):
+        return lgb.Dataset(self.path, params={"verbose": -1}).construct()
+
+
+def _sidecar_paths(bin_path):
+    base = os.path.splitext(bin_path)[0]
+    return base + ".json", base + ".dates.npy"
+
+
+def _read_rows(seqs, rows):
+    """Artan sıralı global satır numaralarının özellik matrisini yıl dosyalarından okur."""
+    parts, offset = [], 0
+    for seq in seqs:
+        local = rows[(rows >= offset) & (rows < offset + len(seq))] - offset
+        groups = np.searchsorted(seq.starts, local, side="right") - 1
+        for g in np.unique(groups):
+            parts.append(seq._row_group(int(g))[local[groups == g] - seq.starts[g]])
+        offset += len(seq)
+    return np.concatenate(parts)
+
+
+def _bin_reference(seqs, rows, features, params, seed=0):
+    """Eğitim satırlarından (en fazla BIN_SAMPLE_ROWS örnek) bin sınırlarını belirleyen referans Dataset."""
+    if len(rows) > BIN_SAMPLE_ROWS:
+        rows = np.sort(np.random.default_rng(seed).choice(rows, BIN_SAMPLE_ROWS, replace=False))
+    sample = _read_rows(seqs, np.asarray(rows, dtype=np.int64))
+    return lgb.Dataset(sample, feature_name=list(features), params=dict(params)).construct()
+
+
+def build_training_dataset(features, target="sales", bin_path=TRAINING_DATASET_PATH,
+                           store_dir=FEATURE_STORE_DIR, params=DATASET_PARAMS, train_rows=None, rebuild=False):
+    """İkili Dataset'i (gerekirse) parça parça kurar; aynı depo/özellik/parametre için diskteki dosyayı kullanır.
+
+    `train_rows`: tarih dizisinden eğitim satırlarının (artan) indekslerini üreten fonksiyon; verilirse
+    bin sınırları yalnızca bu satırlardan belirlenir. Verilmezse LightGBM tüm satırlardan örnekler.
+    """
+    files = partition_files(store_dir)
+    if not files:
+        raise FileNotFoundError(f"Bulunamadı: {store_dir} (önce feature_engineering.py çalıştırılmalı)")
+
+    meta_path, dates_path = _sidecar_paths(bin_path)
+    meta = {
+        "fingerprint": feature_store_fingerprint(store_dir),
+        "features": list(features),
+        "target": target,
+        "params": params,
+    }
+    rows_digest = lambda rows: None if rows is None else hashlib.sha256(np.asarray(rows, dtype=np.int64).tobytes()).hexdigest()
+    if not rebuild and all(os.path.exists(p) for p in (bin_path, meta_path, dates_path)):
+        with open(meta_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        dates = np.load(dates_path)
+        meta["bin_rows"] = rows_digest(train_rows(dates) if train_rows else None)
+        if {k: saved.get(k) for k in meta} == meta:
+            print(f" İkili Dataset yeniden kullanılıyor: {bin_path} ({saved['n_rows']} satır)")
+            return TrainingData(bin_path, saved, dates)
+
+    # Hedef ve tarih kolonları küçük: yıl dosyası başına tek okuma
+    labels, dates = [], []
+    for path in files:
+        table = pq.read_table(path, columns=[target, "date"], memory_map=True)
+        labels.append(table.column(target).to_numpy().astype(np.float64))
+        dates.append(table.column("date").to_numpy().astype("datetime64[D]"))
+    label, dates = np.concatenate(labels), np.concatenate(dates)
+    if (np.diff(dates.astype(np.int64)) < 0).any():
+        raise ValueError("Özellik deposu tarih sıralı değil; zaman sıralı bölmeler için feature_engineering.py yeniden çalıştırılmalı.")
+
+    print(f" İkili Dataset parça parça kuruluyor: {len(files)} yıl dosyası, {len(label)} satır...")
+    seqs = [ParquetSequence(path, features) for path in files]
+    os.makedirs(os.path.dirname(bin_path) or ".", exist_ok=True)
+    for p in (bin_path, meta_path, dates_path):
+        if os.path.exists(p):
+            os.remove(p)
+    rows = train_rows(dates) if train_rows else None
+    meta["bin_rows"] = rows_digest(rows)
+    reference = None if rows is None else _bin_reference(seqs, rows, features, params)
+    lgb.Dataset(seqs, label=label, feature_name=list(features), params=dict(params),
+                reference=reference).construct().save_binary(bin_path)
+
+    np.save(dates_path, dates)
+    meta["n_rows"] = int(len(label))
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return TrainingData(bin_path, meta, dates)
+
+
+def booster_params(params):
+    """LGBMRegressor parametrelerini lgb.train karşılıklarına çevirir; (parametreler, tur sayısı)."""
+    params = dict(params)
+    rounds = params.pop("n_estimators", 100)
+    if "random_state" in params:
+        params["seed"] = params.pop("random_state")
+    return {"objective": "regression", "verbose": -1, **params}, rounds
+
+
+def predict_rows(model, features, target, select, store_dir=FEATURE_STORE_DIR, batch_size=CHUNK_ROWS):
+    """`select` (satır başına bool) ile seçilen satırlar için (y_true, y_pred); depo parça parça okunur."""
+    y_true, y_pred, offset = [], [], 0
+    for chunk in iter_features(columns=list(features) + [target], batch_size=batch_size, store_dir=store_dir):
+        mask = select[offset:offset + len(chunk)]
+        offset += len(chunk)
+        if mask.any():
+            rows = chunk[mask]
+            y_true.append(rows[target].to_numpy(dtype=np.float64))
+            y_pred.append(model.predict(rows[list(features)]))
+    return np.concatenate(y_true), np.concatenate(y_pred)
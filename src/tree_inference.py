@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+ Düz Dizi Ağaç Çıkarımı (Flat Tree Inference)
+ Amaç:
+- best_model.joblib içindeki LightGBM ağaçlarını düz NumPy dizilerine aktarmak
+  (özellik, eşik, sol/sağ çocuk, varsayılan yön, eksik değer tipi, yaprak değeri)
+- Ağaçları doğrudan ardışık (contiguous) float32/float64 özellik matrisleri üzerinde,
+  satırlar arasında çok thread'li olarak değerlendirmek
+- Küçük toplu tahminlerde LGBMRegressor.predict'in DataFrame dönüştürme ve
+  özellik adı doğrulama yükünden kaçınmak
+
+numba kuruluysa derlenmiş (njit, paralel) çekirdek kullanılır; değilse aynı kuralları
+uygulayan seviye bazlı NumPy çekirdeğine geri düşülür (küçük toplular için uygundur).
+Karar kuralları LightGBM'in NumericalDecision mantığıyla aynıdır (LightGBM'in girdiyi okurken
+|x| <= kZeroThreshold değerlerini 0 kabul etmesi dahil); aynı girdi tipinde
+sonuçlar model.predict ile birebir eşittir.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+_MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+K_ZERO_THRESHOLD = float(np.float32(1e-35))     # LightGBM kZeroThreshold (float)
+IDENTITY_OBJECTIVES = ("regression", "regression_l2", "l2", "mean_squared_error", "mse", "huber", "fair", "regression_l1", "l1", "quantile")
+
+_numba_kernel = None
+
+
+def _get_numba_kernel():
+    """numba varsa derlenmiş çekirdeği bir kez oluşturur; yoksa None."""
+    global _numba_kernel
+    if _numba_kernel is not None:
+        return _numba_kernel
+    try:
+        from numba import config, njit, prange
+    except ImportError:
+        return None
+    if "NUMBA_THREADING_LAYER" not in os.environ and "NUMBA_THREADING_LAYER_PRIORITY" not in os.environ:
+        # LightGBM zaten OpenMP yükler; tbb katmanı servis thread'inden çağrıldığında kilitlenebiliyor
+        config.THREADING_LAYER_PRIORITY = ["omp", "workqueue", "tbb"]
+
+    @njit(parallel=True, cache=True)
+    def kernel(X, feature, threshold, left, right, default_left, missing_type, value, roots, out):
+        for i in prange(X.shape[0]):
+            acc = 0.0
+            for t in range(roots.shape[0]):
+                node = roots[t]
+                while feature[node] >= 0:
+                    fval = np.float64(X[i, feature[node]])
+                    mt = missing_type[node]
+                    if np.isnan(fval):
+                        if mt != MISSING_NAN:
+                            fval = 0.0
+                    elif fval >= -K_ZERO_THRESHOLD and fval <= K_ZERO_THRESHOLD:
+                        fval = 0.0
+                    if (mt == MISSING_ZERO and fval >= -K_ZERO_THRESHOLD and fval <= K_ZERO_THRESHOLD) or (mt == MISSING_NAN and np.isnan(fval)):
+                        node = left[node] if default_left[node] else right[node]
+                    elif fval <= threshold[node]:
+                        node = left[node]
+                    else:
+                        node = right[node]
+                acc += value[node]
+            out[i] = acc
+
+    _numba_kernel = kernel
+    return kernel
+
+
+class FlatForest:
+    """LightGBM ağaçlarının düz dizi gösterimi.
+
+    Tüm ağaçların düğümleri tek dizilerde tutulur; `feature < 0` olan düğümler yapraktır.
+    `roots[t]`, t. ağacın kök düğümünün global numarasıdır.
+    """
+
+    ARRAYS = ("feature", "threshold", "left", "right", "default_left", "missing_type", "value", "roots")
+
+    def __init__(self, feature, threshold, left, right, default_left, missing_type, value, roots,
+                 feature_names, dtype=np.float32, n_threads=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.default_left = np.ascontiguousarray(default_left, dtype=np.bool_)
+        self.missing_type = np.ascontiguousarray(missing_type, dtype=np.int8)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.feature_names = list(feature_names)
+        self.dtype = np.dtype(dtype)
+        self.n_threads = n_threads or os.cpu_count() or 1
+
+    # --- Dönüştürme ---
+    @classmethod
+    def from_booster(cls, booster, **kwargs):
+        dump = booster.dump_model(num_iteration=booster.best_iteration if booster.best_iteration > 0 else None)
+        objective = str(dump.get("objective", "regression")).split()[0]
+        if objective not in IDENTITY_OBJECTIVES:
+            raise NotImplementedError(f"Desteklenmeyen amaç fonksiyonu: {objective} (yalnızca doğrusal çıktılı regresyon)")
+        if dump.get("num_class", 1) != 1:
+            raise NotImplementedError("Çok sınıflı modeller desteklenmiyor.")
+
+        cols = {name: [] for name in cls.ARRAYS if name != "roots"}
+        roots = []
+
+        def add(node):
+            idx = len(cols["feature"])
+            for name in cols:
+                cols[name].append(0)
+            if "leaf_value" in node and "split_index" not in node:
+                cols["feature"][idx] = -1
+                cols["value"][idx] = node["leaf_value"]
+                return idx
+            if node.get("decision_type", "<=") != "<=":
+                raise NotImplementedError("Kategorik bölünmeler desteklenmiyor.")
+            cols["feature"][idx] = node["split_feature"]
+            cols["threshold"][idx] = node["threshold"]
+            cols["default_left"][idx] = bool(node["default_left"])
+            cols["missing_type"][idx] = _MISSING_TYPES[node["missing_type"]]
+            cols["left"][idx] = add(node["left_child"])
+            cols["right"][idx] = add(node["right_child"])
+            return idx
+
+        for tree in dump["tree_info"]:
+            if tree.get("is_linear", False):
+                raise NotImplementedError("Doğrusal ağaçlar (linear_tree) desteklenmiyor.")
+            roots.append(add(tree["tree_structure"]))
+
+        return cls(**{name: np.asarray(vals) for name, vals in cols.items()}, roots=np.asarray(roots),
+                   feature_names=dump["feature_names"], **kwargs)
+
+    @classmethod
+    def from_model(cls, model, **kwargs):
+        """LGBMRegressor veya lightgbm.Booster nesnesinden dönüştürür."""
+        booster = model.booster_ if hasattr(model, "booster_") else model
+        return cls.from_booster(booster, **kwargs)
+
+    # --- Kalıcı saklama ---
+    def save(self, path):
+        np.savez(path, feature_names=np.asarray(self.feature_names), **{name: getattr(self, name) for name in self.ARRAYS})
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in cls.ARRAYS}
+            names = [str(n) for n in data["feature_names"]]
+        return cls(**arrays, feature_names=names, **kwargs)
+
+    def save_arrays(self, directory):
+        """Her diziyi ayrı .npy olarak yazar; `load_arrays(mmap_mode="r")` ile süreçler arasında
+        kopyalanmadan (bellek eşlemeli) paylaşılabilir."""
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        np.save(os.path.join(directory, "feature_names.npy"), np.asarray(self.feature_names))
+
+    @classmethod
+    def load_arrays(cls, directory, mmap_mode="r", **kwargs):
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in cls.ARRAYS}
+        names = [str(n) for n in np.load(os.path.join(directory, "feature_names.npy"))]
+        return cls(**arrays, feature_names=names, **kwargs)
+
+    # --- Tahmin ---
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def as_matrix(self, X):
+        """DataFrame/ndarray'i ardışık matrise çevirir.
+
+        LGBMRegressor.predict gibi sütunlar konumlarına göre eşlenir (isimle yeniden sıralanmaz);
+        böylece çağıran kod model.predict yerine doğrudan bu sınıfı kullanabilir.
+        """
+        if hasattr(X, "columns"):
+            X = X.to_numpy(dtype=self.dtype)
+        return np.ascontiguousarray(X)
+
+    def _predict_numpy(self, X):
+        """Seviye bazlı vektörel değerlendirme: her adımda tüm aktif (satır, ağaç) çiftleri ilerler."""
+        n = X.shape[0]
+        out = np.zeros(n, dtype=np.float64)
+        for t in range(self.n_trees):
+            node = np.full(n, self.roots[t], dtype=np.int64)
+            active = np.nonzero(self.feature[node] >= 0)[0]
+            while len(active):
+                nd = node[active]
+                fval = X[active, self.feature[nd]].astype(np.float64)
+                mt = self.missing_type[nd]
+                isnan = np.isnan(fval)
+                fval = np.where((isnan & (mt != MISSING_NAN)) | (np.abs(fval) <= K_ZERO_THRESHOLD), 0.0, fval)
+                use_default = ((mt == MISSING_ZERO) & (np.abs(fval) <= K_ZERO_THRESHOLD)) | ((mt == MISSING_NAN) & isnan)
+                go_left = np.where(use_default, self.default_left[nd], fval <= self.threshold[nd])
+                node[active] = np.where(go_left, self.left[nd], self.right[nd])
+                active = active[self.feature[node[active]] >= 0]
+            out += self.value[node]   # ağaçlar sırayla toplanır (LightGBM ile aynı sıra)
+        return out
+
+    def predict(self, X, backend="auto"):
+        """(n_rows × n_features) matris veya DataFrame için tahmin.
+
+        backend: "auto" (numba varsa derlenmiş), "numba" ya da "numpy".
+        """
+        X = self.as_matrix(X)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Beklenen özellik sayısı {len(self.feature_names)}, gelen {X.shape}")
+
+        kernel = _get_numba_kernel() if backend in ("auto", "numba") else None
+        if kernel is not None:
+            from numba import set_num_threads
+            set_num_threads(max(1, min(self.n_threads, X.shape[0])))
+            out = np.empty(X.shape[0], dtype=np.float64)
+            kernel(X, self.feature, self.threshold, self.left, self.right, self.default_left,
+                   self.missing_type, self.value, self.roots, out)
+            return out
+        if backend == "numba":
+            raise ImportError("numba kurulu değil; backend='numpy' kullanın.")
+
+        # NumPy çekirdeği: büyük toplularda satır parçaları thread havuzunda işlenir
+        if X.shape[0] < 4096 or self.n_threads == 1:
+            return self._predict_numpy(X)
+        chunks = np.array_split(np.arange(X.shape[0]), self.n_threads)
+        with ThreadPoolExecutor(self.n_threads) as pool:
+            parts = list(pool.map(lambda idx: self._predict_numpy(X[idx[0]:idx[-1] + 1]), chunks))
+        return np.concatenate(parts)
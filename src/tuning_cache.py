@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+ Tuning Deneme Önbelleği (Persistent Trial Cache)
+ Amaç:
+- Her tuning denemesinin kat skorlarını ve (tam bütçeli denemelerde) eğitilmiş model
+  dosyasının yolunu diskte saklamak
+- Anahtar: (özellik deposu özeti, özellik listesi, kat tanımı, parametre seti);
+  ızgaraya tek bir yeni değer eklendiğinde yalnızca yeni kombinasyonlar eğitilir
+- model_tuning_fast.py'nin en iyi parametreleri sabit bir sözlük yerine buradan okuması
+- Boyut sınırı aşıldığında en eski kullanılan denemeleri silmek (LRU)
+"""
+
+import os
+import json
+import glob
+import time
+import hashlib
+
+from feature_store import FEATURE_STORE_DIR, partition_files
+
+CACHE_DIR = os.path.join("outputs", "tuning_cache")
+MAX_CACHE_BYTES = 2 * 1024 ** 3      # 2 GB; aşılırsa en eski kullanılan denemeler silinir
+BEST_PARAMS_TXT = os.path.join("outputs", "best_params_lightgbm.txt")
+
+
+def feature_store_fingerprint(store_dir=FEATURE_STORE_DIR):
+    """Özellik deposundaki yıl dosyalarının içeriğinden SHA-256 özeti."""
+    h = hashlib.sha256()
+    for path in partition_files(store_dir):
+        h.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+def trial_key(fingerprint, features, folds, params):
+    payload = json.dumps(
+        {"fingerprint": fingerprint, "features": list(features),
+         "folds": [list(map(int, f)) for f in folds], "params": params},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TrialCache:
+    """Deneme başına bir JSON kaydı (<key>.json) ve isteğe bağlı model dosyası (models/<key>.txt)."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(cache_dir, "models"), exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def model_path(self, key):
+        return os.path.join(self.cache_dir, "models", f"{key}.txt")
+
+    def get(self, key):
+        path = self._entry_path(key)
+        if not os.path.exists(path):
+            return None
+        os.utime(path)     # LRU için son kullanım zamanı
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def put(self, key, fingerprint, features, folds, params, fold_scores, full_budget, model_path=None):
+        entry = {
+            "key": key,
+            "fingerprint": fingerprint,
+            "features": list(features),
+            "folds": [list(map(int, f)) for f in folds],
+            "params": params,
+            "fold_scores": [float(s) for s in fold_scores],
+            "mean_score": float(sum(fold_scores) / len(fold_scores)),
+            "full_budget": bool(full_budget),
+            "model_path": model_path if model_path and os.path.exists(model_path) else None,
+            "created": time.time(),
+        }
+        tmp = self._entry_path(key) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp, self._entry_path(key))
+        return entry
+
+    def entries(self):
+        for path in glob.glob(os.path.join(self.cache_dir, "*.json")):
+            with open(path, encoding="utf-8") as f:
+                yield json.load(f)
+
+    def best_params(self, fingerprint, features):
+        """Aynı veri ve özelliklerle tam bütçede değerlendirilmiş en iyi parametreler (yoksa None)."""
+        best = None
+        for entry in self.entries():
+            if entry["fingerprint"] != fingerprint or entry["features"] != list(features) or not entry["full_budget"]:
+                continue
+            if best is None or entry["mean_score"] < best["mean_score"]:
+                best = entry
+        return best
+
+    def size_bytes(self):
+        return sum(os.path.getsize(p) for p in glob.glob(os.path.join(self.cache_dir, "**", "*"), recursive=True)
+                   if os.path.isfile(p))
+
+    def evict(self):
+        """Toplam boyut sınırın altına inene kadar en eski kullanılan denemeleri siler."""
+        total = self.size_bytes()
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        for path in sorted(glob.glob(os.path.join(self.cache_dir, "*.json")), key=os.path.getmtime):
+            key = os.path.basename(path)[:-len(".json")]
+            for p in (path, self.model_path(key)):
+                if os.path.exists(p):
+                    total -= os.path.getsize(p)
+                    os.remove(p)
+            removed += 1
+            if total <= self.max_bytes:
+                break
+        return removed
+
+
+def read_best_params_txt(path=BEST_PARAMS_TXT):
+    """best_params_lightgbm.txt dosyasındaki parametre satırlarını (boş satıra kadar) okur."""
+    params = {}
+    with open(path, encoding="utf-8") as f:
+        next(f)
+        for line in f:
+            if not line.strip():
+                break
+            key, value = [part.strip() for part in line.split(":", 1)]
+            try:
+                params[key] = int(value)
+            except ValueError:
+                params[key] = float(value)
+    return params
+
+
+def load_tuned_params(features, store_dir=FEATURE_STORE_DIR, cache_dir=CACHE_DIR, txt_path=BEST_PARAMS_TXT):
+    """En iyi LightGBM parametreleri: önce önbellek (aynı veri/özellikler), yoksa best_params_lightgbm.txt.
+
+    random_state 42 olarak sabitlenir.
+    """
+    best_entry = TrialCache(cache_dir).best_params(feature_store_fingerprint(store_dir), features)
+    if best_entry is not None:
+        params = dict(sorted(best_entry["params"]["candidate"].items()))
+        print(f" En iyi parametreler tuning önbelleğinden okundu (CV RMSE: {best_entry['mean_score']:.2f})")
+    elif os.path.exists(txt_path):
+        params = {k: v for k, v in read_best_params_txt(txt_path).items() if k != "random_state"}
+        print(f" Önbellekte kayıt yok, parametreler {txt_path} dosyasından okundu")
+    else:
+        raise FileNotFoundError(f"En iyi parametre bulunamadı: önce model_tuning.py çalıştırılmalı ({txt_path})")
+    params["random_state"] = 42
+    return params
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+ Gruplu Pencere Özellikleri (Grouped Window Features)
+ Amaç:
+- Seri (mağaza×ürün) bazlı rolling mean/std/min/max/sum ve lag özelliklerini
+  tek bir sıralama ile, Python lambda'sı olmadan hesaplamak
+- Veriyi bir kez seri bazında ardışık (contiguous) diziye dizip tüm pencereleri
+  strided (sliding_window_view) çekirdeklerle hesaplamak
+- Yeni bir pencere/lag eklemek için yalnızca WINDOW_SPEC'e bir satır eklemek yeterli
+  (ör. "rolling_sales_mean_28": ("mean", 28), "sales_lag_364": ("lag", 364))
+
+Tüm istatistikler yalnızca penceredeki değerlerden hesaplanır (kayan toplam yok);
+bu nedenle sonuç, serinin daha eski geçmişinden bağımsızdır ve artımlı üretim
+tam üretimle bit düzeyinde aynıdır.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Özellik adı -> (istatistik, pencere). "lag" için pencere gecikme miktarıdır.
+WINDOW_SPEC = {
+    "rolling_sales_mean_7": ("mean", 7),
+    "sales_lag_7": ("lag", 7),
+    "sales_lag_14": ("lag", 14),
+}
+
+ROLLING_STATS = ("mean", "std", "min", "max", "sum")
+LAG_FILL = 0.0             # Yetersiz geçmişte lag değeri; özellik deposu ve iteratif tahmin (forecast_engine.py) aynısını kullanır
+CHUNK_ROWS = 1_000_000     # Pencere matrisleri bu kadar satırlık parçalar halinde işlenir
+
+
+def required_history(spec=WINDOW_SPEC):
+    """Yeni bir satırın özelliklerini hesaplamak için gereken geçmiş satır sayısı."""
+    need = 0
+    for stat, window in spec.values():
+        need = max(need, window if stat == "lag" else window - 1)
+    return need
+
+
+def lag_columns(spec=WINDOW_SPEC):
+    return [name for name, (stat, _) in spec.items() if stat == "lag"]
+
+
+class GroupedLayout:
+    """Değerleri seri bazında ardışık dizen tek seferlik sıralama.
+
+    `order`: orijinal satırların ardışık düzendeki sırası,
+    `pos`: her satırın kendi serisi içindeki konumu (0'dan başlar).
+    Seri içi sıra, orijinal satır sırasıdır (kararlı sıralama).
+    """
+
+    def __init__(self, group_codes):
+        group_codes = np.asarray(group_codes)
+        self.order = np.argsort(group_codes, kind="stable")
+        g = group_codes[self.order]
+        n = len(g)
+        starts = np.r_[True, g[1:] != g[:-1]] if n else np.zeros(0, dtype=bool)
+        self.pos = np.arange(n) - np.maximum.accumulate(np.where(starts, np.arange(n), 0))
+
+    def __len__(self):
+        return len(self.order)
+
+    def scatter(self, contiguous_values):
+        """Ardışık düzende hesaplanan değerleri orijinal satır sırasına geri yazar."""
+        out = np.empty(len(self), dtype=np.float64)
+        out[self.order] = contiguous_values
+        return out
+
+
+def _lag(v, pos, k):
+    out = np.full(len(v), np.nan)
+    ok = pos >= k
+    out[ok] = v[np.nonzero(ok)[0] - k]
+    return out
+
+
+def _rolling(v, pos, window, stat):
+    """min_periods=1 davranışıyla grup içi pencere istatistiği (std için ddof=1)."""
+    n = len(v)
+    padded = np.concatenate([np.zeros(window - 1), v])
+    view = sliding_window_view(padded, window)
+    offsets = np.arange(window)[None, :] - (window - 1)
+    out = np.empty(n, dtype=np.float64)
+
+    for lo in range(0, n, CHUNK_ROWS):
+        hi = min(lo + CHUNK_ROWS, n)
+        win = view[lo:hi]
+        p = pos[lo:hi]
+        valid = (p[:, None] + offsets) >= 0
+        count = np.minimum(p + 1, window)
+
+        if stat in ("mean", "sum", "std"):
+            total = np.where(valid, win, 0.0).sum(axis=1)
+            if stat == "sum":
+                out[lo:hi] = total
+                continue
+            mean = total / count
+            if stat == "mean":
+                out[lo:hi] = mean
+                continue
+            sq = np.where(valid, (win - mean[:, None]) ** 2, 0.0).sum(axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[lo:hi] = np.where(count > 1, sq / (count - 1), np.nan) ** 0.5
+        elif stat == "min":
+            out[lo:hi] = np.where(valid, win, np.inf).min(axis=1)
+        elif stat == "max":
+            out[lo:hi] = np.where(valid, win, -np.inf).max(axis=1)
+        else:
+            raise ValueError(f"Bilinmeyen pencere istatistiği: {stat} (geçerli: {ROLLING_STATS} veya 'lag')")
+    return out
+
+
+def compute_window_features(values, group_codes, spec=WINDOW_SPEC):
+    """Tüm spec özelliklerini tek bir gruplu düzen üzerinden hesaplar.
+
+    `values`: satış değerleri (orijinal satır sırasıyla), `group_codes`: seri kimlikleri.
+    Dönüş: {özellik adı: orijinal satır sırasında float64 dizi}. Yetersiz geçmişte lag NaN'dır.
+    """
+    layout = GroupedLayout(group_codes)
+    v = np.asarray(values, dtype=np.float64)[layout.order]
+
+    features = {}
+    for name, (stat, window) in spec.items():
+        if stat == "lag":
+            features[name] = layout.scatter(_lag(v, layout.pos, window))
+        else:
+            features[name] = layout.scatter(_rolling(v, layout.pos, window, stat))
+    return features